@@ -0,0 +1,147 @@
+import os
+import math
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from .answer_key import AnswerKey
+from .attempts import NOT_PRESENTED, UNANSWERED
+from .batch_grading import answer_codes
+from .shuffling import ANSWER_LETTERS, OPTION_KEYS
+
+logger = logging.getLogger(__name__)
+
+# Attempts read from MongoDB and accumulated per NumPy chunk
+ANALYSIS_CHUNK_SIZE = int(os.getenv("ANALYSIS_CHUNK_SIZE", "5000"))
+
+_OPTION_CODES = np.frombuffer(ANSWER_LETTERS.encode("ascii"), dtype=np.uint8)
+_UNANSWERED_CODE = ord(UNANSWERED)
+
+
+class ItemAnalysis:
+    """Single-pass classical test theory accumulators for one quiz
+
+    Attempts are added in chunks of source-order answer strings. Only sums
+    are kept (per question: correct count, correct x total score, option
+    counts; overall: total score and its square), so memory does not grow
+    with the number of attempts.
+    """
+
+    def __init__(self, answer_key: AnswerKey):
+        """Initialize empty accumulators"""
+        self._key = answer_codes(answer_key)
+        question_count = len(self._key)
+        self._attempts = 0
+        self._skipped = 0
+        self._score_sum = 0
+        self._score_squares = 0
+        self._correct = np.zeros(question_count, dtype=np.int64)
+        self._correct_score = np.zeros(question_count, dtype=np.int64)
+        self._options = np.zeros((question_count, len(_OPTION_CODES)), dtype=np.int64)
+        self._omitted = np.zeros(question_count, dtype=np.int64)
+
+    def add(self, answers: Sequence[str]) -> None:
+        """Accumulate a chunk of attempts"""
+        question_count = len(self._key)
+        # Sampled attempts did not see every question and are left out
+        rows = [row for row in answers
+                if len(row) == question_count and NOT_PRESENTED not in row]
+        self._skipped += len(answers) - len(rows)
+        if not rows:
+            return
+
+        matrix = np.frombuffer(
+            "".join(rows).encode("ascii"), dtype=np.uint8).reshape(len(rows), question_count)
+        correct = matrix == self._key
+        scores = correct.sum(axis=1, dtype=np.int64)
+
+        self._attempts += len(rows)
+        self._score_sum += int(scores.sum())
+        self._score_squares += int((scores * scores).sum())
+        self._correct += correct.sum(axis=0)
+        self._correct_score += scores @ correct
+        self._options += (matrix[:, :, None] == _OPTION_CODES).sum(axis=0)
+        self._omitted += (matrix == _UNANSWERED_CODE).sum(axis=0)
+
+    def result(self) -> Dict[str, Any]:
+        """Compute the item statistics from the accumulated sums"""
+        n = self._attempts
+        question_count = len(self._key)
+        items: List[Dict[str, Any]] = []
+
+        mean = self._score_sum / n if n else None
+        variance = self._score_squares / n - mean * mean if n else None
+
+        if n:
+            p = self._correct / n
+            item_variance = p * (1 - p)
+            # Population covariance of each item with the total score
+            covariance = self._correct_score / n - p * mean
+            point_biserial = _safe_ratio(covariance, np.sqrt(item_variance * variance))
+            # Item removed from the total it is correlated with
+            rest_variance = variance - 2 * covariance + item_variance
+            corrected = _safe_ratio(
+                covariance - item_variance,
+                np.sqrt(np.maximum(item_variance * rest_variance, 0.0)))
+        else:
+            p = point_biserial = corrected = [None] * question_count
+
+        for index in range(question_count):
+            distractors = {
+                key: int(count) for key, count in zip(OPTION_KEYS, self._options[index])}
+            distractors["omitted"] = int(self._omitted[index])
+            items.append({
+                "question_number": index + 1,
+                "p_value": _round(p[index]),
+                "point_biserial": _round(point_biserial[index]),
+                "corrected_point_biserial": _round(corrected[index]),
+                "distractors": distractors,
+            })
+
+        kr20 = None
+        if n and question_count > 1 and variance > 0:
+            kr20 = (question_count / (question_count - 1)) * (
+                1 - float(item_variance.sum()) / variance)
+
+        return {
+            "attempts": n,
+            "skipped_attempts": self._skipped,
+            "total_questions": question_count,
+            "mean_score": _round(mean),
+            "score_std": _round(math.sqrt(max(variance, 0.0)) if n else None),
+            "kr20": _round(kr20),
+            "items": items,
+        }
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> List[Optional[float]]:
+    """Divide elementwise, with None where the denominator is zero"""
+    return [float(num / den) if den > 1e-12 else None
+            for num, den in zip(numerator, denominator)]
+
+
+def _round(value: Optional[float], digits: int = 4) -> Optional[float]:
+    return round(float(value), digits) if value is not None else None
+
+
+async def analyze_quiz(db, quiz: Dict[str, Any],
+                       chunk_size: int = ANALYSIS_CHUNK_SIZE,
+                       executor=None) -> Dict[str, Any]:
+    """Stream the stored attempts of a quiz through the item analysis
+
+    With a WorkExecutor, large chunks are accumulated on a worker thread.
+    """
+    analysis = ItemAnalysis(quiz["answer_key"])
+    question_count = len(quiz["answer_key"])
+    async for chunk in db.iter_attempt_answers(quiz["id"], chunk_size):
+        if executor is None:
+            analysis.add(chunk)
+        else:
+            await executor.run("analysis", len(chunk) * question_count, analysis.add, chunk)
+
+    result = analysis.result()
+    if result["skipped_attempts"]:
+        logger.warning("Skipped %d sampled or incomplete attempts of '%s'",
+                       result["skipped_attempts"], quiz["quiz_name"])
+    result["quiz_name"] = quiz["quiz_name"]
+    result["id"] = quiz["id"]
+    return result
@@ -0,0 +1,106 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from .shuffling import ANSWER_INDEXES, ANSWER_LETTERS, OPTION_POSITIONS, ShufflePlan
+
+# Answers are packed four to a byte, two bits each, first question in the
+# low bits. _BYTE_LETTERS decodes one packed byte back to its four letters.
+_ANSWERS_PER_BYTE = 4
+_BYTE_LETTERS = tuple(
+    "".join(ANSWER_LETTERS[(value >> (2 * slot)) & 0b11]
+            for slot in range(_ANSWERS_PER_BYTE))
+    for value in range(256)
+)
+
+
+class AnswerKey:
+    """The correct answers of a quiz in source question order
+
+    Stored as a packed bytes field next to the quiz (2 bits per question),
+    so grading reads a few bytes per quiz instead of every question's text.
+    Answers that are not one of a, b, c, d cannot be packed; keys built from
+    such legacy quizzes keep the raw values and are never stored.
+    """
+
+    __slots__ = ("answers",)
+
+    def __init__(self, answers: Sequence[str]):
+        self.answers = answers
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    @classmethod
+    def from_questions(cls, questions: Iterable[Dict[str, Any]]) -> "AnswerKey":
+        """Build a key from question documents"""
+        return cls(tuple(question.get("correct_answer") for question in questions))
+
+    @classmethod
+    def unpack(cls, packed: bytes, question_count: int) -> "AnswerKey":
+        """Decode a key created by ``pack``"""
+        letters = "".join(_BYTE_LETTERS[value] for value in packed)
+        return cls(letters[:question_count])
+
+    def pack(self) -> bytes:
+        """Encode the answers at 2 bits each
+
+        Raises ValueError when an answer is not one of a, b, c, d.
+        """
+        packed = bytearray((len(self.answers) + _ANSWERS_PER_BYTE - 1) // _ANSWERS_PER_BYTE)
+        for index, answer in enumerate(self.answers):
+            try:
+                value = ANSWER_INDEXES[answer]
+            except (KeyError, TypeError):
+                raise ValueError(
+                    f"Question {index + 1}: answer {answer!r} cannot be packed")
+            packed[index // _ANSWERS_PER_BYTE] |= value << (2 * (index % _ANSWERS_PER_BYTE))
+        return bytes(packed)
+
+    def for_variant(self, plan: ShufflePlan) -> "AnswerKey":
+        """Get the key of a shuffled variant, in displayed order"""
+        order = plan.question_order
+        if order is None:
+            order = range(len(self.answers))
+        option_orders = plan.option_orders
+
+        answers = []
+        for position, source in enumerate(order):
+            answer = self.answers[source]
+            if option_orders is not None:
+                index = ANSWER_INDEXES.get(
+                    answer.lower() if isinstance(answer, str) else answer)
+                if index is not None:
+                    answer = ANSWER_LETTERS[OPTION_POSITIONS[option_orders[position]][index]]
+            answers.append(answer)
+        return AnswerKey(answers)
+
+    def grade(self, submitted: Sequence[str]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Compare submitted answers with the key
+
+        Returns the score and one result item per question.
+        """
+        score = 0
+        results = []
+        for number, (user_answer, correct_answer) in enumerate(
+                zip(submitted, self.answers), start=1):
+            user_answer = user_answer.lower()
+            is_correct = user_answer == correct_answer
+            score += is_correct
+            results.append({
+                "question_number": number,
+                "user_answer": user_answer,
+                "correct_answer": correct_answer,
+                "is_correct": is_correct
+            })
+        return score, results
+
+
+def answer_key_fields(questions: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Build the answer key fields stored on a quiz document
+
+    Returns None when the answers cannot be packed.
+    """
+    key = AnswerKey.from_questions(questions)
+    try:
+        packed = key.pack()
+    except ValueError:
+        return None
+    return {"answer_key": packed, "question_count": len(key)}
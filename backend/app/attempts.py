@@ -0,0 +1,249 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from .shuffling import ANSWER_INDEXES, ANSWER_LETTERS, OPTION_PERMUTATIONS, ShufflePlan
+from .stats import NOT_PRESENTED, rollup_attempts
+
+logger = logging.getLogger(__name__)
+
+# Attempt writer settings
+ATTEMPT_QUEUE_SIZE = int(os.getenv("ATTEMPT_QUEUE_SIZE", "10000"))
+ATTEMPT_FLUSH_SIZE = int(os.getenv("ATTEMPT_FLUSH_SIZE", "500"))
+ATTEMPT_FLUSH_INTERVAL_SECONDS = float(os.getenv("ATTEMPT_FLUSH_INTERVAL_SECONDS", "1"))
+ATTEMPT_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv("ATTEMPT_ENQUEUE_TIMEOUT_SECONDS", "2"))
+
+# Stored for an answer that is not one of a, b, c, d
+UNANSWERED = "-"
+
+# Queued by stop() after the last attempt
+_STOP = object()
+
+
+class AttemptQueueFull(Exception):
+    """Raised when an attempt cannot be queued before the enqueue timeout"""
+    pass
+
+
+def source_answers(
+        submitted: Sequence[str],
+        plan: Optional[ShufflePlan] = None,
+        question_count: Optional[int] = None) -> str:
+    """Map submitted answers back to source question and option order
+
+    Returns one letter per source question, with UNANSWERED for anything
+    that is not one of a, b, c, d, so attempts of every variant of a quiz
+    can be compared directly. Questions a sampled variant did not show
+    are NOT_PRESENTED.
+    """
+    letters = [
+        answer if answer in ANSWER_INDEXES else UNANSWERED
+        for answer in (answer.lower() for answer in submitted)
+    ]
+    if plan is None:
+        return "".join(letters)
+
+    order = plan.question_order
+    if order is None:
+        order = range(len(letters))
+    option_orders = plan.option_orders
+
+    result = [NOT_PRESENTED] * (question_count or len(letters))
+    for position, source in enumerate(order):
+        letter = letters[position]
+        if option_orders is not None and letter != UNANSWERED:
+            # Displayed option i shows original option OPTION_PERMUTATIONS[...][i]
+            letter = ANSWER_LETTERS[
+                OPTION_PERMUTATIONS[option_orders[position]][ANSWER_INDEXES[letter]]]
+        result[source] = letter
+    return "".join(result)
+
+
+def attempt_record(
+        quiz: Dict[str, Any],
+        submitted: Sequence[str],
+        score: int,
+        plan: Optional[ShufflePlan] = None) -> Dict[str, Any]:
+    """Build the attempt document stored for a graded submission
+
+    ``correct`` holds "1" or "0" per source question (NOT_PRESENTED for
+    questions a sampled variant did not show) for the statistics rollups.
+    """
+    answer_key = quiz["answer_key"]
+    answers = source_answers(submitted, plan, len(answer_key))
+    correct = "".join(
+        NOT_PRESENTED if answer == NOT_PRESENTED
+        else "1" if answer == expected else "0"
+        for answer, expected in zip(answers, answer_key.answers))
+    return {
+        "quiz_id": quiz["_id"],
+        "quiz_name": quiz["quiz_name"],
+        "quiz_version": quiz.get("version"),
+        "answers": answers,
+        "correct": correct,
+        "score": score,
+        "total_questions": len(submitted),
+        "submitted_at": datetime.now(timezone.utc),
+    }
+
+
+class AttemptWriter:
+    """Write-behind persistence of quiz attempts
+
+    Submissions put their attempt on a bounded in-process queue and return
+    immediately. A background task writes the queue to MongoDB with one
+    ``insert_many`` per batch, flushing once ``flush_size`` attempts are
+    waiting or ``flush_interval`` seconds after the first one arrived. Each
+    batch is then added to the per-quiz statistics rollups.
+
+    When the queue is full, submissions wait up to ``enqueue_timeout``
+    seconds for room and then fail with AttemptQueueFull, so a slow
+    database pushes back on clients instead of growing memory. Queued
+    attempts are flushed when the writer stops.
+
+    Disabled when ``max_size`` is 0.
+    """
+
+    def __init__(
+            self,
+            max_size: int = ATTEMPT_QUEUE_SIZE,
+            flush_size: int = ATTEMPT_FLUSH_SIZE,
+            flush_interval: float = ATTEMPT_FLUSH_INTERVAL_SECONDS,
+            enqueue_timeout: float = ATTEMPT_ENQUEUE_TIMEOUT_SECONDS):
+        """Initialize with an empty queue"""
+        self._max_size = max_size
+        self._flush_size = max(1, flush_size)
+        self._flush_interval = flush_interval
+        self._enqueue_timeout = enqueue_timeout
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(0, max_size))
+        self._db = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._queued = 0
+        self._waited = 0
+        self._rejected = 0
+        self._written = 0
+        self._failed = 0
+        self._flushes = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether attempts are persisted at all"""
+        return self._max_size > 0
+
+    def start(self, db) -> None:
+        """Start the background flush task writing to ``db``"""
+        if self.enabled and self._task is None:
+            self._db = db
+            self._closed = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush every queued attempt and stop the flush task"""
+        if self._task is None:
+            return
+        self._closed = True
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+        # Attempts that were waiting for room when the stop marker was queued
+        remaining = []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        if remaining:
+            await self._flush(remaining)
+
+    async def record(self, attempt: Dict[str, Any]) -> None:
+        """Queue an attempt for writing, waiting briefly if the queue is full"""
+        if self._task is None or self._closed:
+            return
+
+        try:
+            self._queue.put_nowait(attempt)
+        except asyncio.QueueFull:
+            self._waited += 1
+            try:
+                await asyncio.wait_for(self._queue.put(attempt), self._enqueue_timeout)
+            except asyncio.TimeoutError:
+                self._rejected += 1
+                raise AttemptQueueFull(
+                    f"Attempt queue is full ({self._max_size} waiting)")
+        self._queued += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the writer counters"""
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "queue_size": self._queue.qsize(),
+            "max_queue_size": self._max_size,
+            "queued": self._queued,
+            "waited": self._waited,
+            "rejected": self._rejected,
+            "written": self._written,
+            "failed": self._failed,
+            "flushes": self._flushes,
+        }
+
+    async def _run(self) -> None:
+        """Collect attempts into batches and flush them until stopped"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch: List[Dict[str, Any]] = []
+            item = await self._queue.get()
+            deadline = loop.time() + self._flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self._flush_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """Write one batch of attempts and add it to the statistics"""
+        self._flushes += 1
+        try:
+            inserted, failures = await self._db.insert_attempts(batch)
+        except Exception as e:
+            self._failed += len(batch)
+            logger.error("Failed to write %d quiz attempts: %s", len(batch), e)
+            return
+
+        self._written += inserted
+        self._failed += len(failures)
+        if failures:
+            logger.error("Failed to write %d of %d quiz attempts: %s",
+                         len(failures), len(batch), failures[0][2])
+            # Only the attempts that were stored count towards the statistics
+            failed = {index for index, _, _ in failures}
+            batch = [attempt for index, attempt in enumerate(batch) if index not in failed]
+        if not batch:
+            return
+
+        try:
+            await self._db.increment_quiz_stats(rollup_attempts(batch))
+        except Exception as e:
+            # The attempts are stored, so a rebuild recovers the rollups
+            logger.error("Failed to update statistics for %d attempts: %s", len(batch), e)
+
+        # Applied or failed, no increment of these attempts can land any more
+        try:
+            await self._db.settle_attempts(batch)
+        except Exception as e:
+            logger.error("Failed to settle %d quiz attempts: %s", len(batch), e)
@@ -0,0 +1,108 @@
+import os
+import base64
+import logging
+from typing import Any, Dict, List, Sequence
+import numpy as np
+from .answer_key import AnswerKey
+
+logger = logging.getLogger(__name__)
+
+# Students graded per NumPy chunk; bounds the size of the answer matrix
+BATCH_GRADE_CHUNK_SIZE = int(os.getenv("BATCH_GRADE_CHUNK_SIZE", "2048"))
+# Largest number of answer sheets accepted in one request
+BATCH_GRADE_MAX_STUDENTS = int(os.getenv("BATCH_GRADE_MAX_STUDENTS", "20000"))
+
+# Never produced by ASCII-encoded answers, so it never matches
+_NO_MATCH = 0xFF
+# Setting this bit lowercases ASCII letters
+_LOWERCASE_BIT = 0x20
+
+
+class InvalidAnswerSheet(ValueError):
+    """Raised when an answer sheet cannot be encoded for grading"""
+
+    def __init__(self, index: int, reason: str):
+        super().__init__(f"Answer sheet {index + 1}: {reason}")
+        self.index = index
+        self.reason = reason
+
+    def __reduce__(self):
+        # Raised in worker processes, so it must survive pickling
+        return type(self), (self.index, self.reason)
+
+
+def answer_codes(answer_key: AnswerKey) -> np.ndarray:
+    """Encode an answer key as one uint8 character code per question"""
+    answers = answer_key.answers
+    if isinstance(answers, str):
+        return np.frombuffer(answers.encode("ascii"), dtype=np.uint8)
+
+    # Legacy keys may hold answers that are not a single character
+    return np.array(
+        [ord(answer) if isinstance(answer, str) and len(answer) == 1 and answer.isascii()
+         else _NO_MATCH for answer in answers],
+        dtype=np.uint8)
+
+
+def encode_sheets(sheets: Sequence[str], question_count: int, offset: int = 0) -> np.ndarray:
+    """Encode answer strings as a (students, questions) uint8 matrix
+
+    Each sheet holds one character per question. Letters are matched case
+    insensitively; any other character (e.g. "-" for a blank) is wrong.
+    """
+    for index, sheet in enumerate(sheets):
+        if len(sheet) != question_count:
+            raise InvalidAnswerSheet(
+                offset + index,
+                f"expected {question_count} answers, got {len(sheet)}")
+    try:
+        data = "".join(sheets).encode("ascii")
+    except UnicodeEncodeError:
+        index = next(i for i, sheet in enumerate(sheets) if not sheet.isascii())
+        raise InvalidAnswerSheet(offset + index, "answers must be ASCII letters")
+
+    matrix = np.frombuffer(data, dtype=np.uint8).reshape(len(sheets), question_count)
+    return matrix | _LOWERCASE_BIT
+
+
+def grade_sheets(
+        answer_key: AnswerKey,
+        sheets: Sequence[str],
+        compact: bool = False,
+        chunk_size: int = BATCH_GRADE_CHUNK_SIZE) -> Dict[str, Any]:
+    """Grade many answer sheets against one answer key
+
+    Sheets are graded ``chunk_size`` at a time, so the working matrices stay
+    small however many students are submitted. Per-student correctness is
+    returned as lists of booleans, or with ``compact`` as base64 strings of
+    bits (first question in the most significant bit of the first byte).
+    """
+    question_count = len(answer_key)
+    key = answer_codes(answer_key)
+
+    scores: List[int] = []
+    correctness: List[Any] = []
+    question_correct = np.zeros(question_count, dtype=np.int64)
+
+    for start in range(0, len(sheets), chunk_size):
+        matrix = encode_sheets(sheets[start:start + chunk_size], question_count, start)
+        correct = matrix == key
+        scores.extend(correct.sum(axis=1).tolist())
+        question_correct += correct.sum(axis=0)
+        if compact:
+            correctness.extend(
+                base64.b64encode(row.tobytes()).decode("ascii")
+                for row in np.packbits(correct, axis=1))
+        else:
+            correctness.extend(correct.tolist())
+
+    students = len(sheets)
+    return {
+        "students": students,
+        "total_questions": question_count,
+        "scores": scores,
+        "mean_score": round(sum(scores) / students, 2) if students else 0.0,
+        "question_correct_counts": question_correct.tolist(),
+        "correctness": correctness,
+        "compact": compact,
+    }
@@ -0,0 +1,187 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from .coalescing import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Cache settings
+QUIZ_CACHE_SIZE = int(os.getenv("QUIZ_CACHE_SIZE", "256"))
+QUIZ_CACHE_TTL_SECONDS = float(os.getenv("QUIZ_CACHE_TTL_SECONDS", "300"))
+
+
+class QuizCache:
+    """In-process read-through cache of quiz documents
+
+    Entries are keyed by quiz id with a secondary index on quiz name, bounded
+    in size (least recently used entries are evicted first) and expire after
+    a fixed TTL. Each worker has its own cache, so the TTL also bounds how
+    long another worker's write can go unnoticed.
+
+    Concurrent misses for the same quiz share a single database load.
+
+    Cached documents are shared between requests and must not be mutated.
+    """
+
+    def __init__(
+            self,
+            max_size: int = QUIZ_CACHE_SIZE,
+            ttl: float = QUIZ_CACHE_TTL_SECONDS,
+            clock: Callable[[], float] = time.monotonic):
+        """Initialize an empty cache"""
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._names: Dict[str, str] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._generation = 0
+        self._flights = SingleFlight()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything at all"""
+        return self._max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_by_id(self, quiz_id: str) -> Optional[Dict[str, Any]]:
+        """Get a cached quiz by ID, or None on a miss"""
+        entry = self._entries.get(quiz_id)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        expires_at, quiz = entry
+        if expires_at <= self._clock():
+            self._remove(quiz_id)
+            self._expirations += 1
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(quiz_id)
+        self._hits += 1
+        return quiz
+
+    def get_by_name(self, quiz_name: str) -> Optional[Dict[str, Any]]:
+        """Get a cached quiz by name, or None on a miss"""
+        quiz_id = self._names.get(quiz_name)
+        if quiz_id is None:
+            self._misses += 1
+            return None
+        return self.get_by_id(quiz_id)
+
+    def peek_by_id(self, quiz_id: str) -> Optional[Dict[str, Any]]:
+        """Get a fresh cached quiz by ID without touching counters or LRU order"""
+        entry = self._entries.get(quiz_id)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    def peek_by_name(self, quiz_name: str) -> Optional[Dict[str, Any]]:
+        """Get a fresh cached quiz by name without touching counters or LRU order"""
+        quiz_id = self._names.get(quiz_name)
+        return self.peek_by_id(quiz_id) if quiz_id is not None else None
+
+    def put(self, quiz: Dict[str, Any]) -> None:
+        """Store a quiz document under both its ID and its name"""
+        if not self.enabled:
+            return
+
+        quiz_id = quiz["id"]
+        if quiz_id in self._entries:
+            self._remove(quiz_id)
+
+        self._entries[quiz_id] = (self._clock() + self._ttl, quiz)
+        self._names[quiz["quiz_name"]] = quiz_id
+
+        while len(self._entries) > self._max_size:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self._evictions += 1
+
+    def invalidate(
+            self,
+            quiz_id: Optional[str] = None,
+            quiz_name: Optional[str] = None) -> None:
+        """Drop a quiz from the cache by ID and/or name"""
+        # Loads already in flight must not repopulate the cache
+        self._generation += 1
+        if quiz_name is not None:
+            named_id = self._names.pop(quiz_name, None)
+            if quiz_id is None:
+                quiz_id = named_id
+        if quiz_id is not None and quiz_id in self._entries:
+            self._remove(quiz_id)
+            self._invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every cached quiz"""
+        self._generation += 1
+        self._entries.clear()
+        self._names.clear()
+
+    async def load_by_id(
+            self,
+            quiz_id: str,
+            loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Get a quiz by ID, loading and caching it on a miss"""
+        quiz = self.get_by_id(quiz_id)
+        if quiz is None:
+            quiz = await self._flights.do(
+                ("id", quiz_id), self._load, loader, quiz_id)
+        return quiz
+
+    async def load_by_name(
+            self,
+            quiz_name: str,
+            loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Get a quiz by name, loading and caching it on a miss"""
+        quiz = self.get_by_name(quiz_name)
+        if quiz is None:
+            quiz = await self._flights.do(
+                ("name", quiz_name), self._load, loader, quiz_name)
+        return quiz
+
+    async def _load(
+            self,
+            loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+            key: str) -> Optional[Dict[str, Any]]:
+        """Load a quiz and cache it unless it was invalidated meanwhile"""
+        generation = self._generation
+        quiz = await loader(key)
+        if quiz is not None and generation == self._generation:
+            self.put(quiz)
+        return quiz
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the cache counters"""
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "ttl_seconds": self._ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "invalidations": self._invalidations,
+            "loads": self._flights.calls,
+            "coalesced_loads": self._flights.coalesced,
+        }
+
+    def _remove(self, quiz_id: str) -> None:
+        """Remove an entry and its name index"""
+        _, quiz = self._entries.pop(quiz_id)
+        if self._names.get(quiz["quiz_name"]) == quiz_id:
+            del self._names[quiz["quiz_name"]]
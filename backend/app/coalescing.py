@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight call
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it is still running await the same task instead of starting their
+    own. The task is shielded, so a cancelled caller does not cancel the
+    call for everyone else.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._calls = 0
+        self._coalesced = 0
+
+    @property
+    def calls(self) -> int:
+        """Number of calls actually started"""
+        return self._calls
+
+    @property
+    def coalesced(self) -> int:
+        """Number of callers that joined a call already in flight"""
+        return self._coalesced
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(
+            self,
+            key: Hashable,
+            func: Callable[..., Awaitable[Any]],
+            *args: Any) -> Any:
+        """Run ``func(*args)`` unless a call for ``key`` is already running"""
+        task = self._inflight.get(key)
+        if task is None:
+            self._calls += 1
+            task = asyncio.ensure_future(func(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self._coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Remove a finished call so the next caller starts a fresh one"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Mark the exception as retrieved even if every caller is gone
+            logger.debug("Coalesced call for %r failed: %s", key, task.exception())
@@ -0,0 +1,184 @@
+import os
+import gzip
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple, Union
+from fastapi.responses import Response
+from .utils import mongodb_json_serializer
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Compression settings
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+JSON_MEDIA_TYPE = "application/json"
+
+# Supported encodings, most preferred first
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a response body with the given content coding"""
+    if encoding == "gzip":
+        # mtime=0 keeps the output identical for identical bodies
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def negotiate_encoding(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    """Pick the content coding for a body of ``size`` bytes, or None for identity"""
+    if not accept_encoding or size < COMPRESSION_MIN_SIZE:
+        return None
+
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressedPayload:
+    """A serialized response body with its compressed forms cached alongside
+
+    Each encoding is computed the first time a client asks for it and then
+    reused, so cacheable responses are compressed once rather than per
+    request. Extra response headers (e.g. a pagination cursor) can be kept
+    with the payload.
+    """
+
+    __slots__ = ("body", "headers", "_encoded")
+
+    def __init__(self, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self.body = body
+        self.headers = headers or {}
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """Get the body in the given content coding"""
+        if encoding is None:
+            return self.body
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding)
+        return data
+
+
+def encode_body(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Compress a body for the client, returning it with its content coding"""
+    encoding = negotiate_encoding(accept_encoding, len(body))
+    if encoding is not None:
+        body = compress(body, encoding)
+    return body, encoding
+
+
+def encode_json(data: Any, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Serialize a document and compress it for the client"""
+    return encode_body(mongodb_json_serializer.dumps(data), accept_encoding)
+
+
+def payload_response(
+        payload: Union[bytes, CompressedPayload],
+        accept_encoding: Optional[str],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None) -> Response:
+    """Build a JSON response, compressed if the client accepts it
+
+    Plain bytes are compressed on the fly; a CompressedPayload reuses its
+    cached encodings.
+    """
+    if isinstance(payload, bytes):
+        body, encoding = encode_body(payload, accept_encoding)
+        return encoded_response(body, encoding, status_code, headers)
+
+    encoding = negotiate_encoding(accept_encoding, len(payload.body))
+    response_headers = dict(payload.headers)
+    if headers:
+        response_headers.update(headers)
+    return encoded_response(payload.encoded(encoding), encoding, status_code, response_headers)
+
+
+def encoded_response(
+        body: bytes,
+        encoding: Optional[str],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None) -> Response:
+    """Build a JSON response from a body already in the given content coding"""
+    response_headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        response_headers["Content-Encoding"] = encoding
+    if headers:
+        response_headers.update(headers)
+    return Response(
+        content=body,
+        status_code=status_code,
+        headers=response_headers,
+        media_type=JSON_MEDIA_TYPE
+    )
+
+
+class PayloadCache:
+    """Bounded LRU cache of serialized (and compressed) response payloads
+
+    Keys must identify the content exactly (e.g. include a content version),
+    so entries never need to expire; they are only evicted for space.
+    """
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE):
+        """Initialize an empty cache"""
+        self._max_size = max_size
+        self._entries: "OrderedDict[Hashable, CompressedPayload]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> Optional[CompressedPayload]:
+        """Get a cached payload, or None on a miss"""
+        payload = self._entries.get(key)
+        if payload is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return payload
+
+    def put(self, key: Hashable, payload: CompressedPayload) -> CompressedPayload:
+        """Store a payload and return it"""
+        if self._max_size <= 0:
+            return payload
+        self._entries[key] = payload
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        return payload
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the cache counters"""
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "encodings": list(SUPPORTED_ENCODINGS),
+        }
@@ -1,42 +1,110 @@
 import os
-import sys
+import re
+import json
+import time
+import hashlib
 import logging
-from abc import ABC, abstractmethod
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from datetime import datetime, timezone
 from bson import ObjectId
 from dotenv import load_dotenv
+from .answer_key import AnswerKey, answer_key_fields
+from .health import PoolMonitor
+from .metrics import instrument_operations
 
-# Configure logging
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 # Load environment variables
 load_dotenv()
 
 # MongoDB connection settings
-MONGODB_URL = os.getenv("MONGODB_URL")
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "quizzes_db")
 
+# Connection pool settings (environment variable -> motor client option)
+POOL_SETTINGS = {
+    "MONGODB_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGODB_MIN_POOL_SIZE": "minPoolSize",
+    "MONGODB_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGODB_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+    "MONGODB_MAX_CONNECTING": "maxConnecting",
+    "MONGODB_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+    "MONGODB_CONNECT_TIMEOUT_MS": "connectTimeoutMS",
+}
 
+
+# How long a stored Idempotency-Key response is replayed
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+# Document in the meta collection whose counter changes with the quiz list
+QUIZ_LIST_META_ID = "quizzes"
+# Document in the meta collection whose counter changes with the statistics
+QUIZ_STATS_META_ID = "quiz_stats"
+
+# Stored alongside each quiz for grading and exports; never part of a quiz response
+QUIZ_HIDDEN_FIELDS = {"answer_key": 0, "question_count": 0, "updated_at": 0}
+QUIZ_EXPORT_PROJECTION = {"answer_key": 0, "question_count": 0}
+ANSWER_KEY_PROJECTION = {"quiz_name": 1, "version": 1, "answer_key": 1, "question_count": 1}
+
+
+def content_version(quiz_data):
+    """Hash the content of a quiz into a short version string"""
+    content = json.dumps(
+        {"quiz_name": quiz_data.get("quiz_name"),
+         "questions": quiz_data.get("questions", [])},
+        sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+def pool_options_from_env():
+    """Read connection pool options from the environment
+
+    Raises ValueError naming the variable when a value is not an integer.
+    """
+    options = {"serverSelectionTimeoutMS": 5000}
+    for env_name, option in POOL_SETTINGS.items():
+        value = os.getenv(env_name)
+        if value:
+            try:
+                options[option] = int(value)
+            except ValueError:
+                raise ValueError(f"{env_name} must be an integer, got {value!r}") from None
+    return options
+
+
+@instrument_operations
 class Database:
-    """MongoDB database connection and operations"""
+    """MongoDB repository shared by every route handler
+
+    A single instance (and therefore a single connection pool) is created
+    per worker in the application lifespan and injected into the handlers.
+    Every public coroutine method is counted and timed in the metrics.
+    """
 
-    def __init__(self, url, db_name):
+    def __init__(self, url, db_name, **pool_options):
         self._url = url
         self._db_name = db_name
+        self._pool_options = pool_options
         self._client = None
         self._database = None
         self._quizzes = None
+        self._pool_monitor = PoolMonitor()
         self._connect()
 
     def _connect(self):
         """Connect to MongoDB database"""
         try:
-            # Create MongoDB client with a timeout
+            # Create the MongoDB client and its connection pool
             self._client = AsyncIOMotorClient(
-                self._url, serverSelectionTimeoutMS=5000)
+                self._url, event_listeners=[self._pool_monitor], **self._pool_options)
             self._database = self._client[self._db_name]
             self._quizzes = self._database.quizzes
+            self._meta = self._database.meta
+            self._attempts = self._database.attempts
+            self._stats = self._database.quiz_stats
+            self._idempotency = self._database.idempotency_keys
 
             # Log connection information (without exposing credentials)
             connection_url_parts = self._url.split('@')
@@ -45,83 +113,486 @@ class Database:
                 safe_url = f"mongodb+srv://****:****@{connection_url_parts[1]}"
             else:
                 safe_url = self._url
-            logger.info(f"MongoDB configured with: {safe_url}")
+            logger.info("MongoDB configured with: %s (pool options: %s)",
+                        safe_url, self._pool_options)
 
         except Exception as e:
-            logger.error(f"Failed to initialize MongoDB connection: {e}")
+            logger.error("Failed to initialize MongoDB connection: %s", e)
             raise
 
-    async def get_all_quizzes(self):
-        """Get all quizzes from the database"""
-        cursor = self._quizzes.find({})
-        quizzes = []
+    @property
+    def client(self):
+        """Get the underlying motor client"""
+        return self._client
+
+    @property
+    def database(self):
+        """Get the underlying motor database"""
+        return self._database
+
+    @property
+    def pool_options(self):
+        """Get the options the connection pool was created with"""
+        return dict(self._pool_options)
+
+    def pool_stats(self):
+        """Get the connection pool saturation counters"""
+        return self._pool_monitor.stats()
+
+    async def ping(self):
+        """Check that the server is reachable"""
+        await self._client.admin.command('ping')
+
+    async def ensure_indexes(self):
+        """Create the indexes the application relies on"""
+        await self._quizzes.create_index("quiz_name", unique=True)
+        await self._quizzes.create_index("updated_at")
+        await self._attempts.create_index([("quiz_id", 1), ("submitted_at", 1)])
+        await self._stats.create_index("quiz_name")
+        await self._idempotency.create_index(
+            "created_at", expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS)
+
+    async def backfill_versions(self):
+        """Add a content version to quizzes stored before versions existed"""
+        updated = 0
+        async for quiz in self._quizzes.find({"version": {"$exists": False}}):
+            await self._quizzes.update_one(
+                {"_id": quiz["_id"], "version": {"$exists": False}},
+                {"$set": {"version": content_version(quiz)}})
+            updated += 1
+        if updated:
+            await self._bump_list_version()
+            logger.info("Added content versions to %d quizzes", updated)
+        return updated
+
+    async def backfill_answer_keys(self):
+        """Add a packed answer key to quizzes stored before answer keys existed
+
+        Quizzes whose answers cannot be packed are left as they are and
+        graded from their raw answers.
+        """
+        updated = 0
+        skipped = 0
+        async for quiz in self._quizzes.find(
+                {"answer_key": {"$exists": False}}, {"questions.correct_answer": 1}):
+            fields = answer_key_fields(quiz.get("questions") or [])
+            if fields is None:
+                skipped += 1
+                continue
+            await self._quizzes.update_one({"_id": quiz["_id"]}, {"$set": fields})
+            updated += 1
+        if updated:
+            logger.info("Added answer keys to %d quizzes", updated)
+        if skipped:
+            logger.warning("%d quizzes have answers that cannot be packed", skipped)
+        return updated
+
+    def close(self):
+        """Close the connection pool"""
+        if self._client:
+            self._client.close()
+
+    async def iter_quizzes(self, quiz_names=None, name_prefix=None,
+                           updated_since=None, batch_size=None):
+        """Stream full quiz documents in ``_id`` order, one cursor batch at a time
+
+        ``updated_since`` also matches quizzes stored before ``updated_at``
+        existed when their ObjectId was generated at or after it.
+        """
+        query = {}
+        if quiz_names:
+            query["quiz_name"] = {"$in": list(quiz_names)}
+        elif name_prefix:
+            # An anchored, escaped prefix can use the quiz_name index
+            query["quiz_name"] = {"$regex": f"^{re.escape(name_prefix)}"}
+        if updated_since is not None:
+            if updated_since.tzinfo is None:
+                updated_since = updated_since.replace(tzinfo=timezone.utc)
+            query["$or"] = [
+                {"updated_at": {"$gte": updated_since}},
+                {"updated_at": {"$exists": False},
+                 "_id": {"$gte": ObjectId.from_datetime(updated_since)}},
+            ]
+
+        cursor = self._quizzes.find(query, QUIZ_EXPORT_PROJECTION).sort("_id", 1)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
         async for document in cursor:
             document["id"] = str(document["_id"])
+            yield document
+
+    async def list_quizzes(self, limit=None, after=None):
+        """List quiz summaries without loading the question bodies
+
+        Question counts are computed server-side with ``$size`` and the
+        results are keyset-paginated on ``_id``: pass the id of the last
+        quiz of the previous page as ``after``.
+        """
+        pipeline = []
+        if after is not None:
+            pipeline.append({"$match": {"_id": {"$gt": ObjectId(after)}}})
+        pipeline.append({"$sort": {"_id": 1}})
+        if limit is not None:
+            pipeline.append({"$limit": limit})
+        pipeline.append({"$project": {
+            "quiz_name": 1,
+            "total_questions": {"$ifNull": [
+                "$question_count", {"$size": {"$ifNull": ["$questions", []]}}]}
+        }})
+
+        quizzes = []
+        async for document in self._quizzes.aggregate(pipeline):
+            document["id"] = str(document.pop("_id"))
             quizzes.append(document)
         return quizzes
 
     async def get_quiz(self, quiz_name):
         """Get a quiz by name"""
-        quiz = await self._quizzes.find_one({"quiz_name": quiz_name})
+        quiz = await self._quizzes.find_one({"quiz_name": quiz_name}, QUIZ_HIDDEN_FIELDS)
         if quiz:
             quiz["id"] = str(quiz["_id"])
         return quiz
 
     async def save_quiz(self, quiz_data):
-        """Save a quiz to the database"""
+        """Save a quiz to the database
+
+        Raises DuplicateKeyError when a quiz with the same name exists.
+        """
+        self._prepare_quiz(quiz_data)
         result = await self._quizzes.insert_one(quiz_data)
+        await self._bump_list_version()
         return result.inserted_id
 
-    async def delete_quiz(self, quiz_name):
-        """Delete a quiz by name"""
-        result = await self._quizzes.delete_one({"quiz_name": quiz_name})
-        return result.deleted_count > 0
+    async def insert_quizzes(self, quizzes):
+        """Insert a batch of new quizzes in one unordered round trip
 
-    async def get_quiz_by_id(self, quiz_id):
-        """Get a quiz by ID"""
+        Returns the number of quizzes inserted and ``(index, code, message)``
+        for each quiz MongoDB rejected, e.g. code 11000 for a quiz_name that
+        already exists. The other quizzes of the batch are still inserted.
+        """
+        for quiz_data in quizzes:
+            self._prepare_quiz(quiz_data)
         try:
-            logger.info(f"get_quiz_by_id called with ID: {quiz_id}")
-            quiz_obj_id = ObjectId(quiz_id)
-            logger.info(f"ObjectId created: {quiz_obj_id}")
+            result = await self._quizzes.insert_many(quizzes, ordered=False)
+            inserted, failures = len(result.inserted_ids), []
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            failures = [(error["index"], error.get("code"), error.get("errmsg", ""))
+                        for error in e.details.get("writeErrors", [])]
+        if inserted:
+            await self._bump_list_version()
+        return inserted, failures
 
-            quiz = await self._quizzes.find_one({"_id": quiz_obj_id})
-            logger.info(f"Quiz found: {quiz is not None}")
+    def _prepare_quiz(self, quiz_data):
+        """Add the derived fields stored with every new quiz"""
+        quiz_data["version"] = content_version(quiz_data)
+        quiz_data["updated_at"] = datetime.now(timezone.utc)
+        quiz_data.update(answer_key_fields(quiz_data.get("questions", [])) or {})
 
-            if quiz:
-                quiz["id"] = str(quiz["_id"])
-            return quiz
-        except Exception as e:
-            logger.error(f"Error getting quiz by ID {quiz_id}: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+    async def delete_quiz(self, quiz_name):
+        """Delete a quiz by name
+
+        Its statistics rollup is left behind: rollups are only read by the ID
+        of an existing quiz, and the next rebuild drops the orphans.
+        Returns the ID of the deleted quiz, or None if there was no such quiz.
+        """
+        quiz = await self._quizzes.find_one_and_delete(
+            {"quiz_name": quiz_name}, projection={"_id": 1})
+        if not quiz:
             return None
+        await self._bump_list_version()
+        return str(quiz["_id"])
+
+    async def claim_idempotency_key(self, key, fingerprint):
+        """Claim an idempotency key for a new request
+
+        Returns None when the key was free (and is now held by the caller),
+        otherwise the record of the request that claimed it first.
+        """
+        while True:
+            try:
+                await self._idempotency.insert_one({
+                    "_id": key,
+                    "fingerprint": fingerprint,
+                    "status_code": None,
+                    "created_at": datetime.now(timezone.utc),
+                })
+                return None
+            except DuplicateKeyError:
+                record = await self._idempotency.find_one({"_id": key})
+                # Expired between the insert and the read: claim it again
+                if record is not None:
+                    return record
+
+    async def complete_idempotency_key(self, key, status_code, body, media_type):
+        """Store the response of the request holding an idempotency key"""
+        await self._idempotency.update_one(
+            {"_id": key},
+            {"$set": {"status_code": status_code, "body": body, "media_type": media_type}})
+
+    async def release_idempotency_key(self, key):
+        """Free an idempotency key whose request failed, so it can be retried"""
+        await self._idempotency.delete_one({"_id": key, "status_code": None})
 
-    async def get_quiz_by_id_from_db(self, db, quiz_id):
-        """Get a quiz by ID using a specific database connection"""
+    async def get_questions(self, quiz_id, offset, count, fields=None):
+        """Get ``count`` questions from ``offset`` without loading the others
+
+        The slice (and, with ``fields``, the sparse fieldset) is computed
+        server-side with ``$slice`` and ``$map``.
+        """
+        questions = {"$slice": ["$questions", offset, count]}
+        if fields:
+            questions = {"$map": {
+                "input": questions, "as": "q",
+                "in": {field: f"$$q.{field}" for field in fields}}}
+        return await self._project_questions(quiz_id, questions)
+
+    async def get_questions_at(self, quiz_id, indexes):
+        """Get the questions at the given source indexes, in that order"""
+        return await self._project_questions(quiz_id, {"$map": {
+            "input": list(indexes), "as": "i",
+            "in": {"$arrayElemAt": ["$questions", "$$i"]}}})
+
+    async def _project_questions(self, quiz_id, questions):
+        pipeline = [
+            {"$match": {"_id": ObjectId(quiz_id)}},
+            {"$project": {"_id": 0, "questions": questions}},
+        ]
+        async for document in self._quizzes.aggregate(pipeline):
+            return document.get("questions") or []
+        return []
+
+    async def get_quiz_version(self, quiz_name):
+        """Get the ID and content version of a quiz by name without its questions"""
+        return await self._find_quiz_version({"quiz_name": quiz_name})
+
+    async def get_quiz_version_by_id(self, quiz_id):
+        """Get the ID and content version of a quiz by ID without its questions"""
+        return await self._find_quiz_version({"_id": ObjectId(quiz_id)})
+
+    async def _find_quiz_version(self, query):
+        """Load the ``id`` and ``version`` fields a quiz ETag is built from"""
+        quiz = await self._quizzes.find_one(query, {"version": 1})
+        if not quiz:
+            return None
+        return {"id": str(quiz["_id"]), "version": quiz.get("version")}
+
+    async def get_answer_key(self, quiz_name):
+        """Get the answer key of a quiz by name without its questions"""
+        return await self._find_answer_key({"quiz_name": quiz_name})
+
+    async def get_answer_key_by_id(self, quiz_id):
+        """Get the answer key of a quiz by ID without its questions"""
+        return await self._find_answer_key({"_id": ObjectId(quiz_id)})
+
+    async def _find_answer_key(self, query):
+        """Load the packed answer key of a quiz as an AnswerKey"""
+        quiz = await self._quizzes.find_one(query, ANSWER_KEY_PROJECTION)
+        if not quiz:
+            return None
+
+        if "answer_key" in quiz:
+            quiz["answer_key"] = AnswerKey.unpack(
+                quiz["answer_key"], quiz.pop("question_count"))
+        else:
+            # Quiz without a packed key: read only the answer fields
+            answers = await self._quizzes.find_one(
+                {"_id": quiz["_id"]}, {"questions.correct_answer": 1})
+            quiz["answer_key"] = AnswerKey.from_questions(
+                (answers or {}).get("questions") or [])
+        quiz["id"] = str(quiz["_id"])
+        return quiz
+
+    async def insert_attempts(self, attempts):
+        """Write a batch of quiz attempts in one round trip
+
+        Attempts are stored ``pending`` (with the time they were written)
+        until ``settle_attempts`` records that their statistics increment
+        is done, so a rebuild can leave out attempts whose increment may
+        still land. The batch is unordered, so attempts after a failing one
+        are still written. Returns the number inserted and ``(index, code,
+        message)`` for each attempt that was not.
+        """
+        pending = time.time()
+        for attempt in attempts:
+            attempt["pending"] = pending
         try:
-            quiz_obj_id = ObjectId(quiz_id)
-            quiz = await db.quizzes.find_one({"_id": quiz_obj_id})
+            result = await self._attempts.insert_many(attempts, ordered=False)
+            return len(result.inserted_ids), []
+        except BulkWriteError as e:
+            failures = [(error["index"], error.get("code"), error.get("errmsg", ""))
+                        for error in e.details.get("writeErrors", [])]
+            return e.details.get("nInserted", 0), failures
+
+    async def settle_attempts(self, attempts):
+        """Clear the pending mark of attempts whose statistics increment is done"""
+        ids = [attempt["_id"] for attempt in attempts if "_id" in attempt]
+        if ids:
+            await self._attempts.update_many(
+                {"_id": {"$in": ids}}, {"$unset": {"pending": ""}})
+
+    async def increment_quiz_stats(self, rollups):
+        """Add the rollups of a batch of attempts to the stored statistics
+
+        ``rollups`` maps quiz ids to attempt, score and per-question correct
+        totals; each quiz gets a single upserted ``$inc``.
+        """
+        operations = []
+        for quiz_id, rollup in rollups.items():
+            increments = {
+                # Lets a concurrent rebuild detect that the rollup changed
+                "writes": 1,
+                "attempts": rollup["attempts"],
+                "score_total": rollup["score_total"],
+                "question_total": rollup["question_total"],
+            }
+            for field in ("correct", "shown"):
+                for index, count in enumerate(rollup[field]):
+                    if count:
+                        increments[f"{field}.{index}"] = count
+            operations.append(UpdateOne(
+                {"_id": quiz_id},
+                {"$inc": increments,
+                 "$set": {"quiz_name": rollup["quiz_name"],
+                          "question_count": rollup["question_count"]}},
+                upsert=True))
+        if operations:
+            await self._stats.bulk_write(operations, ordered=False)
+            await self._bump_stats_version()
+
+    async def get_quiz_stats_writes(self, quiz_name=None, quiz_ids=None):
+        """Get the flush counters of stored rollups (of some quizzes, or all)
+
+        Keyed by quiz ID; rollups written before the counter existed map to None.
+        """
+        if quiz_ids is not None:
+            query = {"_id": {"$in": list(quiz_ids)}}
+        else:
+            query = {"quiz_name": quiz_name} if quiz_name else {}
+        cursor = self._stats.find(query, {"writes": 1})
+        return {stats["_id"]: stats.get("writes") async for stats in cursor}
+
+    async def replace_quiz_stats(self, rollups, expected_writes):
+        """Replace stored rollups unless an attempt flush changed them meanwhile
+
+        ``expected_writes`` holds the flush counter of every rollup in scope
+        as read before the attempts were scanned. Each rollup is replaced
+        (or, without attempts, deleted) only while its counter is unchanged,
+        so increments of live flushes are never overwritten. Returns the
+        quiz IDs that changed and must be rebuilt again.
+        """
+        conflicts = []
+        changed = False
+        for quiz_id in set(rollups) | set(expected_writes):
+            writes = expected_writes.get(quiz_id)
+            unchanged = {"_id": quiz_id, "writes": writes}
+            rollup = rollups.get(quiz_id)
+            if rollup is None:
+                result = await self._stats.delete_one(unchanged)
+                if result.deleted_count:
+                    changed = True
+                elif await self._stats.count_documents({"_id": quiz_id}, limit=1):
+                    conflicts.append(quiz_id)
+                continue
+            document = {
+                "quiz_name": rollup["quiz_name"],
+                "question_count": rollup["question_count"],
+                "writes": writes or 0,
+                "attempts": rollup["attempts"],
+                "score_total": rollup["score_total"],
+                "question_total": rollup["question_total"],
+                "correct": {str(index): count
+                            for index, count in enumerate(rollup["correct"]) if count},
+                "shown": {str(index): count
+                          for index, count in enumerate(rollup["shown"]) if count},
+            }
+            try:
+                # Upserts when the rollup is new; a rollup created or changed
+                # since it was read fails the filter and the insert collides
+                await self._stats.replace_one(unchanged, document, upsert=True)
+                changed = True
+            except DuplicateKeyError:
+                conflicts.append(quiz_id)
+        if changed:
+            await self._bump_stats_version()
+        return conflicts
+
+    async def get_existing_quiz_ids(self, quiz_ids):
+        """Get which of the given quiz IDs still belong to a stored quiz"""
+        cursor = self._quizzes.find({"_id": {"$in": list(quiz_ids)}}, {"_id": 1})
+        return {quiz["_id"] async for quiz in cursor}
+
+    async def get_quiz_stats(self, quiz_id):
+        """Get the statistics rollup of a quiz"""
+        return await self._stats.find_one({"_id": ObjectId(quiz_id)})
+
+    async def get_quiz_stats_summaries(self, quiz_ids):
+        """Get attempt and score totals of several quizzes, keyed by quiz ID"""
+        cursor = self._stats.find(
+            {"_id": {"$in": [ObjectId(quiz_id) for quiz_id in quiz_ids]}},
+            {"attempts": 1, "score_total": 1})
+        return {str(stats["_id"]): stats async for stats in cursor}
+
+    async def iter_attempts(self, quiz_name=None, quiz_ids=None):
+        """Stream the stored attempts (of some quizzes, or all) for aggregation"""
+        if quiz_ids is not None:
+            query = {"quiz_id": {"$in": list(quiz_ids)}}
+        else:
+            query = {"quiz_name": quiz_name} if quiz_name else {}
+        cursor = self._attempts.find(
+            query,
+            {"quiz_id": 1, "quiz_name": 1, "score": 1,
+             "total_questions": 1, "correct": 1, "pending": 1, "_id": 0},
+            batch_size=1000)
+        async for attempt in cursor:
+            yield attempt
+
+    async def iter_attempt_answers(self, quiz_id, chunk_size=5000):
+        """Stream the answer strings of a quiz's attempts in chunks"""
+        cursor = self._attempts.find(
+            {"quiz_id": ObjectId(quiz_id)}, {"answers": 1, "_id": 0},
+            batch_size=chunk_size)
+        chunk = []
+        async for attempt in cursor:
+            chunk.append(attempt.get("answers", ""))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def get_list_version(self):
+        """Get a version that changes whenever a quiz is added or removed"""
+        return await self._get_meta_version(QUIZ_LIST_META_ID)
+
+    async def get_stats_version(self):
+        """Get a version that changes whenever the quiz statistics change"""
+        return await self._get_meta_version(QUIZ_STATS_META_ID)
+
+    async def _get_meta_version(self, meta_id):
+        """Get the counter of a meta document, 0 before its first bump"""
+        meta = await self._meta.find_one({"_id": meta_id}, {"version": 1})
+        return str(meta["version"]) if meta else "0"
+
+    async def _bump_list_version(self):
+        """Record that the quiz list changed"""
+        await self._meta.update_one(
+            {"_id": QUIZ_LIST_META_ID}, {"$inc": {"version": 1}}, upsert=True)
+
+    async def _bump_stats_version(self):
+        """Record that the quiz statistics changed"""
+        await self._meta.update_one(
+            {"_id": QUIZ_STATS_META_ID}, {"$inc": {"version": 1}}, upsert=True)
+
+    async def get_quiz_by_id(self, quiz_id):
+        """Get a quiz by ID"""
+        try:
+            quiz = await self._quizzes.find_one({"_id": ObjectId(quiz_id)}, QUIZ_HIDDEN_FIELDS)
+            logger.debug("get_quiz_by_id(%s) found=%s", quiz_id, quiz is not None)
+
             if quiz:
                 quiz["id"] = str(quiz["_id"])
             return quiz
         except Exception as e:
-            logger.error(f"Error getting quiz by ID {quiz_id}: {e}")
+            logger.exception("Error getting quiz by ID %s: %s", quiz_id, e)
             return None
-
-
-# Verify MongoDB URL exists
-if not MONGODB_URL:
-    logger.error("MONGODB_URL not found in .env file!")
-    logger.error("Please configure MONGODB_URL in your .env file")
-    sys.exit(1)
-
-# Create database instance
-db = Database(MONGODB_URL, DB_NAME)
-
-# For backward compatibility, expose the original function names
-get_all_quizzes = db.get_all_quizzes
-get_quiz = db.get_quiz
-save_quiz_to_db = db.save_quiz
-delete_quiz_from_db = db.delete_quiz
-get_quiz_by_id = db.get_quiz_by_id
-get_quiz_by_id_from_app = db.get_quiz_by_id_from_db
@@ -0,0 +1,46 @@
+from fastapi import HTTPException, Request
+from .database import Database
+from .attempts import AttemptWriter
+from .cache import QuizCache
+from .compression import PayloadCache
+from .executors import WorkExecutor
+from .variant_pool import VariantPoolManager
+
+
+def get_database(request: Request) -> Database:
+    """Get the shared database repository created in the app lifespan"""
+    db = getattr(request.app, "db", None)
+    if db is None:
+        raise HTTPException(
+            status_code=503, detail="Database is not available")
+    return db
+
+
+def get_quiz_cache(request: Request) -> QuizCache:
+    """Get the in-process quiz cache of this worker"""
+    return request.app.quiz_cache
+
+
+def get_answer_key_cache(request: Request) -> QuizCache:
+    """Get the in-process answer key cache of this worker"""
+    return request.app.answer_keys
+
+
+def get_variant_pools(request: Request) -> VariantPoolManager:
+    """Get the shuffled variant pools of this worker"""
+    return request.app.variant_pools
+
+
+def get_response_cache(request: Request) -> PayloadCache:
+    """Get the serialized response cache of this worker"""
+    return request.app.response_cache
+
+
+def get_attempt_writer(request: Request) -> AttemptWriter:
+    """Get the write-behind attempt writer of this worker"""
+    return request.app.attempts
+
+
+def get_work_executor(request: Request) -> WorkExecutor:
+    """Get the executor that runs CPU-bound work off the event loop"""
+    return request.app.executor
@@ -0,0 +1,138 @@
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from .metrics import WORK_DURATION
+from .profiling import record_phase
+
+logger = logging.getLogger(__name__)
+
+# Worker pools for CPU-bound request work (0 disables a pool)
+EXECUTOR_THREAD_WORKERS = int(os.getenv("EXECUTOR_THREAD_WORKERS", "4"))
+EXECUTOR_PROCESS_WORKERS = int(os.getenv("EXECUTOR_PROCESS_WORKERS", "0"))
+EXECUTOR_PROCESS_START_METHOD = os.getenv("EXECUTOR_PROCESS_START_METHOD", "spawn")
+# Work sizes (questions, or answers graded) at which work leaves the event loop
+OFFLOAD_THREAD_THRESHOLD = int(os.getenv("OFFLOAD_THREAD_THRESHOLD", "2000"))
+OFFLOAD_PROCESS_THRESHOLD = int(os.getenv("OFFLOAD_PROCESS_THRESHOLD", "500000"))
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """Run ``fn`` in a worker and measure how long it ran there"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class WorkExecutor:
+    """Size-based dispatch of CPU-bound work off the event loop
+
+    Work smaller than ``thread_threshold`` runs inline, since handing it to
+    a pool costs more than it saves. Larger work runs in a thread pool, and
+    work marked ``process=True`` (picklable functions and arguments only)
+    runs in a process pool from ``process_threshold`` on. Time is recorded
+    per task label: on-loop for inline work, off-loop for the time work ran
+    in a pool and queue wait for the time it waited for a worker.
+    """
+
+    def __init__(
+            self,
+            thread_workers: int = EXECUTOR_THREAD_WORKERS,
+            process_workers: int = EXECUTOR_PROCESS_WORKERS,
+            thread_threshold: int = OFFLOAD_THREAD_THRESHOLD,
+            process_threshold: int = OFFLOAD_PROCESS_THRESHOLD,
+            start_method: str = EXECUTOR_PROCESS_START_METHOD):
+        """Initialize without starting any pool"""
+        self._thread_workers = max(0, thread_workers)
+        self._process_workers = max(0, process_workers)
+        self._thread_threshold = thread_threshold
+        self._process_threshold = process_threshold
+        self._start_method = start_method
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+
+    def start(self) -> None:
+        """Create the worker pools"""
+        if self._thread_workers and self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                self._thread_workers, thread_name_prefix="quiz-work")
+        if self._process_workers and self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                self._process_workers,
+                mp_context=multiprocessing.get_context(self._start_method))
+
+    async def stop(self) -> None:
+        """Shut the pools down after their running work finishes"""
+        pools = [pool for pool in (self._threads, self._processes) if pool is not None]
+        self._threads = self._processes = None
+        for pool in pools:
+            await asyncio.to_thread(pool.shutdown, True)
+
+    def placement(self, size: int, process: bool = False) -> str:
+        """Where work of ``size`` runs: inline, thread or process"""
+        if process and self._processes is not None and size >= self._process_threshold:
+            return PROCESS
+        if self._threads is not None and size >= self._thread_threshold:
+            return THREAD
+        return INLINE
+
+    async def run(self, label: str, size: int, fn: Callable[..., Any], *args: Any,
+                  process: bool = False) -> Any:
+        """Run ``fn(*args)`` where its size says and record the time spent"""
+        where = self.placement(size, process)
+        start = time.perf_counter()
+        if where == INLINE:
+            result = fn(*args)
+            self._record(label, where, time.perf_counter() - start)
+            return result
+
+        pool: Executor = self._processes if where == PROCESS else self._threads
+        loop = asyncio.get_running_loop()
+        result, elapsed = await loop.run_in_executor(pool, _timed, fn, *args)
+        wall = time.perf_counter() - start
+        self._record(label, where, elapsed, max(0.0, wall - elapsed))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the pool settings and the per-task time split"""
+        tasks = {
+            label: dict(counters,
+                        on_loop_seconds=round(counters["on_loop_seconds"], 4),
+                        off_loop_seconds=round(counters["off_loop_seconds"], 4),
+                        queue_wait_seconds=round(counters["queue_wait_seconds"], 4))
+            for label, counters in self._tasks.items()
+        }
+        return {
+            "thread_workers": self._thread_workers if self._threads else 0,
+            "process_workers": self._process_workers if self._processes else 0,
+            "thread_threshold": self._thread_threshold,
+            "process_threshold": self._process_threshold,
+            "on_loop_seconds": round(
+                sum(c["on_loop_seconds"] for c in self._tasks.values()), 4),
+            "off_loop_seconds": round(
+                sum(c["off_loop_seconds"] for c in self._tasks.values()), 4),
+            "tasks": tasks,
+        }
+
+    def _record(self, label: str, where: str, elapsed: float, waited: float = 0.0) -> None:
+        WORK_DURATION.labels(label, where).observe(elapsed)
+        record_phase(label, elapsed + waited)
+        counters = self._tasks.get(label)
+        if counters is None:
+            counters = self._tasks[label] = {
+                INLINE: 0, THREAD: 0, PROCESS: 0,
+                "on_loop_seconds": 0.0, "off_loop_seconds": 0.0, "queue_wait_seconds": 0.0,
+            }
+        counters[where] += 1
+        if where == INLINE:
+            counters["on_loop_seconds"] += elapsed
+        else:
+            counters["off_loop_seconds"] += elapsed
+            counters["queue_wait_seconds"] += waited
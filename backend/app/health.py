@@ -0,0 +1,242 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# How often the event loop lag is sampled, and how many samples readiness looks at
+HEALTH_LAG_INTERVAL_SECONDS = float(os.getenv("HEALTH_LAG_INTERVAL_SECONDS", "0.5"))
+HEALTH_LAG_WINDOW = 10
+# How often MongoDB is pinged in the background, and how long a ping may take
+HEALTH_PING_INTERVAL_SECONDS = float(os.getenv("HEALTH_PING_INTERVAL_SECONDS", "5"))
+HEALTH_PING_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PING_TIMEOUT_SECONDS", "2"))
+# Readiness thresholds
+READY_MAX_LOOP_LAG_MS = float(os.getenv("READY_MAX_LOOP_LAG_MS", "250"))
+READY_MAX_PING_MS = float(os.getenv("READY_MAX_PING_MS", "1000"))
+
+# pymongo's default maxPoolSize
+DEFAULT_MAX_POOL_SIZE = 100
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Connection pool saturation from pymongo's pool events
+
+    Counts connections that are open, checked out by an operation, and
+    operations waiting for one, summed over the pools of all servers.
+    Events arrive on driver threads, so the counters are locked.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._max_sizes: Dict[Any, int] = {}
+        self._connections = 0
+        self._checked_out = 0
+        self._waiting = 0
+        self._peak_checked_out = 0
+        self._peak_waiting = 0
+        self._checkout_timeouts = 0
+        self._checkout_failures = 0
+        self._clears = 0
+
+    def pool_created(self, event) -> None:
+        max_size = (event.options or {}).get("maxPoolSize", DEFAULT_MAX_POOL_SIZE)
+        with self._lock:
+            self._max_sizes[event.address] = max_size
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self._clears += 1
+
+    def pool_closed(self, event) -> None:
+        with self._lock:
+            self._max_sizes.pop(event.address, None)
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self._connections += 1
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self._connections -= 1
+
+    def connection_check_out_started(self, event) -> None:
+        with self._lock:
+            self._waiting += 1
+            self._peak_waiting = max(self._peak_waiting, self._waiting)
+
+    def connection_check_out_failed(self, event) -> None:
+        with self._lock:
+            self._waiting -= 1
+            self._checkout_failures += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self._checkout_timeouts += 1
+
+    def connection_checked_out(self, event) -> None:
+        with self._lock:
+            self._waiting -= 1
+            self._checked_out += 1
+            self._peak_checked_out = max(self._peak_checked_out, self._checked_out)
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self._checked_out -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the pool counters"""
+        with self._lock:
+            max_size = sum(self._max_sizes.values())
+            return {
+                "max_size": max_size,
+                "connections": self._connections,
+                "checked_out": self._checked_out,
+                "waiting": self._waiting,
+                "utilization": round(self._checked_out / max_size, 4) if max_size else 0.0,
+                "peak_checked_out": self._peak_checked_out,
+                "peak_waiting": self._peak_waiting,
+                "checkout_timeouts": self._checkout_timeouts,
+                "checkout_failures": self._checkout_failures,
+                "clears": self._clears,
+            }
+
+
+class HealthMonitor:
+    """Background event loop lag and MongoDB ping sampling for readiness
+
+    One task sleeps for ``lag_interval`` and records how much later than
+    that it woke up; the largest lag of the last ``lag_window`` samples is
+    what readiness compares with ``max_lag_ms``. Another task pings the
+    database every ``ping_interval`` seconds; readiness fails when the last
+    ping failed, took longer than ``max_ping_ms``, or is overdue.
+    """
+
+    def __init__(
+            self,
+            lag_interval: float = HEALTH_LAG_INTERVAL_SECONDS,
+            lag_window: int = HEALTH_LAG_WINDOW,
+            ping_interval: float = HEALTH_PING_INTERVAL_SECONDS,
+            ping_timeout: float = HEALTH_PING_TIMEOUT_SECONDS,
+            max_lag_ms: float = READY_MAX_LOOP_LAG_MS,
+            max_ping_ms: float = READY_MAX_PING_MS):
+        """Initialize without starting the sampling tasks"""
+        self._lag_interval = lag_interval
+        self._ping_interval = ping_interval
+        self._ping_timeout = ping_timeout
+        self._max_lag_ms = max_lag_ms
+        self._max_ping_ms = max_ping_ms
+        self._db = None
+        self._tasks: List[asyncio.Task] = []
+        self._lags: deque = deque(maxlen=max(1, lag_window))
+        self._peak_lag = 0.0
+        self._pings = 0
+        self._ping_failures = 0
+        self._last_ping: Optional[float] = None
+        self._last_ping_ok = True
+        self._last_ping_error: Optional[str] = None
+        self._last_ping_success = time.monotonic()
+
+    def start(self, db) -> None:
+        """Start sampling loop lag, and pinging ``db`` unless it is None"""
+        if self._tasks:
+            return
+        self._db = db
+        self._last_ping_success = time.monotonic()
+        self._tasks.append(asyncio.create_task(self._sample_lag()))
+        if db is not None:
+            self._tasks.append(asyncio.create_task(self._ping_loop()))
+
+    async def stop(self) -> None:
+        """Stop the sampling tasks"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def ping(self) -> None:
+        """Ping the database once and record the latency or the failure"""
+        self._pings += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._db.ping(), self._ping_timeout)
+        except Exception as e:
+            self._ping_failures += 1
+            self._last_ping_ok = False
+            self._last_ping_error = str(e) or type(e).__name__
+            logger.warning("MongoDB ping failed: %s", self._last_ping_error)
+        else:
+            self._last_ping_ok = True
+            self._last_ping_error = None
+            self._last_ping_success = time.monotonic()
+        self._last_ping = time.perf_counter() - start
+
+    def loop_lag_ms(self) -> float:
+        """Largest event loop lag of the recent samples"""
+        return max(self._lags, default=0.0) * 1000
+
+    def ping_ms(self) -> Optional[float]:
+        """Duration of the last database ping"""
+        return self._last_ping * 1000 if self._last_ping is not None else None
+
+    def readiness(self) -> Tuple[bool, List[str]]:
+        """Whether this worker should receive traffic, and why not"""
+        reasons = []
+        lag_ms = self.loop_lag_ms()
+        if lag_ms > self._max_lag_ms:
+            reasons.append(f"event loop lag {lag_ms:.0f} ms exceeds {self._max_lag_ms:.0f} ms")
+
+        if self._db is None:
+            reasons.append("database not connected")
+            return False, reasons
+        if not self._last_ping_ok:
+            reasons.append(f"database ping failed: {self._last_ping_error}")
+        elif (self.ping_ms() or 0.0) > self._max_ping_ms:
+            reasons.append(f"database ping took {self.ping_ms():.0f} ms, "
+                           f"more than {self._max_ping_ms:.0f} ms")
+        overdue = time.monotonic() - self._last_ping_success
+        if self._tasks and overdue > 2 * self._ping_interval + self._ping_timeout:
+            reasons.append(f"no successful database ping for {overdue:.0f} s")
+        return not reasons, reasons
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the lag and ping measurements and the pool counters"""
+        stats = {
+            "running": bool(self._tasks),
+            "loop_lag_ms": round(self._lags[-1] * 1000, 3) if self._lags else 0.0,
+            "loop_lag_recent_max_ms": round(self.loop_lag_ms(), 3),
+            "loop_lag_peak_ms": round(self._peak_lag * 1000, 3),
+            "ping_ms": round(self.ping_ms(), 3) if self._last_ping is not None else None,
+            "ping_ok": self._last_ping_ok,
+            "ping_error": self._last_ping_error,
+            "pings": self._pings,
+            "ping_failures": self._ping_failures,
+        }
+        pool_stats = getattr(self._db, "pool_stats", None)
+        if pool_stats is not None:
+            stats.update({f"pool_{key}": value for key, value in pool_stats().items()})
+        return stats
+
+    async def _sample_lag(self) -> None:
+        """Measure how late the loop wakes this task up, until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self._lag_interval)
+            lag = max(0.0, loop.time() - start - self._lag_interval)
+            self._lags.append(lag)
+            self._peak_lag = max(self._peak_lag, lag)
+
+    async def _ping_loop(self) -> None:
+        """Ping the database every ``ping_interval`` seconds, until cancelled"""
+        while True:
+            await self.ping()
+            await asyncio.sleep(self._ping_interval)
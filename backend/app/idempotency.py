@@ -0,0 +1,82 @@
+import json
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Optional
+from fastapi import HTTPException
+from fastapi.responses import Response
+from .utils import mongodb_response
+
+logger = logging.getLogger(__name__)
+
+# Longest Idempotency-Key header accepted
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+# Set on responses replayed from an earlier request with the same key
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def request_fingerprint(method: str, path: str, payload: Any = None) -> str:
+    """Hash what identifies a request, to detect a key reused for another one"""
+    content = json.dumps([method, path, payload], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+async def run_idempotent(
+        db,
+        key: Optional[str],
+        fingerprint: str,
+        action: Callable[[], Awaitable[Response]]) -> Response:
+    """Run a write at most once per Idempotency-Key
+
+    The first request with a key claims it in the TTL-indexed
+    ``idempotency_keys`` collection and stores its response, including
+    client errors such as 409. Retries with the same key and request get
+    that response back without writing again; a retry that arrives while
+    the first request is still running gets 409, and a key reused for a
+    different request gets 422. Server errors free the key again.
+    """
+    if not key:
+        return await action()
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key must be at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+
+    record = await db.claim_idempotency_key(key, fingerprint)
+    if record is not None:
+        return _replay(record, fingerprint)
+
+    try:
+        response = await action()
+    except HTTPException as e:
+        if e.status_code >= 500:
+            await db.release_idempotency_key(key)
+            raise
+        response = mongodb_response({"detail": e.detail}, status_code=e.status_code)
+    except BaseException:
+        await db.release_idempotency_key(key)
+        raise
+
+    await db.complete_idempotency_key(
+        key, response.status_code, bytes(response.body), response.media_type)
+    return response
+
+
+def _replay(record, fingerprint: str) -> Response:
+    """Answer a retry from the stored record of the first request"""
+    if record.get("fingerprint") != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request")
+    if record.get("status_code") is None:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is still in progress",
+            headers={"Retry-After": "1"})
+
+    logger.info("Replaying response for Idempotency-Key '%s'", record["_id"])
+    return Response(
+        content=record.get("body") or b"",
+        status_code=record["status_code"],
+        media_type=record.get("media_type"),
+        headers={REPLAYED_HEADER: "true"})
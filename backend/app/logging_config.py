@@ -0,0 +1,160 @@
+"""Central logging setup.
+
+Log calls on the event loop only build a record and put it on a queue; a
+``QueueListener`` thread formats the records and writes them to stderr,
+so a slow terminal or log pipe never blocks a request. Records are text
+or one JSON object per line (``LOG_FORMAT=json``), levels can be set per
+logger (``LOG_LEVELS=backend.app.shuffling=DEBUG,uvicorn.access=WARNING``),
+and ``LOG_DEBUG_SAMPLE_RATE`` keeps only a fraction of the DEBUG records
+of each call site when high-frequency debug logging is switched on.
+
+Modules only call ``logging.getLogger(__name__)`` and log with lazy
+%-style arguments; entry points call ``configure_logging()`` once.
+"""
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, TextIO
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+# Comma-separated logger=LEVEL pairs
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1"))
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# LogRecord attributes that are not ``extra=`` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """Parse ``name=LEVEL,...`` into logger levels, ignoring malformed pairs"""
+    levels = {}
+    for pair in spec.split(","):
+        name, _, level = pair.partition("=")
+        level = logging.getLevelName(level.strip().upper())
+        if name.strip() and isinstance(level, int):
+            levels[name.strip()] = level
+    return levels
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as one JSON object, including its ``extra=`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keep one in every ``1 / rate`` DEBUG records per call site
+
+    Records above DEBUG always pass. Counting per call site keeps the rare
+    debug messages while thinning out the ones logged on every request.
+    """
+
+    def __init__(self, rate: float = LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self._every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counts: Dict[Any, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self._every == 1:
+            return True
+        if not self._every:
+            return False
+        site = (record.pathname, record.lineno)
+        count = self._counts.get(site, 0)
+        self._counts[site] = count + 1
+        return count % self._every == 0
+
+
+class _QueueHandler(QueueHandler):
+    """Queue records with their message merged but left unformatted
+
+    The standard QueueHandler formats the whole record on the calling
+    thread; here the listener thread does that. Only the message and the
+    traceback text are resolved, since args and tracebacks may change or
+    hold frames once the call returns.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(
+        level: str = LOG_LEVEL,
+        log_format: str = LOG_FORMAT,
+        levels: str = LOG_LEVELS,
+        debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE,
+        stream: Optional[TextIO] = None,
+        force: bool = False) -> Optional[QueueListener]:
+    """Route all logging through a queue to a stderr writer thread
+
+    Like ``logging.basicConfig``, does nothing when the root logger already
+    has handlers (e.g. set up by a test runner) unless ``force`` is set.
+    """
+    global _listener
+    root = logging.getLogger()
+    if root.handlers and not force:
+        return None
+    stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(DebugSampler(debug_sample_rate))
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name, logger_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Write out the queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
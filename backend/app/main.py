@@ -1,18 +1,27 @@
 import os
 import sys
 import logging
-from motor.motor_asyncio import AsyncIOMotorClient
-from bson import ObjectId
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 import uvicorn
+from .database import Database, DB_NAME, pool_options_from_env
+from .attempts import AttemptWriter
+from .cache import QuizCache
+from .compression import PayloadCache
+from .executors import WorkExecutor
+from .health import HealthMonitor
+from .logging_config import configure_logging
+from .metrics import CONTENT_TYPE, METRICS_ENABLED, REGISTRY, MetricsMiddleware, stats_lines
+from .profiling import PROFILING_CONFIGURED, ProfilingMiddleware
+from .variant_pool import VariantPoolManager
 from .routes.quizzes import router as quiz_router
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
 # Configure logging
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 
 # Load environment variables
 load_dotenv()
@@ -26,7 +35,8 @@ class QuizApp:
         # Load configuration
         self._mongodb_url = os.getenv(
             "MONGODB_URL", "mongodb://localhost:27017")
-        self._db_name = os.getenv("DB_NAME")
+        self._db_name = os.getenv("DB_NAME", DB_NAME)
+        self._pool_options = pool_options_from_env()
         self._host = os.getenv("HOST", "0.0.0.0")
         self._port = int(os.getenv("PORT", "8000"))
         self._debug = os.getenv("DEBUG", "False").lower() == "true"
@@ -41,32 +51,58 @@ class QuizApp:
 
         # Configure app
         self._setup_cors()
+        self._setup_metrics()
+        self._setup_profiling()
         self._setup_routes()
         self._setup_endpoints()
 
     @asynccontextmanager
     async def _lifespan(self, app):
         """Lifespan context manager for database connections"""
+        app.db = None
+        app.quiz_cache = QuizCache()
+        app.answer_keys = QuizCache()
+        app.variant_pools = VariantPoolManager()
+        app.response_cache = PayloadCache()
+        app.attempts = AttemptWriter()
+        app.executor = WorkExecutor()
+        app.health = HealthMonitor()
         try:
-            app.mongodb_client = AsyncIOMotorClient(
-                self._mongodb_url,
-                serverSelectionTimeoutMS=5000  # Add timeout
-            )
+            # One repository (and one connection pool) per worker
+            app.db = Database(
+                self._mongodb_url, self._db_name, **self._pool_options)
             # Test connection
-            await app.mongodb_client.admin.command('ping')
-            app.mongodb = app.mongodb_client[self._db_name]
-            await app.mongodb.quizzes.create_index("quiz_name", unique=True)
+            await app.db.ping()
+            await app.db.ensure_indexes()
+            await app.db.backfill_versions()
+            await app.db.backfill_answer_keys()
+            app.mongodb_client = app.db.client
+            app.mongodb = app.db.database
             logger.info("Connected to MongoDB!")
         except Exception as e:
-            logger.error(f"MongoDB connection error: {e}")
+            logger.error("MongoDB connection error: %s", e)
             # Still allow the app to start without MongoDB
+            if app.db:
+                app.db.close()
+            app.db = None
             app.mongodb_client = None
             app.mongodb = None
 
+        app.executor.start()
+        app.variant_pools.start(app.executor)
+        app.health.start(app.db)
+        if app.db:
+            app.attempts.start(app.db)
+
         yield
 
-        if app.mongodb_client:
-            app.mongodb_client.close()
+        await app.health.stop()
+        await app.variant_pools.stop()
+        # Write queued attempts before the connection pool goes away
+        await app.attempts.stop()
+        await app.executor.stop()
+        if app.db:
+            app.db.close()
             logger.info("MongoDB connection closed")
 
     def _setup_cors(self):
@@ -82,8 +118,37 @@ class QuizApp:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            # Response headers the browser frontends read (pagination,
+            # revalidation, incremental exports and idempotent retries)
+            expose_headers=["X-Next-Cursor", "ETag", "X-Export-Started-At", "Idempotent-Replayed"],
         )
 
+    def _setup_metrics(self):
+        """Record request metrics and expose them at /metrics"""
+        if not METRICS_ENABLED:
+            return
+        self.app.add_middleware(MetricsMiddleware)
+        REGISTRY.add_collector(self._component_metrics)
+
+        @self.app.get("/metrics", include_in_schema=False)
+        async def metrics():
+            return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    def _setup_profiling(self):
+        """Profile requests that ask for it with X-Profile, and sampled ones"""
+        if PROFILING_CONFIGURED:
+            self.app.add_middleware(ProfilingMiddleware)
+
+    def _component_metrics(self):
+        """Expose the counters of the per-worker caches, pools and queues"""
+        components = {}
+        for component in ("quiz_cache", "answer_keys", "response_cache",
+                          "variant_pools", "attempts", "executor", "health"):
+            instance = getattr(self.app, component, None)
+            if instance is not None:
+                components[component] = instance.stats()
+        return stats_lines("quiz_component", components)
+
     def _setup_routes(self):
         """Set up API routes"""
         self.app.include_router(quiz_router)
@@ -100,15 +165,59 @@ class QuizApp:
                     "GET /quizzes/name/{quiz_name}": "Get quiz details by name",
                     "GET /quizzes/id/{quiz_id}": "Get quiz details by ID",
                     "POST /quizzes": "Create a new quiz",
+                    "POST /quizzes/import": "Import quizzes from NDJSON (optionally gzipped)",
+                    "GET /quizzes/export": "Export quizzes as NDJSON (optionally gzipped)",
                     "POST /quizzes/{quiz_name}/submit": "Submit answers and get results",
-                    "DELETE /quizzes/{quiz_name}": "Delete a quiz"}}
+                    "POST /quizzes/id/{quiz_id}/submit": "Submit answers by quiz ID and get results",
+                    "POST /quizzes/{quiz_name}/submit/batch": "Grade a batch of answer sheets",
+                    "GET /quizzes/{quiz_name}/stats": "Get attempt statistics of a quiz",
+                    "GET /quizzes/{quiz_name}/analysis": "Get item analysis of a quiz",
+                    "DELETE /quizzes/{quiz_name}": "Delete a quiz",
+                    "GET /health/live": "Liveness: the worker is serving requests",
+                    "GET /health/ready": "Readiness: event loop lag and database latency are within limits",
+                    "GET /metrics": "Metrics in the Prometheus text format"}}
 
         @self.app.get("/health")
         async def health_check():
             # Check if MongoDB is connected
             is_db_connected = hasattr(
                 self.app, "mongodb_client") and self.app.mongodb_client is not None
-            return {"status": "healthy", "database_connected": is_db_connected}
+            quiz_cache = getattr(self.app, "quiz_cache", None)
+            answer_keys = getattr(self.app, "answer_keys", None)
+            variant_pools = getattr(self.app, "variant_pools", None)
+            response_cache = getattr(self.app, "response_cache", None)
+            attempts = getattr(self.app, "attempts", None)
+            executor = getattr(self.app, "executor", None)
+            health = getattr(self.app, "health", None)
+            ready, reasons = health.readiness() if health else (False, ["not started"])
+            return {
+                "status": "healthy" if ready else "degraded",
+                "not_ready_reasons": reasons,
+                "database_connected": is_db_connected,
+                "quiz_cache": quiz_cache.stats() if quiz_cache else None,
+                "answer_keys": answer_keys.stats() if answer_keys else None,
+                "variant_pools": variant_pools.stats() if variant_pools else None,
+                "response_cache": response_cache.stats() if response_cache else None,
+                "attempts": attempts.stats() if attempts else None,
+                "executor": executor.stats() if executor else None,
+                "health": health.stats() if health else None
+            }
+
+        @self.app.get("/health/live")
+        async def liveness():
+            return {"status": "alive"}
+
+        @self.app.get("/health/ready")
+        async def readiness():
+            health = getattr(self.app, "health", None)
+            ready, reasons = health.readiness() if health else (False, ["not started"])
+            content = {"status": "ready" if ready else "not_ready", "reasons": reasons}
+            if health:
+                ping_ms = health.ping_ms()
+                content.update(
+                    loop_lag_ms=round(health.loop_lag_ms(), 3),
+                    ping_ms=round(ping_ms, 3) if ping_ms is not None else None)
+            return JSONResponse(content, status_code=200 if ready else 503)
 
     def run(self):
         """Run the application"""
@@ -116,7 +225,9 @@ class QuizApp:
             self.app,
             host=self._host,
             port=self._port,
-            reload=self._debug
+            reload=self._debug,
+            # Leave uvicorn's loggers to the queue handler of configure_logging
+            log_config=None
         )
 
 
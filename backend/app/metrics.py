@@ -0,0 +1,367 @@
+"""Dependency-free metrics in the Prometheus text exposition format.
+
+Metrics are plain in-process counters, gauges and histograms updated from
+the event loop, so recording one is a dict lookup and a few additions.
+Each worker process keeps its own values; ``GET /metrics`` renders them.
+"""
+import os
+import time
+import inspect
+import functools
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from .profiling import PROFILING_CONFIGURED, record_phase
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str],
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named metric with one child per combination of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: Any) -> Any:
+        """Get the child for the given label values, creating it on first use"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """Render the metric in the text exposition format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: Tuple[str, ...], child: Any) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class Gauge(Metric):
+    """Value that goes up and down"""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> "_Timer":
+        """Observe the duration of a ``with`` block"""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: _HistogramValue):
+        self._histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def _render_child(self, key: Tuple[str, ...], child: _HistogramValue) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(float(bound))))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    """The metrics of this process plus collectors evaluated at scrape time"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Add a callable producing exposition lines when metrics are scraped"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric in the text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "quiz_http_requests_total", "HTTP requests by route and status",
+    ("method", "route", "status")))
+HTTP_DURATION = REGISTRY.register(Histogram(
+    "quiz_http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route")))
+HTTP_RESPONSE_BYTES = REGISTRY.register(Histogram(
+    "quiz_http_response_size_bytes", "HTTP response body size as sent (after compression)",
+    ("route",), SIZE_BUCKETS))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "quiz_http_requests_in_flight", "HTTP requests being handled"))
+MONGO_OPERATIONS = REGISTRY.register(Counter(
+    "quiz_mongo_operations_total", "Database repository calls by outcome",
+    ("operation", "outcome")))
+MONGO_DURATION = REGISTRY.register(Histogram(
+    "quiz_mongo_operation_duration_seconds", "Database repository call latency",
+    ("operation",)))
+WORK_DURATION = REGISTRY.register(Histogram(
+    "quiz_work_duration_seconds", "Shuffle, serialization and grading time by placement",
+    ("task", "placement")))
+PAYLOAD_BYTES = REGISTRY.register(Histogram(
+    "quiz_payload_size_bytes", "Serialized response payload size before compression",
+    ("kind",), SIZE_BUCKETS))
+
+
+def stats_lines(prefix: str, components: Dict[str, Optional[Dict[str, Any]]]) -> List[str]:
+    """Expose the numeric values of components' stats() as gauge families
+
+    Each stat key becomes one ``{prefix}_{key}`` family labelled by
+    component, rendered with its HELP and TYPE lines before all of its
+    samples as the exposition format requires. Nested dicts are flattened
+    into the name, and dicts of per-entry counters (the executor's per-task
+    split) label each entry with ``key``.
+    """
+    families: Dict[str, List[str]] = {}
+    for component, stats in components.items():
+        for name, labels, value in _numeric_stats(prefix, stats or {}, (("component", component),)):
+            families.setdefault(name, []).append(
+                f"{name}{_format_labels([n for n, _ in labels], [v for _, v in labels])} "
+                f"{_format_value(value)}")
+    lines = []
+    for name, samples in families.items():
+        lines.append(f"# HELP {name} Component counter {name[len(prefix) + 1:]} from stats()")
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(samples)
+    return lines
+
+
+def _numeric_stats(name: str, stats: Dict[str, Any],
+                   labels: Tuple[Tuple[str, str], ...]) -> Iterable[Tuple[str, tuple, float]]:
+    """Walk a stats dict, yielding the family name, labels and value of each number"""
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            entries = value.values()
+            if value and all(isinstance(entry, dict) for entry in entries):
+                for entry, entry_stats in value.items():
+                    yield from _numeric_stats(f"{name}_{key}", entry_stats,
+                                              labels + (("key", str(entry)),))
+            else:
+                yield from _numeric_stats(f"{name}_{key}", value, labels)
+            continue
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            yield f"{name}_{key}", labels, value
+
+
+def instrument_operations(cls):
+    """Count and time every public coroutine method of a repository class
+
+    Async generator methods are timed from the first item to exhaustion.
+    The time also counts towards the ``db`` phase of a profiled request.
+    Returns the class unchanged when metrics and profiling are disabled.
+    """
+    if not (METRICS_ENABLED or PROFILING_CONFIGURED):
+        return cls
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        if inspect.iscoroutinefunction(member):
+            setattr(cls, name, _timed_coroutine(name, member))
+        elif inspect.isasyncgenfunction(member):
+            setattr(cls, name, _timed_generator(name, member))
+    return cls
+
+
+def _timed_coroutine(name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+    duration = MONGO_DURATION.labels(name)
+    succeeded = MONGO_OPERATIONS.labels(name, "success")
+    failed = MONGO_OPERATIONS.labels(name, "error")
+
+    @functools.wraps(method)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await method(*args, **kwargs)
+        except BaseException:
+            failed.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            duration.observe(elapsed)
+            record_phase("db", elapsed)
+        succeeded.inc()
+        return result
+    return wrapper
+
+
+def _timed_generator(name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+    duration = MONGO_DURATION.labels(name)
+    succeeded = MONGO_OPERATIONS.labels(name, "success")
+    failed = MONGO_OPERATIONS.labels(name, "error")
+
+    @functools.wraps(method)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            async for item in method(*args, **kwargs):
+                yield item
+        except GeneratorExit:
+            # Consumer stopped early
+            succeeded.inc()
+            raise
+        except BaseException:
+            failed.inc()
+            raise
+        else:
+            succeeded.inc()
+        finally:
+            elapsed = time.perf_counter() - start
+            duration.observe(elapsed)
+            record_phase("db", elapsed)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status, size and in-flight requests
+
+    Requests are labelled by route template (e.g. ``/quizzes/id/{quiz_id}``)
+    so the number of series stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        response = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.labels().inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.labels().dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_DURATION.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, response["status"]).inc()
+            HTTP_RESPONSE_BYTES.labels(route).observe(response["size"])
@@ -1,4 +1,4 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from pydantic import BaseModel
 
 
@@ -22,10 +22,14 @@ class Answer(BaseModel):
 
 class QuizSubmission(BaseModel):
     answers: List[Answer]
+    # Token from a shuffled GET response; answers are then in that order
+    variant_token: Optional[str] = None
 
 
 class QuizResultItem(BaseModel):
-    question: str
+    question_number: int
+    # Grading reads only the answer key, so the question text is not included
+    question: Optional[str] = None
     user_answer: str
     correct_answer: str
     is_correct: bool
@@ -39,10 +43,86 @@ class QuizResult(BaseModel):
     results: List[QuizResultItem]
 
 
+class BatchSubmission(BaseModel):
+    # One string per student with one answer letter per question, e.g. "abdc";
+    # any other character (such as "-" for a blank) counts as wrong
+    answers: List[str]
+    # Return per-question correctness as base64 bit strings
+    compact: bool = False
+
+
+class BatchResult(BaseModel):
+    quiz_name: str
+    students: int
+    total_questions: int
+    scores: List[int]
+    mean_score: float
+    question_correct_counts: List[int]
+    correctness: List[Union[List[bool], str]]
+    compact: bool
+
+
+class ItemStatistics(BaseModel):
+    question_number: int
+    p_value: Optional[float] = None
+    point_biserial: Optional[float] = None
+    corrected_point_biserial: Optional[float] = None
+    distractors: Dict[str, int]
+
+
+class QuizAnalysis(BaseModel):
+    quiz_name: str
+    id: str
+    attempts: int
+    skipped_attempts: int = 0
+    total_questions: int
+    mean_score: Optional[float] = None
+    score_std: Optional[float] = None
+    kr20: Optional[float] = None
+    items: List[ItemStatistics]
+
+
 class QuizInfo(BaseModel):
     quiz_name: str
     id: Optional[str] = None
     total_questions: int = 0
+    attempts: int = 0
+    average_score: Optional[float] = None
+
+
+class QuestionStats(BaseModel):
+    question_number: int
+    shown: int = 0
+    correct: int
+    correct_rate: Optional[float] = None
+
+
+class QuizStats(BaseModel):
+    quiz_name: str
+    id: str
+    attempts: int
+    total_questions: int
+    average_score: Optional[float] = None
+    average_percentage: Optional[float] = None
+    questions: List[QuestionStats]
+
+
+class QuizImportIssue(BaseModel):
+    # NDJSON line number, starting at 1
+    line: int
+    quiz_name: Optional[str] = None
+    error: str
+
+
+class QuizImportResult(BaseModel):
+    imported: int
+    duplicates: int
+    invalid: int
+    errors: List[QuizImportIssue]
+    # More lines failed than are listed in errors
+    errors_truncated: bool = False
+    # Set when the upload could not be read to the end
+    error: Optional[str] = None
 
 
 class Quiz(BaseModel):
@@ -66,3 +146,4 @@ class Quiz(BaseModel):
                 ]
             }
         }
+
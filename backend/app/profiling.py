@@ -0,0 +1,269 @@
+"""Opt-in per-request profiling.
+
+A request is profiled when it carries an ``X-Profile`` header and profiling
+is allowed for it: ``PROFILING_ENABLED`` allows it for every client, and
+otherwise the request must present ``PROFILE_ADMIN_TOKEN`` in
+``X-Admin-Token``. ``X-Profile: timing`` only times the request phases
+(database calls, shuffling, serialization, grading) and reports them in a
+``Server-Timing`` header; ``save`` also runs the request under cProfile and
+writes the profile to ``PROFILE_DIR``; ``text`` returns the phase timings
+and the top functions of the profile instead of the response body.
+``PROFILE_SAMPLE_RATE`` additionally saves profiles of a fraction of live
+requests. Saved ``.prof`` files rotate and open with ``pstats`` or snakeviz.
+
+cProfile follows the event loop thread, so a profile also contains work of
+other requests that ran concurrently, and none of the work run on worker
+threads or processes; the phase timings are per request.
+"""
+import io
+import os
+import re
+import time
+import random
+import asyncio
+import cProfile
+import hmac
+import logging
+import pstats
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+# Fraction of requests (0-1) profiled and saved without being asked for
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Saved profiles kept; the oldest are deleted beyond this
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+# Functions listed by X-Profile: text
+PROFILE_TOP_FUNCTIONS = 40
+
+PROFILE_HEADER = "x-profile"
+ADMIN_TOKEN_HEADER = "x-admin-token"
+
+TIMING = "timing"
+SAVE = "save"
+TEXT = "text"
+MODES = (TIMING, SAVE, TEXT)
+
+# Whether any request can be profiled, so phase hooks can be skipped otherwise
+PROFILING_CONFIGURED = PROFILING_ENABLED or bool(PROFILE_ADMIN_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """Phase timings of one request"""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.start = time.perf_counter()
+        self.phases: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add the duration of one occurrence of a phase"""
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [seconds, 1]
+        else:
+            phase[0] += seconds
+            phase[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """Format the phases as a Server-Timing header value"""
+        entries = [f'{name};dur={seconds * 1000:.3f};desc="{int(count)}x"'
+                   for name, (seconds, count) in self.phases.items()]
+        entries.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(entries)
+
+    def summary(self) -> str:
+        """Format the phases as a plain-text table"""
+        lines = [f"{'phase':<20}{'calls':>8}{'ms':>12}"]
+        for name, (seconds, count) in sorted(self.phases.items(), key=lambda p: -p[1][0]):
+            lines.append(f"{name:<20}{int(count):>8}{seconds * 1000:>12.3f}")
+        lines.append(f"{'total':<20}{'':>8}{self.elapsed() * 1000:>12.3f}")
+        return "\n".join(lines)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add time spent in a phase to the request being profiled, if any"""
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a ``with`` block as a phase of the request being profiled"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+
+
+def requested_mode(headers: Dict[str, str],
+                   enabled: bool = PROFILING_ENABLED,
+                   admin_token: str = PROFILE_ADMIN_TOKEN) -> Optional[str]:
+    """The profiling mode a request asks for and is allowed, or None"""
+    mode = headers.get(PROFILE_HEADER)
+    if mode is None:
+        return None
+    mode = mode.strip().lower()
+    if mode not in MODES:
+        return None
+    if enabled:
+        return mode
+    token = headers.get(ADMIN_TOKEN_HEADER)
+    if admin_token and token and hmac.compare_digest(token.encode(), admin_token.encode()):
+        return mode
+    return None
+
+
+def profile_text(profile: RequestProfile, profiler: cProfile.Profile,
+                 top: int = PROFILE_TOP_FUNCTIONS) -> str:
+    """Render phase timings and the most expensive functions by cumulative time"""
+    stream = io.StringIO()
+    stream.write(profile.summary() + "\n\n")
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(top)
+    return stream.getvalue()
+
+
+def save_profile(profiler: cProfile.Profile, directory: str, name: str,
+                 max_files: int = PROFILE_MAX_FILES) -> str:
+    """Write a profile and delete the oldest ones beyond ``max_files``"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    profiler.dump_stats(path)
+    profiles = sorted(
+        (entry for entry in os.scandir(directory)
+         if entry.is_file() and entry.name.endswith(".prof")),
+        key=lambda entry: entry.stat().st_mtime)
+    for entry in profiles[:max(0, len(profiles) - max_files)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+    return path
+
+
+def profile_name(method: str, route: str, seconds: float) -> str:
+    """File name of a saved profile: time, method, route and duration"""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    return f"{stamp}-{time.time_ns() % 1_000_000:06d}-{method}-{slug}-{seconds * 1000:.0f}ms.prof"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that ask for it, or a sample of them
+
+    Only one request is under cProfile at a time; a request asking for a
+    profile while another one runs gets its phase timings only.
+    """
+
+    def __init__(self, app, enabled: bool = PROFILING_ENABLED,
+                 admin_token: str = PROFILE_ADMIN_TOKEN,
+                 sample_rate: float = PROFILE_SAMPLE_RATE,
+                 directory: str = PROFILE_DIR,
+                 max_files: int = PROFILE_MAX_FILES):
+        self.app = app
+        self._enabled = enabled
+        self._admin_token = admin_token
+        self._sample_rate = sample_rate
+        self._directory = directory
+        self._max_files = max_files
+        self._profiling = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = None
+        if self._enabled or self._admin_token:
+            headers = {key.decode("latin-1"): value.decode("latin-1")
+                       for key, value in scope.get("headers", ())
+                       if key in (b"x-profile", b"x-admin-token")}
+            mode = requested_mode(headers, self._enabled, self._admin_token)
+        sampled = mode is None and self._sample_rate > 0 and random.random() < self._sample_rate
+        if mode is None and not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(mode or SAVE)
+        profiler = None
+        if profile.mode != TIMING and not self._profiling:
+            profiler = cProfile.Profile()
+        token = _current.set(profile)
+        try:
+            if profiler is None:
+                await self.app(scope, receive, self._timing_send(profile, send, sampled))
+                return
+            self._profiling = True
+            profiler.enable()
+            try:
+                if profile.mode == TEXT:
+                    messages = []
+
+                    async def buffer(message):
+                        messages.append(message)
+                    await self.app(scope, receive, buffer)
+                else:
+                    await self.app(scope, receive, self._timing_send(profile, send, sampled))
+            finally:
+                profiler.disable()
+                self._profiling = False
+        finally:
+            _current.reset(token)
+
+        if profile.mode == TEXT:
+            await self._send_text(profile, profiler, messages, send)
+            return
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        name = profile_name(scope["method"], route, profile.elapsed())
+        try:
+            path = await asyncio.to_thread(
+                save_profile, profiler, self._directory, name, self._max_files)
+            logger.info("Saved profile %s (%s)", path, profile.server_timing())
+        except OSError as e:
+            logger.warning("Could not save profile %s: %s", name, e)
+
+    def _timing_send(self, profile: RequestProfile, send, sampled: bool):
+        """Add Server-Timing to the response of a request that asked for it"""
+        if sampled:
+            return send
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", profile.server_timing().encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+        return send_wrapper
+
+    async def _send_text(self, profile: RequestProfile, profiler: cProfile.Profile,
+                         messages: List[Dict[str, Any]], send) -> None:
+        """Answer with the profile instead of the buffered response"""
+        status = next((m["status"] for m in messages if m["type"] == "http.response.start"), 500)
+        body = profile_text(profile, profiler).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"server-timing", profile.server_timing().encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
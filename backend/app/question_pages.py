@@ -0,0 +1,90 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .shuffling import IDENTITY_OPTION_ORDER, OPTION_KEYS, ShufflePlan, shuffle_question
+
+# Fields of a question that can be requested with ``fields=``
+QUESTION_FIELDS = ("question",) + OPTION_KEYS + ("correct_answer",)
+# Shorthand accepted in ``fields=`` for all four options
+_FIELD_ALIASES = {"options": OPTION_KEYS}
+
+
+class PageRequest:
+    """Question paging parameters of a quiz GET request"""
+
+    __slots__ = ("offset", "limit", "fields", "variant_token", "sample")
+
+    def __init__(
+            self,
+            offset: int = 0,
+            limit: Optional[int] = None,
+            fields: Optional[str] = None,
+            variant_token: Optional[str] = None,
+            sample: Optional[int] = None):
+        self.offset = offset
+        self.limit = limit
+        self.fields = fields
+        self.variant_token = variant_token
+        self.sample = sample
+
+    @property
+    def requested(self) -> bool:
+        """Whether the client asked for a page or sample rather than the whole quiz"""
+        return bool(self.offset or self.limit is not None or self.fields
+                    or self.variant_token or self.sample)
+
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse a comma-separated sparse fieldset, or None for every field
+
+    Raises ValueError for unknown field names.
+    """
+    if not value:
+        return None
+
+    fields: List[str] = []
+    for name in (part.strip() for part in value.split(",")):
+        if not name:
+            continue
+        expanded = _FIELD_ALIASES.get(name, (name,))
+        for field in expanded:
+            if field not in QUESTION_FIELDS:
+                raise ValueError(
+                    f"Unknown question field '{field}'; expected any of: "
+                    f"{', '.join(QUESTION_FIELDS)}, options")
+            if field not in fields:
+                fields.append(field)
+    return tuple(fields) or None
+
+
+def project_question(question: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Keep only the requested fields of a question"""
+    if fields is None:
+        return question
+    return {field: question[field] for field in fields if field in question}
+
+
+def page_positions(total: int, offset: int, limit: Optional[int]) -> range:
+    """Displayed positions covered by a page"""
+    stop = total if limit is None else min(total, offset + limit)
+    return range(offset, max(offset, stop))
+
+
+def source_indexes(plan: ShufflePlan, positions: range) -> List[int]:
+    """Source question indexes shown at the given displayed positions"""
+    if plan.question_order is None:
+        return list(positions)
+    return [plan.question_order[position] for position in positions]
+
+
+def shuffle_page(
+        questions: Sequence[Dict[str, Any]],
+        plan: ShufflePlan,
+        positions: range) -> List[Dict[str, Any]]:
+    """Apply a variant's option orders to the questions of one page"""
+    option_orders = plan.option_orders
+    return [
+        shuffle_question(
+            question,
+            option_orders[position] if option_orders is not None
+            else IDENTITY_OPTION_ORDER)
+        for question, position in zip(questions, positions)
+    ]
@@ -0,0 +1,46 @@
+import os
+import zlib
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List
+from .compression import GZIP_LEVEL
+from .utils import mongodb_json_serializer
+
+logger = logging.getLogger(__name__)
+
+# Quizzes read per cursor batch and written per response chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+GZIP_MEDIA_TYPE = "application/gzip"
+
+
+async def ndjson_chunks(
+        documents: AsyncIterable[Dict[str, Any]],
+        batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Serialize quiz documents as NDJSON, one chunk per ``batch_size`` quizzes
+
+    Each line can be posted back to POST /quizzes/import as is.
+    """
+    lines: List[bytes] = []
+    exported = 0
+    async for document in documents:
+        document.pop("_id", None)
+        lines.append(mongodb_json_serializer.dumps(document))
+        if len(lines) >= batch_size:
+            exported += len(lines)
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        exported += len(lines)
+        yield b"\n".join(lines) + b"\n"
+    logger.info("Exported %d quizzes", exported)
+
+
+async def gzip_chunks(chunks: AsyncIterable[bytes], level: int = GZIP_LEVEL) -> AsyncIterator[bytes]:
+    """Compress a byte stream into a single gzip member as it is produced"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
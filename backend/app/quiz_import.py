@@ -0,0 +1,209 @@
+import os
+import zlib
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from .models import QuizCreate
+from .shuffling import ANSWER_INDEXES
+
+logger = logging.getLogger(__name__)
+
+# Quizzes written per insert_many round trip
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+# Longest NDJSON line (one quiz) accepted; longer lines are skipped
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", str(16 * 1024 * 1024)))
+# Per-line errors listed in an import report; the counts are always complete
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "1000"))
+
+GZIP_MAGIC = b"\x1f\x8b"
+# MongoDB error code of a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+# Largest piece of decompressed output produced at once
+_DECOMPRESS_CHUNK = 64 * 1024
+
+
+class ImportReport:
+    """Counts and per-line errors of one bulk import"""
+
+    def __init__(self, max_errors: int = IMPORT_MAX_REPORTED_ERRORS):
+        """Initialize an empty report"""
+        self._max_errors = max_errors
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.errors_truncated = False
+        self.error: Optional[str] = None
+
+    def add_error(self, line: int, error: str,
+                  quiz_name: Optional[str] = None, duplicate: bool = False) -> None:
+        """Record a line that was not imported"""
+        if duplicate:
+            self.duplicates += 1
+        else:
+            self.invalid += 1
+        if len(self.errors) < self._max_errors:
+            self.errors.append({"line": line, "quiz_name": quiz_name, "error": error})
+        else:
+            self.errors_truncated = True
+
+    def result(self) -> Dict[str, Any]:
+        """Build the import response"""
+        return {
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated,
+            "error": self.error,
+        }
+
+
+async def decompress_chunks(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Gunzip a byte stream incrementally when it starts with the gzip magic
+
+    Output is produced in bounded pieces, so a highly compressed upload
+    never inflates into one large buffer. Concatenated gzip members are
+    decompressed one after another. Raises zlib.error for corrupt data.
+    """
+    decompressor = None
+    first = True
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if first:
+            first = False
+            if chunk[:2] == GZIP_MAGIC:
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if decompressor is None:
+            yield chunk
+            continue
+
+        data = chunk
+        while data:
+            output = decompressor.decompress(data, _DECOMPRESS_CHUNK)
+            if output:
+                yield output
+            if decompressor.eof:
+                # Start of the next gzip member, if any
+                data = decompressor.unused_data
+                if data:
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            else:
+                data = decompressor.unconsumed_tail
+
+    if decompressor is not None and not decompressor.eof:
+        raise zlib.error("Truncated gzip stream")
+
+
+async def iter_lines(
+        chunks: AsyncIterable[bytes],
+        max_line_bytes: int = IMPORT_MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Split a byte stream into numbered lines
+
+    Lines longer than ``max_line_bytes`` are discarded without being
+    buffered and yielded as None.
+    """
+    buffer = bytearray()
+    line_number = 0
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            line_number += 1
+            oversized = oversized or end - start > max_line_bytes
+            yield line_number, None if oversized else bytes(buffer[start:end])
+            oversized = False
+            start = end + 1
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            oversized = True
+            buffer.clear()
+
+    if buffer or oversized:
+        oversized = oversized or len(buffer) > max_line_bytes
+        yield line_number + 1, None if oversized else bytes(buffer)
+
+
+def parse_quiz_line(line: bytes) -> Dict[str, Any]:
+    """Validate one NDJSON line as a quiz document ready to insert
+
+    Raises ValueError (including pydantic's ValidationError) for anything
+    POST /quizzes/ would reject.
+    """
+    quiz = QuizCreate.model_validate_json(line)
+    for i, question in enumerate(quiz.questions):
+        if question.correct_answer not in ANSWER_INDEXES:
+            raise ValueError(f"Question {i+1}: correct_answer must be one of: a, b, c, d")
+    return quiz.dict()
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'line'}: {item['msg']}"
+        for item in error.errors())
+
+
+async def import_quizzes(
+        db,
+        chunks: AsyncIterable[bytes],
+        batch_size: int = IMPORT_BATCH_SIZE,
+        max_line_bytes: int = IMPORT_MAX_LINE_BYTES,
+        max_errors: int = IMPORT_MAX_REPORTED_ERRORS) -> Dict[str, Any]:
+    """Import quizzes from an NDJSON (optionally gzipped) byte stream
+
+    Lines are validated as they arrive and written ``batch_size`` at a time
+    with unordered ``insert_many``, so memory stays bounded by one batch
+    however large the upload is. Invalid lines and quiz names that already
+    exist are reported per line; every other quiz is imported.
+    """
+    report = ImportReport(max_errors)
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+
+    try:
+        async for line_number, line in iter_lines(decompress_chunks(chunks), max_line_bytes):
+            if line is None:
+                report.add_error(line_number, f"Line is longer than {max_line_bytes} bytes")
+                continue
+            if not line.strip():
+                continue
+            try:
+                batch.append((line_number, parse_quiz_line(line)))
+            except ValidationError as e:
+                report.add_error(line_number, _validation_message(e))
+                continue
+            except ValueError as e:
+                report.add_error(line_number, str(e))
+                continue
+
+            if len(batch) >= batch_size:
+                await _write_batch(db, batch, report)
+                batch = []
+    except zlib.error as e:
+        # Lines before the corrupt data are still imported
+        report.error = f"Invalid gzip data: {e}"
+
+    if batch:
+        await _write_batch(db, batch, report)
+
+    logger.info("Imported %d quizzes (%d duplicates, %d invalid)",
+                report.imported, report.duplicates, report.invalid)
+    return report.result()
+
+
+async def _write_batch(db, batch: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+    """Insert one batch and report the quizzes MongoDB rejected"""
+    inserted, failures = await db.insert_quizzes([quiz for _, quiz in batch])
+    report.imported += inserted
+    for index, code, message in failures:
+        line_number, quiz = batch[index]
+        if code == DUPLICATE_KEY_ERROR:
+            report.add_error(line_number, f"Quiz '{quiz['quiz_name']}' already exists",
+                             quiz["quiz_name"], duplicate=True)
+        else:
+            report.add_error(line_number, message, quiz["quiz_name"])
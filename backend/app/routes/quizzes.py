@@ -1,20 +1,85 @@
 import os
+import asyncio
 import logging
 from abc import ABC, abstractmethod
-from fastapi import APIRouter, HTTPException, Request, Depends, Query, Body
+from fastapi import APIRouter, HTTPException, Request, Response, Depends, Query, Body, Header
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any, Type
 from pydantic import BaseModel, Field
-from ..models import QuizCreate, QuizInfo, QuizSubmission, QuizResult, Quiz
-from ..database import (
-    get_all_quizzes,
-    get_quiz,
-    save_quiz_to_db,
-    delete_quiz_from_db,
-    get_quiz_by_id as get_quiz_by_id_db
+from ..models import (
+    QuizCreate,
+    QuizInfo,
+    QuizSubmission,
+    QuizResult,
+    Quiz,
+    BatchSubmission,
+    BatchResult,
+    QuizStats,
+    QuizAnalysis,
+    QuizImportResult
 )
+from ..database import Database
+from ..cache import QuizCache
+from ..shuffling import ShufflePlan
+from ..question_pages import (
+    PageRequest,
+    page_positions,
+    parse_fields,
+    project_question,
+    shuffle_page,
+    source_indexes
+)
+from ..stats import stats_detail, stats_summary
+from ..analysis import analyze_quiz
+from ..quiz_import import import_quizzes
+from ..idempotency import request_fingerprint, run_idempotent
+from ..quiz_export import (
+    EXPORT_BATCH_SIZE,
+    GZIP_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    gzip_chunks,
+    ndjson_chunks
+)
+from ..batch_grading import BATCH_GRADE_MAX_STUDENTS, InvalidAnswerSheet, grade_sheets
+from ..compression import (
+    CompressedPayload,
+    PayloadCache,
+    encode_json,
+    encoded_response,
+    payload_response
+)
+from ..executors import INLINE, WorkExecutor
+from ..metrics import PAYLOAD_BYTES, WORK_DURATION
+from ..profiling import phase
+from ..dependencies import (
+    get_database,
+    get_quiz_cache,
+    get_answer_key_cache,
+    get_variant_pools,
+    get_response_cache,
+    get_attempt_writer,
+    get_work_executor
+)
+from ..attempts import AttemptQueueFull, AttemptWriter, attempt_record
+from ..variant_pool import VariantPoolManager
 from bson import ObjectId
-from ..utils import mongodb_response
-from ..shuffling import shuffle_quiz
+from pymongo.errors import DuplicateKeyError
+from ..utils import (
+    mongodb_response,
+    mongodb_json_serializer,
+    quiz_etag,
+    etag_matches,
+    not_modified_response
+)
+from ..variants import (
+    MAX_SAMPLE_SIZE,
+    InvalidVariantToken,
+    VariantToken,
+    new_seed,
+    render_variant,
+    variant_signer
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -28,35 +93,233 @@ class RouteHandler(ABC):
         pass
 
 
+class QuizReadHandler(RouteHandler):
+    """Base class for handlers that serve a single quiz"""
+
+    async def _not_modified(
+            self,
+            cached: Optional[Dict[str, Any]],
+            version_loader,
+            key: str,
+            if_none_match: Optional[str]) -> Optional[Response]:
+        """Answer a conditional GET without loading the quiz questions"""
+        if not if_none_match:
+            return None
+        quiz = cached or await version_loader(key)
+        if not quiz or not quiz.get("version"):
+            return None
+        etag = quiz_etag(quiz["id"], quiz["version"])
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+        return None
+
+    async def _unshuffled_response(
+            self,
+            quiz: Dict[str, Any],
+            payloads: PayloadCache,
+            accept_encoding: Optional[str],
+            executor: WorkExecutor) -> Response:
+        """Serve an unshuffled quiz with its ETag
+
+        The serialized (and compressed) body is cached per content version,
+        so repeated requests skip serialization and compression.
+        """
+        version = quiz.get("version")
+        if not version:
+            body, encoding = await executor.run(
+                "serialize", len(quiz.get("questions") or ()),
+                encode_json, self._public_fields(quiz), accept_encoding)
+            return encoded_response(body, encoding)
+
+        key = ("quiz", quiz["id"], version)
+        payload = payloads.get(key)
+        if payload is None:
+            body, _ = await executor.run(
+                "serialize", len(quiz.get("questions") or ()),
+                encode_json, self._public_fields(quiz), None)
+            PAYLOAD_BYTES.labels("quiz").observe(len(body))
+            payload = payloads.put(
+                key, CompressedPayload(body, {"ETag": quiz_etag(quiz["id"], version)}))
+        return payload_response(payload, accept_encoding)
+
+    async def _page_response(
+            self,
+            db: Database,
+            cache: QuizCache,
+            quiz_key: Dict[str, Any],
+            shuffle: bool,
+            page: PageRequest,
+            accept_encoding: Optional[str],
+            executor: WorkExecutor) -> Response:
+        """Serve a page of questions, optionally with a sparse fieldset
+
+        Only the questions of the page are read from MongoDB. Shuffled and
+        sampled pages follow the variant token, so every page of one attempt
+        comes from the same shuffled order (and the same drawn questions);
+        the first page issues a new token.
+        """
+        try:
+            fields = parse_fields(page.fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        quiz_id = quiz_key["id"]
+        total = len(quiz_key["answer_key"])
+        cached = cache.peek_by_id(quiz_id)
+        result = {
+            "quiz_name": quiz_key["quiz_name"],
+            "id": quiz_id,
+            "version": quiz_key.get("version"),
+            "total_questions": total,
+            "offset": page.offset,
+            "limit": page.limit,
+        }
+
+        if shuffle or page.sample or page.variant_token:
+            variant = self._page_variant(quiz_id, page, shuffle)
+            plan = variant.plan(total)
+            if variant.sample:
+                result["bank_size"] = total
+                if plan.question_order is not None:
+                    result["total_questions"] = len(plan.question_order)
+            positions = page_positions(result["total_questions"], page.offset, page.limit)
+            indexes = source_indexes(plan, positions)
+            if cached is not None:
+                questions = [cached["questions"][index] for index in indexes]
+            else:
+                questions = await db.get_questions_at(quiz_id, indexes) if indexes else []
+            questions = shuffle_page(questions, plan, positions)
+            result["variant_token"] = variant_signer.sign(variant)
+        else:
+            positions = page_positions(total, page.offset, page.limit)
+            if cached is not None:
+                questions = cached["questions"][positions.start:positions.stop]
+            elif positions:
+                questions = await db.get_questions(
+                    quiz_id, positions.start, len(positions), fields)
+            else:
+                questions = []
+
+        result["questions"] = [project_question(question, fields) for question in questions]
+        body, encoding = await executor.run(
+            "serialize", len(questions), encode_json, result, accept_encoding)
+        return encoded_response(body, encoding)
+
+    def _page_variant(self, quiz_id: str, page: PageRequest, shuffle: bool) -> VariantToken:
+        """Continue the variant of a token, or start a new one"""
+        if not page.variant_token:
+            return VariantToken(quiz_id, new_seed(), shuffle, shuffle, page.sample)
+        try:
+            variant = variant_signer.verify(page.variant_token)
+        except InvalidVariantToken as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if variant.quiz_id != quiz_id:
+            raise HTTPException(
+                status_code=400,
+                detail="Variant token was issued for a different quiz")
+        return variant
+
+    async def _shuffled_response(
+            self,
+            quiz: Dict[str, Any],
+            pools: VariantPoolManager,
+            accept_encoding: Optional[str],
+            executor: WorkExecutor) -> Response:
+        """Serve a shuffled variant, from the pool when pools are enabled
+
+        Otherwise (or while the pool of the quiz is still being filled) the
+        variant is shuffled, serialized and compressed in one unit of work,
+        which leaves the event loop for large quizzes.
+        """
+        if pools.enabled:
+            payload = pools.get(quiz)
+            if payload is not None:
+                return payload_response(payload, accept_encoding)
+        seed = new_seed()
+        token = variant_signer.sign(VariantToken(quiz["id"], seed))
+        body, encoding = await executor.run(
+            "shuffle", len(quiz.get("questions") or ()),
+            render_variant, quiz, seed, token, accept_encoding, process=True)
+        return encoded_response(body, encoding)
+
+    def _public_fields(self, quiz: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop the raw ObjectId; the document already carries its string id"""
+        return {key: value for key, value in quiz.items() if key != "_id"}
+
+
 class QuizListHandler(RouteHandler):
     """Handler for listing all quizzes"""
-    
-    async def handle(self) -> List[QuizInfo]:
-        """Get a list of all available quizzes"""
-        quizzes = await get_all_quizzes()
-        return [
-            {
-                "quiz_name": quiz["quiz_name"],
-                "id": str(quiz["_id"]) if "_id" in quiz else None,
-                "total_questions": len(quiz.get("questions", []))
-            }
-            for quiz in quizzes if quiz
-        ]
+
+    async def handle(
+            self,
+            db: Database,
+            payloads: PayloadCache,
+            limit: Optional[int] = None,
+            after: Optional[str] = None,
+            if_none_match: Optional[str] = None,
+            accept_encoding: Optional[str] = None) -> Response:
+        """Get a page of available quizzes
+
+        When a ``limit`` is given and more quizzes follow, the cursor for
+        the next page is returned in the ``X-Next-Cursor`` header. The ETag
+        follows the list and statistics versions, since the list carries
+        attempt totals, so a matching ``If-None-Match`` is answered with 304
+        before the list is queried.
+        """
+        if after is not None and not ObjectId.is_valid(after):
+            raise HTTPException(
+                status_code=400, detail=f"Invalid cursor: {after}")
+
+        list_version, stats_version = await asyncio.gather(
+            db.get_list_version(), db.get_stats_version())
+        etag = f'W/"l-{list_version}.{stats_version}-{limit or 0}-{after or ""}"'
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag)
+
+        key = ("list", list_version, stats_version, limit, after)
+        payload = payloads.get(key)
+        if payload is not None:
+            return payload_response(payload, accept_encoding)
+
+        # Fetch one extra summary to know whether another page follows
+        fetch_limit = limit + 1 if limit is not None else None
+        quizzes = await db.list_quizzes(limit=fetch_limit, after=after)
+
+        next_cursor = None
+        if limit is not None and len(quizzes) > limit:
+            quizzes = quizzes[:limit]
+            next_cursor = quizzes[-1]["id"]
+
+        # Attempt totals come from the pre-aggregated statistics rollups
+        stats = await db.get_quiz_stats_summaries([quiz["id"] for quiz in quizzes])
+        for quiz in quizzes:
+            quiz.update(stats_summary(stats.get(quiz["id"])))
+
+        headers = {"ETag": etag}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        with WORK_DURATION.labels("serialize_list", INLINE).time(), phase("serialize_list"):
+            body = mongodb_json_serializer.dumps(quizzes)
+        PAYLOAD_BYTES.labels("list").observe(len(body))
+        payload = payloads.put(key, CompressedPayload(body, headers))
+        return payload_response(payload, accept_encoding)
 
 
 class QuizCreateHandler(RouteHandler):
     """Handler for creating a new quiz"""
     
-    async def handle(self, quiz: QuizCreate) -> Dict[str, Any]:
-        """Create a new quiz"""
+    async def handle(self, db: Database, cache: QuizCache, keys: QuizCache,
+                     quiz: QuizCreate, idempotency_key: Optional[str] = None) -> Response:
+        """Create a new quiz, at most once per Idempotency-Key"""
+        fingerprint = request_fingerprint("POST", "/quizzes/", quiz.dict())
+        return await run_idempotent(
+            db, idempotency_key, fingerprint, lambda: self._create(db, cache, keys, quiz))
+
+    async def _create(self, db: Database, cache: QuizCache, keys: QuizCache,
+                      quiz: QuizCreate) -> Response:
+        """Insert the quiz; the unique index on quiz_name rejects duplicates"""
         quiz_name = quiz.quiz_name
 
-        # Check if quiz already exists
-        existing_quiz = await get_quiz(quiz_name)
-        if existing_quiz:
-            raise HTTPException(
-                status_code=409, detail=f"Quiz '{quiz_name}' already exists")
-
         # Validate correct_answer is a, b, c, or d
         for i, question in enumerate(quiz.questions):
             if question.correct_answer not in ["a", "b", "c", "d"]:
@@ -67,45 +330,109 @@ class QuizCreateHandler(RouteHandler):
 
         # Save the quiz to MongoDB
         quiz_data = quiz.dict()
-        inserted_id = await save_quiz_to_db(quiz_data)
+        try:
+            inserted_id = await db.save_quiz(quiz_data)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=409, detail=f"Quiz '{quiz_name}' already exists")
+        cache.invalidate(quiz_name=quiz_name)
+        keys.invalidate(quiz_name=quiz_name)
 
-        return {
+        return mongodb_response({
             "message": f"Quiz '{quiz_name}' created successfully",
             "id": str(inserted_id)
-        }
+        }, status_code=201)
 
 
-class QuizByNameHandler(RouteHandler):
+class QuizImportHandler(RouteHandler):
+    """Handler for importing many quizzes from an NDJSON upload"""
+
+    async def handle(self, db: Database, request: Request) -> Response:
+        """Stream the request body into batched quiz inserts"""
+        result = await import_quizzes(db, request.stream())
+        return mongodb_response(result)
+
+
+class QuizExportHandler(RouteHandler):
+    """Handler for exporting quizzes as an NDJSON stream"""
+
+    async def handle(self, db: Database, quiz_names: Optional[List[str]],
+                     name_prefix: Optional[str], updated_since: Optional[datetime],
+                     batch_size: int, compress: bool) -> StreamingResponse:
+        """Stream the matching quizzes from a cursor, optionally gzipped"""
+        # Pass as updated_since next time to export only what changed since
+        started_at = datetime.now(timezone.utc)
+        documents = db.iter_quizzes(quiz_names, name_prefix, updated_since, batch_size)
+        body = ndjson_chunks(documents, batch_size)
+        filename = "quizzes.ndjson"
+        media_type = NDJSON_MEDIA_TYPE
+        if compress:
+            body = gzip_chunks(body)
+            filename += ".gz"
+            media_type = GZIP_MEDIA_TYPE
+
+        return StreamingResponse(body, media_type=media_type, headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Started-At": started_at.isoformat(),
+        })
+
+
+class QuizByNameHandler(QuizReadHandler):
     """Handler for retrieving a quiz by name"""
     
-    async def handle(self, quiz_name: str, request: Request, shuffle: bool = True) -> Dict[str, Any]:
+    async def handle(self, db: Database, cache: QuizCache, keys: QuizCache,
+                     pools: VariantPoolManager, payloads: PayloadCache,
+                     executor: WorkExecutor, quiz_name: str, shuffle: bool = True,
+                     if_none_match: Optional[str] = None,
+                     accept_encoding: Optional[str] = None,
+                     page: Optional[PageRequest] = None) -> Response:
         """Get a quiz by its name with option to shuffle questions and answers"""
         try:
-            # Find the quiz in the database
-            quiz = await request.app.mongodb.quizzes.find_one({"quiz_name": quiz_name})
+            if page is not None and page.requested:
+                quiz_key = await keys.load_by_name(quiz_name, db.get_answer_key)
+                if not quiz_key:
+                    raise HTTPException(
+                        status_code=404, detail=f"Quiz '{quiz_name}' not found")
+                return await self._page_response(
+                    db, cache, quiz_key, shuffle, page, accept_encoding, executor)
+
+            if not shuffle:
+                not_modified = await self._not_modified(
+                    cache.peek_by_name(quiz_name), db.get_quiz_version,
+                    quiz_name, if_none_match)
+                if not_modified:
+                    return not_modified
+
+            # Find the quiz in the cache or the database
+            quiz = await cache.load_by_name(quiz_name, db.get_quiz)
 
             if not quiz:
                 raise HTTPException(
                     status_code=404, detail=f"Quiz '{quiz_name}' not found")
 
-            # Convert ObjectId to string for JSON response
-            quiz["id"] = str(quiz["_id"])
-
             # Shuffle quiz questions and options if requested
             if shuffle:
-                quiz = shuffle_quiz(quiz)
+                return await self._shuffled_response(quiz, pools, accept_encoding, executor)
 
-            return quiz
+            return await self._unshuffled_response(quiz, payloads, accept_encoding, executor)
+        except HTTPException:
+            # Re-raise HTTP exceptions
+            raise
         except Exception as e:
-            logger.error(f"Error retrieving quiz by name: {e}")
+            logger.error("Error retrieving quiz by name: %s", e)
             raise HTTPException(
                 status_code=500, detail=f"Failed to retrieve quiz: {str(e)}")
 
 
-class QuizByIdHandler(RouteHandler):
+class QuizByIdHandler(QuizReadHandler):
     """Handler for retrieving a quiz by ID"""
     
-    async def handle(self, quiz_id: str, request: Request, shuffle: bool = True):
+    async def handle(self, db: Database, cache: QuizCache, keys: QuizCache,
+                     pools: VariantPoolManager, payloads: PayloadCache,
+                     executor: WorkExecutor, quiz_id: str, shuffle: bool = True,
+                     if_none_match: Optional[str] = None,
+                     accept_encoding: Optional[str] = None,
+                     page: Optional[PageRequest] = None) -> Response:
         """Get a quiz by its ID with option to shuffle questions and answers"""
         try:
             # More robust ObjectId validation
@@ -113,155 +440,242 @@ class QuizByIdHandler(RouteHandler):
                 if not ObjectId.is_valid(quiz_id):
                     raise HTTPException(
                         status_code=400, detail=f"Invalid ObjectId format: {quiz_id}")
-                obj_id = ObjectId(quiz_id)
             except Exception as e:
-                logger.error(f"Invalid ObjectId: {quiz_id}, Error: {e}")
+                logger.error("Invalid ObjectId: %s, Error: %s", quiz_id, e)
                 raise HTTPException(
                     status_code=400, detail=f"Invalid quiz ID format: {quiz_id}")
 
+            if page is not None and page.requested:
+                quiz_key = await keys.load_by_id(quiz_id, db.get_answer_key_by_id)
+                if not quiz_key:
+                    raise HTTPException(
+                        status_code=404, detail=f"Quiz with ID {quiz_id} not found")
+                return await self._page_response(
+                    db, cache, quiz_key, shuffle, page, accept_encoding, executor)
+
+            if not shuffle:
+                not_modified = await self._not_modified(
+                    cache.peek_by_id(quiz_id), db.get_quiz_version_by_id,
+                    quiz_id, if_none_match)
+                if not_modified:
+                    return not_modified
+
             # Find quiz
-            quiz = await request.app.mongodb.quizzes.find_one({"_id": obj_id})
+            quiz = await cache.load_by_id(quiz_id, db.get_quiz_by_id)
 
             if not quiz:
-                logger.warning(f"Quiz with ID {quiz_id} not found")
+                logger.warning("Quiz with ID %s not found", quiz_id)
                 raise HTTPException(
                     status_code=404, detail=f"Quiz with ID {quiz_id} not found")
 
-            # Add explicit logging for shuffle parameter
-            logger.info(f"Quiz {quiz_id}: shuffle={shuffle}")
-
-            # Use mongodb_response only after shuffling!
-            quiz_data = dict(quiz)  # Convert from MongoDB document
-            quiz_data["id"] = str(quiz_data.pop("_id"))  # Handle ObjectId
+            logger.debug("Quiz %s: shuffle=%s", quiz_id, shuffle)
 
             # Apply shuffling
             if shuffle:
                 try:
-                    quiz_data = shuffle_quiz(quiz_data)
-                    logger.info(f"Quiz shuffled successfully")
+                    response = await self._shuffled_response(
+                        quiz, pools, accept_encoding, executor)
+                    logger.debug("Quiz %s shuffled", quiz_id)
+                    return response
                 except Exception as e:
-                    logger.error(f"Failed to shuffle quiz: {e}", exc_info=True)
+                    logger.error("Failed to shuffle quiz: %s", e, exc_info=True)
                     # Continue with unshuffled quiz
 
             # Return response
-            return mongodb_response(quiz_data)
+            return await self._unshuffled_response(quiz, payloads, accept_encoding, executor)
         except HTTPException:
             # Re-raise HTTP exceptions
             raise
         except Exception as e:
-            logger.error(f"Error in get_quiz_by_id: {e}", exc_info=True)
+            logger.error("Error in get_quiz_by_id: %s", e, exc_info=True)
             raise HTTPException(
                 status_code=500, detail=f"Failed to retrieve quiz: {str(e)}")
 
 
-class QuizDebugHandler(RouteHandler):
-    """Handler for debugging quiz IDs"""
-    
-    async def handle(self, quiz_id: str, request: Request) -> Dict[str, Any]:
-        """Debug endpoint for IDs"""
-        try:
-            # Check if ID is valid ObjectId
-            try:
-                obj_id = ObjectId(quiz_id)
-                is_valid = True
-            except:
-                is_valid = False
-
-            # Use request.app.mongodb instead of quizzes_collection
-            db_connected = request.app.mongodb is not None
-
-            return {
-                "quiz_id": quiz_id,
-                "is_valid_objectid": is_valid,
-                "converted_id": str(ObjectId(quiz_id)) if is_valid else None,
-                "database_connected": db_connected,
-                "app_has_mongodb": hasattr(request.app, "mongodb")
-            }
-        except Exception as e:
-            return {
-                "quiz_id": quiz_id,
-                "error": str(e),
-                "error_type": type(e).__name__
-            }
-
-
 class QuizSubmitHandler(RouteHandler):
     """Handler for submitting quiz answers"""
     
-    async def handle(self, quiz_name: str, submission: QuizSubmission) -> QuizResult:
+    async def handle(self, db: Database, keys: QuizCache, attempts: AttemptWriter,
+                     quiz_name: str, submission: QuizSubmission,
+                     executor: WorkExecutor) -> Response:
         """Submit answers for a quiz and get results"""
-        quiz = await get_quiz(quiz_name)
+        quiz = await keys.load_by_name(quiz_name, db.get_answer_key)
 
         if not quiz:
             raise HTTPException(
                 status_code=404, detail=f"Quiz '{quiz_name}' not found")
 
+        return await self._grade(quiz, submission, attempts, executor)
+
+    async def _grade(self, quiz: Dict[str, Any], submission: QuizSubmission,
+                     attempts: AttemptWriter, executor: WorkExecutor) -> Response:
+        """Grade a submission against a quiz's answer key and record the attempt"""
+        answer_key = quiz["answer_key"]
+        plan = None
+
+        # Grade against the variant the student saw, if it was shuffled
+        if submission.variant_token:
+            plan = self._variant_plan(quiz, submission.variant_token)
+            answer_key = answer_key.for_variant(plan)
+
         # Validate answers
         answers = submission.answers
-        questions = quiz["questions"]
+        total = len(answer_key)
 
-        if len(answers) != len(questions):
+        if len(answers) != total:
             raise HTTPException(
                 status_code=400,
-                detail=f"Expected {len(questions)} answers, got {len(answers)}"
+                detail=f"Expected {total} answers, got {len(answers)}"
             )
 
         # Grade the quiz
-        score = 0
-        results = []
-
-        for i, (question, answer) in enumerate(zip(questions, answers)):
-            user_answer = answer.answer.lower()
-            correct_answer = question["correct_answer"]
-            is_correct = user_answer == correct_answer
+        submitted = [answer.answer for answer in answers]
+        score, results = await executor.run("grade", total, answer_key.grade, submitted)
+        percentage = (score / total) * 100 if total else 0
 
-            if is_correct:
-                score += 1
-
-            results.append({
-                "question": question["question"],
-                "user_answer": user_answer,
-                "correct_answer": correct_answer,
-                "is_correct": is_correct
-            })
-
-        percentage = (score / len(questions)) * 100 if questions else 0
+        try:
+            await attempts.record(attempt_record(quiz, submitted, score, plan))
+        except AttemptQueueFull as e:
+            logger.warning("Rejected submission for '%s': %s", quiz["quiz_name"], e)
+            raise HTTPException(
+                status_code=503,
+                detail="Too many submissions are being saved, please retry",
+                headers={"Retry-After": "1"})
 
-        return {
-            "quiz_name": quiz_name,
+        return mongodb_response({
+            "quiz_name": quiz["quiz_name"],
             "score": score,
-            "total_questions": len(questions),
+            "total_questions": total,
             "percentage": round(percentage, 1),
             "results": results
-        }
+        })
+
+    def _variant_plan(self, quiz: Dict[str, Any], token: str) -> ShufflePlan:
+        """Rebuild the shuffle described by a signed variant token"""
+        try:
+            variant = variant_signer.verify(token)
+        except InvalidVariantToken as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if variant.quiz_id != quiz["id"]:
+            raise HTTPException(
+                status_code=400,
+                detail="Variant token was issued for a different quiz")
+
+        return variant.plan(len(quiz["answer_key"]))
+
+
+class QuizSubmitByIdHandler(QuizSubmitHandler):
+    """Handler for submitting quiz answers by quiz ID"""
+
+    async def handle(self, db: Database, keys: QuizCache, attempts: AttemptWriter,
+                     quiz_id: str, submission: QuizSubmission,
+                     executor: WorkExecutor) -> Response:
+        """Submit answers for a quiz by its ID and get results"""
+        if not ObjectId.is_valid(quiz_id):
+            raise HTTPException(
+                status_code=400, detail=f"Invalid quiz ID format: {quiz_id}")
+
+        quiz = await keys.load_by_id(quiz_id, db.get_answer_key_by_id)
+
+        if not quiz:
+            raise HTTPException(
+                status_code=404, detail=f"Quiz with ID {quiz_id} not found")
+
+        return await self._grade(quiz, submission, attempts, executor)
+
+
+class QuizBatchSubmitHandler(RouteHandler):
+    """Handler for grading a whole cohort's answer sheets at once"""
+
+    async def handle(self, db: Database, keys: QuizCache, quiz_name: str,
+                     submission: BatchSubmission, executor: WorkExecutor) -> Response:
+        """Grade many answer sheets for a quiz with vectorized comparisons"""
+        if len(submission.answers) > BATCH_GRADE_MAX_STUDENTS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {BATCH_GRADE_MAX_STUDENTS} answer sheets per request")
+
+        quiz = await keys.load_by_name(quiz_name, db.get_answer_key)
+
+        if not quiz:
+            raise HTTPException(
+                status_code=404, detail=f"Quiz '{quiz_name}' not found")
+
+        try:
+            result = await executor.run(
+                "batch_grade", len(submission.answers) * len(quiz["answer_key"]),
+                grade_sheets, quiz["answer_key"], submission.answers, submission.compact,
+                process=True)
+        except InvalidAnswerSheet as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        result["quiz_name"] = quiz["quiz_name"]
+        return mongodb_response(result)
+
+
+class QuizStatsHandler(RouteHandler):
+    """Handler for the attempt statistics of a quiz"""
+
+    async def handle(self, db: Database, keys: QuizCache, quiz_name: str) -> Response:
+        """Get attempt counts, average score and per-question correct rates"""
+        quiz = await keys.load_by_name(quiz_name, db.get_answer_key)
+
+        if not quiz:
+            raise HTTPException(
+                status_code=404, detail=f"Quiz '{quiz_name}' not found")
+
+        stats = await db.get_quiz_stats(quiz["id"])
+        return mongodb_response(stats_detail(quiz, stats))
+
+
+class QuizAnalysisHandler(RouteHandler):
+    """Handler for the item analysis of a quiz"""
+
+    async def handle(self, db: Database, keys: QuizCache, quiz_name: str,
+                     executor: WorkExecutor) -> Response:
+        """Get item difficulty, discrimination, distractors and KR-20"""
+        quiz = await keys.load_by_name(quiz_name, db.get_answer_key)
+
+        if not quiz:
+            raise HTTPException(
+                status_code=404, detail=f"Quiz '{quiz_name}' not found")
+
+        return mongodb_response(await analyze_quiz(db, quiz, executor=executor))
 
 
 class QuizDeleteHandler(RouteHandler):
     """Handler for deleting a quiz"""
     
-    async def handle(self, quiz_name: str) -> Dict[str, str]:
-        """Delete a quiz"""
-        # Check if quiz exists
-        quiz = await get_quiz(quiz_name)
-        if not quiz:
+    async def handle(self, db: Database, cache: QuizCache, keys: QuizCache,
+                     pools: VariantPoolManager, quiz_name: str,
+                     idempotency_key: Optional[str] = None) -> Response:
+        """Delete a quiz, at most once per Idempotency-Key"""
+        fingerprint = request_fingerprint("DELETE", f"/quizzes/{quiz_name}")
+        return await run_idempotent(
+            db, idempotency_key, fingerprint,
+            lambda: self._delete(db, cache, keys, pools, quiz_name))
+
+    async def _delete(self, db: Database, cache: QuizCache, keys: QuizCache,
+                      pools: VariantPoolManager, quiz_name: str) -> Response:
+        """Delete the quiz in one round trip"""
+        quiz_id = await db.delete_quiz(quiz_name)
+        if quiz_id is None:
             raise HTTPException(
                 status_code=404, detail=f"Quiz '{quiz_name}' not found")
 
-        # Delete the quiz
-        success = await delete_quiz_from_db(quiz_name)
-        if success:
-            return {"message": f"Quiz '{quiz_name}' deleted successfully"}
-        else:
-            raise HTTPException(
-                status_code=500, detail=f"Failed to delete quiz '{quiz_name}'")
+        cache.invalidate(quiz_id=quiz_id, quiz_name=quiz_name)
+        keys.invalidate(quiz_id=quiz_id, quiz_name=quiz_name)
+        pools.invalidate(quiz_id)
+        return mongodb_response({"message": f"Quiz '{quiz_name}' deleted successfully"})
 
 
 class MockQuizHandler(RouteHandler):
     """Handler for providing a mock quiz"""
     
-    async def handle(self) -> Dict[str, Any]:
+    async def handle(self) -> Response:
         """Return a mock quiz for testing"""
-        return {
+        return mongodb_response({
             "id": "mock-123",
             "quiz_name": "Mock Quiz",
             "questions": [
@@ -282,7 +696,7 @@ class MockQuizHandler(RouteHandler):
                     "correct_answer": "a"
                 }
             ]
-        }
+        })
 
 
 class QuizRouter:
@@ -298,10 +712,15 @@ class QuizRouter:
         self._handlers = {
             'list': QuizListHandler(),
             'create': QuizCreateHandler(),
+            'import': QuizImportHandler(),
+            'export': QuizExportHandler(),
             'by_name': QuizByNameHandler(),
             'by_id': QuizByIdHandler(),
-            'debug': QuizDebugHandler(),
             'submit': QuizSubmitHandler(),
+            'submit_by_id': QuizSubmitByIdHandler(),
+            'submit_batch': QuizBatchSubmitHandler(),
+            'stats': QuizStatsHandler(),
+            'analysis': QuizAnalysisHandler(),
             'delete': QuizDeleteHandler(),
             'mock': MockQuizHandler()
         }
@@ -311,48 +730,192 @@ class QuizRouter:
         """Set up all routes with their respective handlers"""
         # GET /quizzes/
         @self._router.get("/", response_model=List[QuizInfo])
-        async def list_quizzes():
-            return await self._handlers['list'].handle()
+        async def list_quizzes(
+            if_none_match: Optional[str] = Header(None),
+            accept_encoding: Optional[str] = Header(None),
+            limit: Optional[int] = Query(
+                None, ge=1, le=1000, description="Maximum number of quizzes to return"),
+            after: Optional[str] = Query(
+                None, description="Cursor from the X-Next-Cursor header of the previous page"),
+            db: Database = Depends(get_database),
+            payloads: PayloadCache = Depends(get_response_cache)
+        ):
+            return await self._handlers['list'].handle(
+                db, payloads, limit, after, if_none_match, accept_encoding)
 
         # POST /quizzes/
         @self._router.post("/", status_code=201)
-        async def create_quiz(quiz: QuizCreate):
-            return await self._handlers['create'].handle(quiz)
+        async def create_quiz(
+            quiz: QuizCreate,
+            idempotency_key: Optional[str] = Header(None),
+            db: Database = Depends(get_database),
+            cache: QuizCache = Depends(get_quiz_cache),
+            keys: QuizCache = Depends(get_answer_key_cache)
+        ):
+            return await self._handlers['create'].handle(db, cache, keys, quiz, idempotency_key)
+
+        # POST /quizzes/import
+        @self._router.post(
+            "/import",
+            response_model=QuizImportResult,
+            openapi_extra={"requestBody": {"content": {
+                "application/x-ndjson": {"schema": {"type": "string"}}}}})
+        async def import_quizzes_ndjson(
+            request: Request,
+            db: Database = Depends(get_database)
+        ):
+            """Import quizzes from NDJSON, one QuizCreate per line (optionally gzipped)"""
+            return await self._handlers['import'].handle(db, request)
+
+        # GET /quizzes/export
+        @self._router.get("/export")
+        async def export_quizzes_ndjson(
+            quiz_name: Optional[List[str]] = Query(
+                None, description="Only export these quizzes (repeatable)"),
+            name_prefix: Optional[str] = Query(
+                None, description="Only export quizzes whose name starts with this"),
+            updated_since: Optional[datetime] = Query(
+                None, description="Only export quizzes created or changed at or after this time"),
+            batch_size: int = Query(
+                EXPORT_BATCH_SIZE, ge=1, le=10000, description="Quizzes read per cursor batch"),
+            gzip: bool = Query(False, description="Return a gzip file instead of plain NDJSON"),
+            db: Database = Depends(get_database)
+        ):
+            """Export quizzes as NDJSON, one quiz per line"""
+            return await self._handlers['export'].handle(
+                db, quiz_name, name_prefix, updated_since, batch_size, gzip)
 
         # GET /quizzes/name/{quiz_name}
         @self._router.get("/name/{quiz_name}")
         async def get_quiz_by_name(
             quiz_name: str,
-            request: Request,
             shuffle: bool = Query(
-                True, description="Whether to shuffle questions and options")
+                True, description="Whether to shuffle questions and options"),
+            offset: int = Query(
+                0, ge=0, description="Index of the first question to return"),
+            limit: Optional[int] = Query(
+                None, ge=1, le=1000, description="Maximum number of questions to return"),
+            fields: Optional[str] = Query(
+                None, description="Comma-separated question fields to return, e.g. question,options"),
+            variant_token: Optional[str] = Query(
+                None, description="Token of the first page, to page through the same shuffle"),
+            sample: Optional[int] = Query(
+                None, ge=1, le=MAX_SAMPLE_SIZE,
+                description="Draw this many random questions from the quiz"),
+            if_none_match: Optional[str] = Header(None),
+            accept_encoding: Optional[str] = Header(None),
+            db: Database = Depends(get_database),
+            cache: QuizCache = Depends(get_quiz_cache),
+            keys: QuizCache = Depends(get_answer_key_cache),
+            pools: VariantPoolManager = Depends(get_variant_pools),
+            payloads: PayloadCache = Depends(get_response_cache),
+            executor: WorkExecutor = Depends(get_work_executor)
         ):
-            return await self._handlers['by_name'].handle(quiz_name, request, shuffle)
+            page = PageRequest(offset, limit, fields, variant_token, sample)
+            return await self._handlers['by_name'].handle(
+                db, cache, keys, pools, payloads, executor, quiz_name, shuffle, if_none_match,
+                accept_encoding, page)
 
         # GET /quizzes/id/{quiz_id}
         @self._router.get("/id/{quiz_id}")
         async def get_quiz_by_id(
             quiz_id: str,
-            request: Request,
             shuffle: bool = Query(
-                True, description="Whether to shuffle questions and options")
+                True, description="Whether to shuffle questions and options"),
+            offset: int = Query(
+                0, ge=0, description="Index of the first question to return"),
+            limit: Optional[int] = Query(
+                None, ge=1, le=1000, description="Maximum number of questions to return"),
+            fields: Optional[str] = Query(
+                None, description="Comma-separated question fields to return, e.g. question,options"),
+            variant_token: Optional[str] = Query(
+                None, description="Token of the first page, to page through the same shuffle"),
+            sample: Optional[int] = Query(
+                None, ge=1, le=MAX_SAMPLE_SIZE,
+                description="Draw this many random questions from the quiz"),
+            if_none_match: Optional[str] = Header(None),
+            accept_encoding: Optional[str] = Header(None),
+            db: Database = Depends(get_database),
+            cache: QuizCache = Depends(get_quiz_cache),
+            keys: QuizCache = Depends(get_answer_key_cache),
+            pools: VariantPoolManager = Depends(get_variant_pools),
+            payloads: PayloadCache = Depends(get_response_cache),
+            executor: WorkExecutor = Depends(get_work_executor)
         ):
-            return await self._handlers['by_id'].handle(quiz_id, request, shuffle)
-
-        # GET /quizzes/debug/{quiz_id}
-        @self._router.get("/debug/{quiz_id}")
-        async def debug_quiz_id(quiz_id: str, request: Request):
-            return await self._handlers['debug'].handle(quiz_id, request)
+            page = PageRequest(offset, limit, fields, variant_token, sample)
+            return await self._handlers['by_id'].handle(
+                db, cache, keys, pools, payloads, executor, quiz_id, shuffle, if_none_match,
+                accept_encoding, page)
 
         # POST /quizzes/{quiz_name}/submit
         @self._router.post("/{quiz_name}/submit", response_model=QuizResult)
-        async def submit_quiz(quiz_name: str, submission: QuizSubmission):
-            return await self._handlers['submit'].handle(quiz_name, submission)
+        async def submit_quiz(
+            quiz_name: str,
+            submission: QuizSubmission,
+            db: Database = Depends(get_database),
+            keys: QuizCache = Depends(get_answer_key_cache),
+            attempts: AttemptWriter = Depends(get_attempt_writer),
+            executor: WorkExecutor = Depends(get_work_executor)
+        ):
+            return await self._handlers['submit'].handle(
+                db, keys, attempts, quiz_name, submission, executor)
+
+        # POST /quizzes/{quiz_name}/submit/batch
+        @self._router.post("/{quiz_name}/submit/batch", response_model=BatchResult)
+        async def submit_quiz_batch(
+            quiz_name: str,
+            submission: BatchSubmission,
+            db: Database = Depends(get_database),
+            keys: QuizCache = Depends(get_answer_key_cache),
+            executor: WorkExecutor = Depends(get_work_executor)
+        ):
+            return await self._handlers['submit_batch'].handle(
+                db, keys, quiz_name, submission, executor)
+
+        # GET /quizzes/{quiz_name}/stats
+        @self._router.get("/{quiz_name}/stats", response_model=QuizStats)
+        async def get_quiz_stats(
+            quiz_name: str,
+            db: Database = Depends(get_database),
+            keys: QuizCache = Depends(get_answer_key_cache)
+        ):
+            return await self._handlers['stats'].handle(db, keys, quiz_name)
+
+        # GET /quizzes/{quiz_name}/analysis
+        @self._router.get("/{quiz_name}/analysis", response_model=QuizAnalysis)
+        async def get_quiz_analysis(
+            quiz_name: str,
+            db: Database = Depends(get_database),
+            keys: QuizCache = Depends(get_answer_key_cache),
+            executor: WorkExecutor = Depends(get_work_executor)
+        ):
+            return await self._handlers['analysis'].handle(db, keys, quiz_name, executor)
+
+        # POST /quizzes/id/{quiz_id}/submit
+        @self._router.post("/id/{quiz_id}/submit", response_model=QuizResult)
+        async def submit_quiz_by_id(
+            quiz_id: str,
+            submission: QuizSubmission,
+            db: Database = Depends(get_database),
+            keys: QuizCache = Depends(get_answer_key_cache),
+            attempts: AttemptWriter = Depends(get_attempt_writer),
+            executor: WorkExecutor = Depends(get_work_executor)
+        ):
+            return await self._handlers['submit_by_id'].handle(
+                db, keys, attempts, quiz_id, submission, executor)
 
         # DELETE /quizzes/{quiz_name}
         @self._router.delete("/{quiz_name}")
-        async def delete_quiz(quiz_name: str):
-            return await self._handlers['delete'].handle(quiz_name)
+        async def delete_quiz(
+            quiz_name: str,
+            idempotency_key: Optional[str] = Header(None),
+            db: Database = Depends(get_database),
+            cache: QuizCache = Depends(get_quiz_cache),
+            keys: QuizCache = Depends(get_answer_key_cache),
+            pools: VariantPoolManager = Depends(get_variant_pools)
+        ):
+            return await self._handlers['delete'].handle(
+                db, cache, keys, pools, quiz_name, idempotency_key)
 
         # GET /quizzes/mock-quiz
         @self._router.get("/mock-quiz")
@@ -1,125 +1,180 @@
 import random
-from copy import deepcopy
 import logging
-from typing import Dict, Any, List, Type
+from array import array
+from itertools import permutations
+from operator import itemgetter
+from typing import Dict, Any, List, Optional, Sequence
 from abc import ABC, abstractmethod
 from bson import ObjectId
 
 logger = logging.getLogger(__name__)
 
+# Answer options of a question, in display order
+OPTION_KEYS = ("option_a", "option_b", "option_c", "option_d")
+ANSWER_LETTERS = "abcd"
+ANSWER_INDEXES = {letter: index for index, letter in enumerate(ANSWER_LETTERS)}
+_get_options = itemgetter(*OPTION_KEYS)
+
+# Every ordering of the four options; a question's option order is stored
+# as a single index into this table. OPTION_POSITIONS is the inverse: the
+# displayed position of each original option.
+OPTION_PERMUTATIONS = tuple(permutations(range(len(OPTION_KEYS))))
+OPTION_POSITIONS = tuple(
+    tuple(order.index(option) for option in range(len(OPTION_KEYS)))
+    for order in OPTION_PERMUTATIONS
+)
+IDENTITY_OPTION_ORDER = OPTION_PERMUTATIONS.index(tuple(range(len(OPTION_KEYS))))
+
+_random = random.Random()
+
 
 class ShuffleStrategy(ABC):
-    """Abstract strategy for shuffling data"""
+    """Abstract strategy for producing a shuffle permutation"""
 
     @abstractmethod
-    def shuffle(self, data: List[Dict]) -> None:
-        """Shuffle the data in place"""
+    def permutation(self, size: int, rng: random.Random) -> Sequence[int]:
+        """Produce a compact permutation for ``size`` items"""
         pass
 
 
 class QuestionShuffleStrategy(ShuffleStrategy):
     """Strategy for shuffling questions"""
 
-    def shuffle(self, questions: List[Dict]) -> None:
-        """Shuffle the list of questions"""
-        if not questions or len(questions) < 2:
-            logger.info("Not enough questions to shuffle")
-            return
-
-        # Log the first few questions before shuffling
-        question_key = self._detect_question_key(questions[0])
-        if question_key:
-            logger.info(
-                f"Original question order: {[q.get(question_key, '')[:20] for q in questions[:3]]}...")
-
-        # Store original order to verify shuffle
-        original_order = questions.copy()
-
-        # Force shuffle multiple times to ensure randomness
-        max_attempts = 5
-        for attempt in range(max_attempts):
-            random.shuffle(questions)
-
-            # Check if order actually changed for lists with multiple elements
-            if len(questions) > 1:
-                # If any question moved position, consider it shuffled
-                if any(questions[i] is not original_order[i]
-                       for i in range(len(questions))):
-                    break
-
-            # If on last attempt and no shuffle happened, log warning
-            if attempt == max_attempts - 1:
-                logger.warning("Questions may not have been properly shuffled")
-
-        # Log the shuffled questions
-        if question_key:
-            logger.info(
-                f"New question order: {[q.get(question_key, '')[:20] for q in questions[:3]]}...")
-
-    def _detect_question_key(self, question: Dict) -> str:
-        """Detect which key contains the question text"""
-        possible_keys = ['question', 'question_text', 'text', 'content']
-        for key in possible_keys:
-            if key in question and isinstance(question[key], str):
-                return key
-        return next(iter(question.keys())) if question else ""
+    max_attempts = 5
+
+    def permutation(self, size: int, rng: random.Random) -> array:
+        """Produce a question order: displayed position -> source index"""
+        order = array('I', range(size))
+        if size < 2:
+            return order
+
+        for _ in range(self.max_attempts):
+            rng.shuffle(order)
+            # Short-circuits on the first moved question, so this is O(1)
+            # for all but tiny quizzes
+            if any(source != position for position, source in enumerate(order)):
+                break
+        else:
+            logger.warning("Questions may not have been properly shuffled")
+        return order
+
+
+class QuestionSampleStrategy(ShuffleStrategy):
+    """Strategy for drawing a random subset of the questions"""
+
+    def __init__(self, sample_size: int, shuffle: bool = True):
+        """Initialize with the number of questions to draw"""
+        self._sample_size = sample_size
+        self._shuffle = shuffle
+
+    def permutation(self, size: int, rng: random.Random) -> array:
+        """Produce the drawn source indexes, in display order"""
+        order = array('I', floyd_sample(size, min(self._sample_size, size), rng))
+        if self._shuffle:
+            rng.shuffle(order)
+        return order
+
+
+def floyd_sample(population: int, k: int, rng: random.Random) -> List[int]:
+    """Draw ``k`` distinct indexes below ``population`` in ascending order
+
+    Floyd's algorithm makes exactly ``k`` random draws, however large the
+    population is.
+    """
+    selected = set()
+    for upper in range(population - k, population):
+        index = rng.randrange(upper + 1)
+        selected.add(upper if index in selected else index)
+    return sorted(selected)
 
 
 class OptionsShuffleStrategy(ShuffleStrategy):
     """Strategy for shuffling answer options"""
 
-    def shuffle(self, questions: List[Dict]) -> None:
-        """Shuffle options within each question"""
-        for i, question in enumerate(questions):
-            try:
-                # Skip questions without required fields
-                required_fields = ['option_a', 'option_b',
-                                   'option_c', 'option_d', 'correct_answer']
-                if not all(field in question for field in required_fields):
-                    logger.warning(f"Question {i} missing required fields")
-                    continue
-
-                # Log original options
-                logger.debug(
-                    f"Q{i} original: A={question['option_a'][:10]}, correct={question['correct_answer']}")
-
-                # Get correct answer letter and text
-                correct_letter = question['correct_answer'].lower()
-                if correct_letter not in ['a', 'b', 'c', 'd']:
-                    logger.warning(f"Invalid correct_answer: {correct_letter}")
-                    continue
-
-                correct_option_key = f'option_{correct_letter}'
-                correct_option_text = question.get(correct_option_key)
-
-                # Create options for shuffling
-                options = [
-                    {'letter': 'a', 'text': question['option_a']},
-                    {'letter': 'b', 'text': question['option_b']},
-                    {'letter': 'c', 'text': question['option_c']},
-                    {'letter': 'd', 'text': question['option_d']}
-                ]
-
-                # Force shuffle multiple times
-                for _ in range(3):
-                    random.shuffle(options)
-
-                # Update question with shuffled options
-                question['option_a'] = options[0]['text']
-                question['option_b'] = options[1]['text']
-                question['option_c'] = options[2]['text']
-                question['option_d'] = options[3]['text']
-
-                # Update correct answer letter
-                for j, option in enumerate(options):
-                    if option['text'] == correct_option_text:
-                        new_letter = chr(97 + j)  # 'a' + offset
-                        question['correct_answer'] = new_letter
-                        logger.debug(
-                            f"Q{i} shuffled: correct now {new_letter}")
-                        break
-            except Exception as e:
-                logger.error(f"Error shuffling options for question {i}: {e}")
+    def permutation(self, size: int, rng: random.Random) -> bytes:
+        """Produce one OPTION_PERMUTATIONS index per displayed question"""
+        return bytes(rng.choices(range(len(OPTION_PERMUTATIONS)), k=size))
+
+
+class ShufflePlan:
+    """A quiz shuffle expressed as compact integer permutations
+
+    ``question_order[i]`` is the source index of the question displayed at
+    position ``i`` and ``option_orders[i]`` indexes OPTION_PERMUTATIONS for
+    that displayed question. Either may be None when that part of the quiz
+    is not shuffled. A sampled plan's ``question_order`` covers only the
+    drawn questions.
+    """
+
+    __slots__ = ("question_order", "option_orders")
+
+    def __init__(
+            self,
+            question_order: Optional[Sequence[int]] = None,
+            option_orders: Optional[bytes] = None):
+        self.question_order = question_order
+        self.option_orders = option_orders
+
+    def apply(self, quiz_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the shuffled response without copying the source document
+
+        Only the top-level dict and each question dict are rebuilt; their
+        values are shared with ``quiz_data``, which is left untouched.
+        """
+        result = {key: value for key, value in quiz_data.items()
+                  if key not in ("_id", "questions")}
+        _handle_object_id(quiz_data, result)
+
+        questions = quiz_data.get("questions")
+        if not questions:
+            if "questions" in quiz_data:
+                result["questions"] = questions
+            return result
+
+        order = self.question_order
+        if order is None:
+            order = range(len(questions))
+        option_orders = self.option_orders
+
+        result["questions"] = [
+            shuffle_question(
+                questions[source],
+                option_orders[position] if option_orders is not None
+                else IDENTITY_OPTION_ORDER)
+            for position, source in enumerate(order)
+        ]
+        return result
+
+
+def shuffle_question(question: Dict[str, Any], option_order: int) -> Dict[str, Any]:
+    """Build a question with its options in the given order"""
+    shuffled = dict(question)
+    if option_order == IDENTITY_OPTION_ORDER:
+        return shuffled
+
+    # Questions without the four options or a valid answer keep their order
+    try:
+        correct = ANSWER_INDEXES[question["correct_answer"].lower()]
+        options = _get_options(question)
+    except (KeyError, AttributeError):
+        return shuffled
+
+    a, b, c, d = OPTION_PERMUTATIONS[option_order]
+    shuffled["option_a"] = options[a]
+    shuffled["option_b"] = options[b]
+    shuffled["option_c"] = options[c]
+    shuffled["option_d"] = options[d]
+    shuffled["correct_answer"] = ANSWER_LETTERS[OPTION_POSITIONS[option_order][correct]]
+    return shuffled
+
+
+def _handle_object_id(quiz_data: Dict[str, Any], result: Dict[str, Any]) -> None:
+    """Convert MongoDB ObjectId to string ID"""
+    object_id = quiz_data.get("_id")
+    if isinstance(object_id, ObjectId):
+        result["id"] = str(object_id)
+    elif "_id" in quiz_data:
+        result["_id"] = object_id
 
 
 class QuizShuffler:
@@ -137,65 +192,62 @@ class QuizShuffler:
             'options': OptionsShuffleStrategy()
         }
 
-    def shuffle(self, quiz_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Shuffles quiz questions and options"""
-        # Fix the broken f-string
-        logger.info(
-            f"Shuffling quiz: questions={self._shuffle_questions}, options={self._shuffle_options}")
-
-        # Make a deep copy to avoid modifying the original
-        result = deepcopy(quiz_data)
+    def plan(self, question_count: int,
+             rng: Optional[random.Random] = None,
+             sample: Optional[int] = None) -> ShufflePlan:
+        """Produce the permutations for a quiz with ``question_count`` questions
 
-        # Convert ObjectId to string if present
-        self._handle_object_id(result)
-
-        # Check if quiz has questions
-        if 'questions' not in result or not result['questions']:
-            logger.warning("Quiz has no questions to shuffle")
-            return result
-
-        questions = result['questions']
+        With ``sample``, only that many randomly drawn questions are shown
+        (in random order when questions are shuffled, otherwise in source
+        order).
+        """
+        rng = rng or _random
+        question_order = None
+        option_orders = None
+        shown = question_count
 
         # Apply requested shuffling strategies
-        if self._shuffle_questions:
-            self._strategies['questions'].shuffle(questions)
-
+        if sample is not None and sample < question_count:
+            question_order = QuestionSampleStrategy(
+                sample, self._shuffle_questions).permutation(question_count, rng)
+            shown = len(question_order)
+        elif self._shuffle_questions:
+            question_order = self._strategies['questions'].permutation(
+                question_count, rng)
         if self._shuffle_options:
-            self._strategies['options'].shuffle(questions)
+            option_orders = self._strategies['options'].permutation(shown, rng)
 
-        return result
+        return ShufflePlan(question_order, option_orders)
+
+    def shuffle(self, quiz_data: Dict[str, Any],
+                rng: Optional[random.Random] = None) -> Dict[str, Any]:
+        """Shuffles quiz questions and options"""
+        logger.debug("Shuffling quiz: questions=%s, options=%s",
+                     self._shuffle_questions, self._shuffle_options)
+
+        questions: List[Dict] = quiz_data.get('questions') or []
+        if not questions:
+            logger.warning("Quiz has no questions to shuffle")
 
-    def _handle_object_id(self, quiz_data: Dict[str, Any]) -> None:
-        """Convert MongoDB ObjectId to string ID"""
-        if "_id" in quiz_data and isinstance(quiz_data["_id"], ObjectId):
-            quiz_data["id"] = str(quiz_data["_id"])
-            del quiz_data["_id"]
+        return self.plan(len(questions), rng).apply(quiz_data)
 
 
 # For backward compatibility with better debugging
 def shuffle_quiz(
     quiz_data: Dict[str, Any],
     shuffle_questions: bool = True,
-    shuffle_options: bool = True
+    shuffle_options: bool = True,
+    seed: Optional[int] = None
 ) -> Dict[str, Any]:
-    """Legacy function that maintains the original interface"""
-    logger.debug(
-        f"shuffle_quiz called with: shuffle_questions={shuffle_questions}, shuffle_options={shuffle_options}")
+    """Legacy function that maintains the original interface
 
-    # Check quiz structure
-    if 'questions' in quiz_data:
-        question_count = len(quiz_data['questions'])
-        logger.debug(f"Quiz has {question_count} questions before shuffling")
-    else:
-        logger.warning("Quiz has no questions field")
+    Passing a ``seed`` makes the shuffle reproducible: the same quiz,
+    flags and seed always produce the same variant.
+    """
+    logger.debug("shuffle_quiz called with: shuffle_questions=%s, shuffle_options=%s",
+                 shuffle_questions, shuffle_options)
 
     # Create shuffler and apply
     shuffler = QuizShuffler(shuffle_questions, shuffle_options)
-    result = shuffler.shuffle(quiz_data)
-
-    # Verify shuffling
-    if 'questions' in result:
-        logger.debug(
-            f"Quiz has {len(result['questions'])} questions after shuffling")
-
-    return result
+    rng = random.Random(seed) if seed is not None else None
+    return shuffler.shuffle(quiz_data, rng)
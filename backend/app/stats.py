@@ -0,0 +1,192 @@
+"""Per-quiz attempt statistics kept as pre-aggregated rollups.
+
+Every flush of the attempt writer adds its batch to one rollup document per
+quiz with ``$inc``, so reading the statistics of a quiz is a single
+document lookup. The rollups can be recomputed from the raw attempts:
+
+    python -m backend.app.stats rebuild
+    python -m backend.app.stats rebuild --quiz "Python Basics"
+"""
+import sys
+import time
+import asyncio
+import argparse
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+from .database import Database, MONGODB_URL, DB_NAME, pool_options_from_env
+from .logging_config import configure_logging
+
+# Stored for a question the student was not shown (sampled variants)
+NOT_PRESENTED = "."
+
+# Times a rebuild re-reads quizzes whose rollups changed while it ran, and
+# how long it waits before doing so
+REBUILD_ROUNDS = 5
+REBUILD_RETRY_SECONDS = 1.0
+# Attempts pending an increment for longer are counted as settled
+REBUILD_PENDING_GRACE_SECONDS = 300
+
+logger = logging.getLogger(__name__)
+
+
+def new_rollup(attempt: Dict[str, Any]) -> Dict[str, Any]:
+    """Start an empty rollup for the quiz of an attempt"""
+    # Sampled attempts answer fewer questions than the quiz has
+    question_count = len(attempt.get("correct") or "") or attempt["total_questions"]
+    return {
+        "quiz_name": attempt["quiz_name"],
+        "question_count": question_count,
+        "attempts": 0,
+        "score_total": 0,
+        "question_total": 0,
+        "correct": [0] * question_count,
+        "shown": [0] * question_count,
+    }
+
+
+def add_attempt(rollup: Dict[str, Any], attempt: Dict[str, Any]) -> None:
+    """Add one attempt to a rollup"""
+    rollup["attempts"] += 1
+    rollup["score_total"] += attempt["score"]
+    rollup["question_total"] += attempt["total_questions"]
+    correct = rollup["correct"]
+    shown = rollup["shown"]
+    for index, flag in enumerate(attempt.get("correct", "")[:len(correct)]):
+        if flag == "1":
+            correct[index] += 1
+        if flag != NOT_PRESENTED:
+            shown[index] += 1
+
+
+def rollup_attempts(attempts: Iterable[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+    """Sum attempts into one rollup per quiz id"""
+    rollups: Dict[Any, Dict[str, Any]] = {}
+    for attempt in attempts:
+        _add_to_rollups(rollups, attempt)
+    return rollups
+
+
+def _add_to_rollups(rollups: Dict[Any, Dict[str, Any]], attempt: Dict[str, Any]) -> None:
+    rollup = rollups.get(attempt["quiz_id"])
+    if rollup is None:
+        rollup = rollups[attempt["quiz_id"]] = new_rollup(attempt)
+    add_attempt(rollup, attempt)
+
+
+def question_counts(stats: Dict[str, Any], field: str) -> List[int]:
+    """Read per-question counts ("correct" or "shown") of a stored rollup"""
+    counts = stats.get(field) or {}
+    return [counts.get(str(index), 0) for index in range(stats.get("question_count", 0))]
+
+
+def stats_summary(stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summarize a stored rollup for the quiz list"""
+    attempts = stats.get("attempts", 0) if stats else 0
+    return {
+        "attempts": attempts,
+        "average_score": round(stats["score_total"] / attempts, 2) if attempts else None,
+    }
+
+
+def stats_detail(quiz: Dict[str, Any], stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the statistics response of a quiz"""
+    stats = stats or {}
+    attempts = stats.get("attempts", 0)
+    question_count = stats.get("question_count") or len(quiz["answer_key"])
+    stats = dict(stats, question_count=question_count)
+    counts = question_counts(stats, "correct")
+    # Rollups written before sampling existed have no "shown" counts
+    shown = question_counts(stats, "shown") if "shown" in stats else [attempts] * question_count
+    question_total = stats.get("question_total") or attempts * question_count
+    average_score = stats["score_total"] / attempts if attempts else None
+    return {
+        "quiz_name": quiz["quiz_name"],
+        "id": quiz["id"],
+        "attempts": attempts,
+        "total_questions": question_count,
+        "average_score": round(average_score, 2) if attempts else None,
+        "average_percentage": (
+            round(stats["score_total"] / question_total * 100, 1)
+            if attempts and question_total else None),
+        "questions": [
+            {
+                "question_number": index + 1,
+                "shown": times_shown,
+                "correct": count,
+                "correct_rate": round(count / times_shown, 4) if times_shown else None,
+            }
+            for index, (count, times_shown) in enumerate(zip(counts, shown))
+        ],
+    }
+
+
+async def rebuild_stats(db: Database, quiz_name: Optional[str] = None) -> int:
+    """Recompute the rollups from the raw attempts
+
+    Attempt flushes may keep running: a rollup is only replaced if no flush
+    changed it while its attempts were read and none of its attempts is
+    still pending an increment; other quizzes are read again after a short
+    wait. Rollups of deleted quizzes are removed. Returns the number of
+    rollups written.
+    """
+    quiz_ids = None
+    written = 0
+    conflicts: List[Any] = []
+    for round_number in range(REBUILD_ROUNDS):
+        if round_number:
+            await asyncio.sleep(REBUILD_RETRY_SECONDS)
+        expected_writes = await db.get_quiz_stats_writes(quiz_name, quiz_ids)
+        # Attempts pending for longer were left by a writer that stopped
+        # before settling them; no increment of theirs can land any more
+        settled_before = time.time() - REBUILD_PENDING_GRACE_SECONDS
+        rollups: Dict[Any, Dict[str, Any]] = {}
+        busy = set()
+        async for attempt in db.iter_attempts(quiz_name, quiz_ids):
+            pending = attempt.get("pending")
+            if pending is not None and pending > settled_before:
+                busy.add(attempt["quiz_id"])
+            else:
+                _add_to_rollups(rollups, attempt)
+
+        # Rollups of deleted quizzes are dropped (they are in expected_writes only)
+        existing = await db.get_existing_quiz_ids(set(rollups) | set(expected_writes))
+        rollups = {quiz_id: rollup for quiz_id, rollup in rollups.items()
+                   if quiz_id not in busy and quiz_id in existing}
+        expected_writes = {quiz_id: writes for quiz_id, writes in expected_writes.items()
+                           if quiz_id not in busy}
+        conflicts = await db.replace_quiz_stats(rollups, expected_writes) + list(busy)
+        written += len(set(rollups) - set(conflicts))
+        if not conflicts:
+            break
+        quiz_ids = conflicts
+    else:
+        logger.warning("Statistics of %d quizzes kept changing during the rebuild; "
+                       "run it again", len(conflicts))
+    logger.info("Rebuilt statistics of %d quizzes", written)
+    return written
+
+
+async def _run_rebuild(quiz_name: Optional[str]) -> int:
+    db = Database(MONGODB_URL, DB_NAME, **pool_options_from_env())
+    try:
+        return await rebuild_stats(db, quiz_name)
+    finally:
+        db.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain quiz statistics rollups")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild", help="Recompute rollups from raw attempts")
+    rebuild.add_argument("--quiz", help="Only rebuild the statistics of this quiz")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    if args.command == "rebuild":
+        count = asyncio.run(_run_rebuild(args.quiz))
+        print(f"Rebuilt statistics of {count} quizzes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
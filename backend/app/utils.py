@@ -1,11 +1,17 @@
 import os
 import json
+from datetime import date, datetime
 from typing import List, Dict, Optional, Any
 from abc import ABC, abstractmethod
 from .models import Question
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from bson import ObjectId
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 # Global constants
 QUIZ_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'quizzes')
 os.makedirs(QUIZ_DIR, exist_ok=True)
@@ -20,22 +26,44 @@ class Serializer(ABC):
         pass
 
 
+def _bson_default(o: Any) -> Any:
+    """Convert the BSON types found in quiz documents to JSON values."""
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
 class MongoDBJSONSerializer(Serializer):
-    """Serializer for MongoDB documents to JSON."""
+    """Serializer for MongoDB documents to JSON.
 
-    def serialize(self, data: Any) -> JSONResponse:
-        """Convert MongoDB documents to JSON-serializable response."""
-        return JSONResponse(
-            content=json.loads(json.dumps(data, cls=self.JSONEncoder))
-        )
+    Documents are encoded straight to response bytes in a single pass,
+    using orjson when it is installed and the standard library otherwise.
+    """
 
-    class JSONEncoder(json.JSONEncoder):
-        """JSON encoder that handles MongoDB ObjectId serialization."""
+    media_type = "application/json"
+
+    _encoder = json.JSONEncoder(
+        default=_bson_default, ensure_ascii=False, separators=(",", ":"))
+
+    def serialize(self, data: Any, status_code: int = 200) -> Response:
+        """Convert MongoDB documents to a JSON response."""
+        return self.response(self.dumps(data), status_code)
+
+    def response(self, body: bytes, status_code: int = 200) -> Response:
+        """Wrap already serialized JSON bytes in a response."""
+        return Response(
+            content=body,
+            status_code=status_code,
+            media_type=self.media_type
+        )
 
-        def default(self, o):
-            if isinstance(o, ObjectId):
-                return str(o)
-            return super().default(o)
+    def dumps(self, data: Any) -> bytes:
+        """Convert MongoDB documents to JSON response bytes."""
+        if orjson is not None:
+            return orjson.dumps(data, default=_bson_default)
+        return self._encoder.encode(data).encode("utf-8")
 
 
 class QuizFileManager:
@@ -104,15 +132,49 @@ class QuizFileManager:
         return parsed_questions
 
 
+def quiz_etag(quiz_id: str, version: str) -> str:
+    """Build the ETag of an unshuffled quiz from its ID and content version.
+
+    The ID is part of the body, so a quiz recreated with the same content
+    must not match the ETag of the deleted one.
+    """
+    return f'W/"q-{quiz_id}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified_response(etag: str) -> Response:
+    """Build a 304 response for a matching conditional GET.
+
+    A 304 must carry the ETag and Vary a 200 would have sent (RFC 9110);
+    every ETagged response here is negotiated on Accept-Encoding.
+    """
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+
+
 # Create instances for use throughout the application
 mongodb_json_serializer = MongoDBJSONSerializer()
 quiz_file_manager = QuizFileManager()
 
 
 # For backward compatibility with code expecting the mongodb_response function
-def mongodb_response(data: Any) -> JSONResponse:
+def mongodb_response(data: Any, status_code: int = 200) -> Response:
     """Backward compatibility function for MongoDB document serialization."""
-    return mongodb_json_serializer.serialize(data)
+    return mongodb_json_serializer.serialize(data, status_code)
 
 
 # For backward compatibility with code expecting the save_quiz function
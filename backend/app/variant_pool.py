@@ -0,0 +1,248 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+from .compression import CompressedPayload
+from .executors import WorkExecutor
+from .variants import VariantToken, new_seed, render_variants, variant_signer
+
+logger = logging.getLogger(__name__)
+
+# Variant pool settings
+SHUFFLE_POOL_SIZE = int(os.getenv("SHUFFLE_POOL_SIZE", "0"))
+SHUFFLE_POOL_MAX_USES = int(os.getenv("SHUFFLE_POOL_MAX_USES", "50"))
+SHUFFLE_POOL_REFRESH_SECONDS = float(os.getenv("SHUFFLE_POOL_REFRESH_SECONDS", "60"))
+SHUFFLE_POOL_MAX_QUIZZES = int(os.getenv("SHUFFLE_POOL_MAX_QUIZZES", "64"))
+SHUFFLE_POOL_SELECTION = os.getenv("SHUFFLE_POOL_SELECTION", "round_robin")
+
+
+class PooledVariant:
+    """One pre-shuffled variant with its serialized response payload"""
+
+    __slots__ = ("payload", "uses")
+
+    def __init__(self, payload: CompressedPayload):
+        self.payload = payload
+        self.uses = 0
+
+
+class QuizVariantPool:
+    """Pre-generated shuffled variants of a single quiz"""
+
+    def __init__(self, quiz: Dict[str, Any], bodies: List[bytes],
+                 random_selection: bool = False):
+        """Hold the serialized ``bodies`` of variants of ``quiz``"""
+        self.quiz = quiz
+        self._random_selection = random_selection
+        self._next = 0
+        self.used = False
+        self._variants: List[PooledVariant] = [
+            PooledVariant(CompressedPayload(body)) for body in bodies]
+
+    def __len__(self) -> int:
+        return len(self._variants)
+
+    def next(self) -> PooledVariant:
+        """Pick the variant to serve for the next request"""
+        if self._random_selection:
+            index = random.randrange(len(self._variants))
+        else:
+            index = self._next
+            self._next = (index + 1) % len(self._variants)
+        variant = self._variants[index]
+        variant.uses += 1
+        self.used = True
+        return variant
+
+    def replace(self, variant: PooledVariant, body: bytes) -> bool:
+        """Swap a variant for a freshly shuffled one"""
+        for index, current in enumerate(self._variants):
+            if current is variant:
+                self._variants[index] = PooledVariant(CompressedPayload(body))
+                return True
+        return False
+
+    def regenerate(self, bodies: List[bytes]) -> None:
+        """Replace every variant"""
+        self._variants = [PooledVariant(CompressedPayload(body)) for body in bodies]
+
+
+class VariantPoolManager:
+    """Serves shuffled quizzes from per-quiz pools of pre-generated variants
+
+    During an exam start the same quiz is requested hundreds of times per
+    second. Instead of shuffling and serializing per request, each quiz gets
+    a pool of ``size`` ready-to-send variants served round-robin (or at
+    random). A variant is regenerated once it has been served ``max_uses``
+    times, and a background task regenerates every pool that was used
+    during the last ``refresh_seconds`` and drops idle ones.
+
+    Pools are filled, replaced and refreshed by background tasks that
+    shuffle and serialize on the work executor, so large quizzes leave the
+    event loop like direct shuffles do. Until the pool of a quiz is ready,
+    ``get`` returns None and the caller shuffles that request itself.
+
+    Disabled when ``size`` is 0.
+    """
+
+    def __init__(
+            self,
+            size: int = SHUFFLE_POOL_SIZE,
+            max_uses: int = SHUFFLE_POOL_MAX_USES,
+            refresh_seconds: float = SHUFFLE_POOL_REFRESH_SECONDS,
+            max_quizzes: int = SHUFFLE_POOL_MAX_QUIZZES,
+            selection: str = SHUFFLE_POOL_SELECTION):
+        """Initialize with no pools"""
+        self._size = size
+        self._max_uses = max_uses
+        self._refresh_seconds = refresh_seconds
+        self._max_quizzes = max_quizzes
+        self._random_selection = selection == "random"
+        self._pools: "OrderedDict[str, QuizVariantPool]" = OrderedDict()
+        # Quizzes whose pool is being filled, with a marker of the fill
+        self._filling: Dict[str, object] = {}
+        self._jobs: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[WorkExecutor] = None
+        self._served = 0
+        self._generated_pools = 0
+        self._replaced_variants = 0
+        self._failed_fills = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether shuffled quizzes are served from pools"""
+        return self._size > 0
+
+    def get(self, quiz: Dict[str, Any]) -> Optional[CompressedPayload]:
+        """Get the payload of a pooled shuffled variant of ``quiz``
+
+        Returns None, and starts filling the pool, while the quiz has none.
+        """
+        quiz_id = quiz["id"]
+        pool = self._pools.get(quiz_id)
+        if pool is None:
+            if quiz_id not in self._filling:
+                marker = self._filling[quiz_id] = object()
+                self._spawn(self._fill(quiz, marker))
+            return None
+        self._pools.move_to_end(quiz_id)
+
+        variant = pool.next()
+        self._served += 1
+        if variant.uses == self._max_uses:
+            self._spawn(self._replace(quiz_id, pool, variant))
+        return variant.payload
+
+    def invalidate(self, quiz_id: str) -> None:
+        """Drop the pool of a quiz that was created, changed or deleted"""
+        self._pools.pop(quiz_id, None)
+        # A fill still running for the old content is discarded when it ends
+        self._filling.pop(quiz_id, None)
+
+    def start(self, executor: Optional[WorkExecutor] = None) -> None:
+        """Start the background refresh task, rendering variants on ``executor``"""
+        self._executor = executor
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Stop the background tasks and drop all pools"""
+        tasks = list(self._jobs)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pools.clear()
+        self._filling.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the pool counters"""
+        return {
+            "enabled": self.enabled,
+            "pools": len(self._pools),
+            "filling": len(self._filling),
+            "pool_size": self._size,
+            "served": self._served,
+            "generated_pools": self._generated_pools,
+            "replaced_variants": self._replaced_variants,
+            "failed_fills": self._failed_fills,
+        }
+
+    def _spawn(self, coroutine) -> None:
+        """Run pool work as a background task that stop() can cancel"""
+        task = asyncio.create_task(coroutine)
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+
+    async def _render(self, quiz: Dict[str, Any], count: int) -> List[bytes]:
+        """Shuffle and serialize ``count`` new variants of ``quiz``
+
+        The work size is the number of questions rendered, so the executor
+        keeps small pools inline and moves large ones to a thread or
+        process. Without an executor the work always runs on a thread.
+        Tokens are signed here, so the workers never need the signing key.
+        """
+        seeds = [new_seed() for _ in range(count)]
+        variants = [(seed, variant_signer.sign(VariantToken(quiz["id"], seed)))
+                    for seed in seeds]
+        if self._executor is None:
+            return await asyncio.to_thread(render_variants, quiz, variants)
+        size = len(quiz.get("questions") or ()) * count
+        return await self._executor.run(
+            "pool_fill", size, render_variants, quiz, variants, process=True)
+
+    async def _fill(self, quiz: Dict[str, Any], marker: object) -> None:
+        """Build the pool of a quiz, unless it was invalidated meanwhile"""
+        quiz_id = quiz["id"]
+        try:
+            bodies = await self._render(quiz, self._size)
+        except Exception as e:
+            self._failed_fills += 1
+            logger.error("Failed to fill the variant pool of quiz %s: %s", quiz_id, e)
+            if self._filling.get(quiz_id) is marker:
+                del self._filling[quiz_id]
+            return
+        if self._filling.get(quiz_id) is not marker:
+            return
+        del self._filling[quiz_id]
+        self._pools[quiz_id] = QuizVariantPool(quiz, bodies, self._random_selection)
+        self._generated_pools += 1
+        while len(self._pools) > self._max_quizzes:
+            self._pools.popitem(last=False)
+
+    async def _replace(self, quiz_id: str, pool: QuizVariantPool,
+                       variant: PooledVariant) -> None:
+        """Regenerate a worn-out variant, which is served until then"""
+        try:
+            body, = await self._render(pool.quiz, 1)
+        except Exception as e:
+            logger.error("Failed to replace a variant of quiz %s: %s", quiz_id, e)
+            return
+        if pool.replace(variant, body):
+            self._replaced_variants += 1
+
+    async def _refresh_loop(self) -> None:
+        """Periodically regenerate used pools and drop idle ones"""
+        while True:
+            await asyncio.sleep(self._refresh_seconds)
+            started = time.perf_counter()
+            for quiz_id, pool in list(self._pools.items()):
+                if not pool.used:
+                    self._pools.pop(quiz_id, None)
+                    continue
+                pool.used = False
+                try:
+                    bodies = await self._render(pool.quiz, len(pool))
+                except Exception as e:
+                    logger.error("Failed to refresh the variant pool of quiz %s: %s", quiz_id, e)
+                    continue
+                if self._pools.get(quiz_id) is pool:
+                    pool.regenerate(bodies)
+            logger.debug("Refreshed %d variant pools in %.1f ms",
+                         len(self._pools), (time.perf_counter() - started) * 1000)
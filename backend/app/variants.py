@@ -0,0 +1,172 @@
+import os
+import hmac
+import random
+import base64
+import struct
+import hashlib
+import logging
+import secrets
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from .shuffling import QuizShuffler, ShufflePlan, shuffle_quiz
+from .compression import encode_body
+from .utils import mongodb_json_serializer
+
+logger = logging.getLogger(__name__)
+
+# Secret used to sign variant tokens. Every worker must share it, otherwise
+# a token issued by one worker cannot be graded by another.
+SHUFFLE_TOKEN_SECRET = os.getenv("SHUFFLE_TOKEN_SECRET")
+
+TOKEN_VERSION = 1
+SAMPLED_TOKEN_VERSION = 2
+FLAG_SHUFFLE_QUESTIONS = 0x01
+FLAG_SHUFFLE_OPTIONS = 0x02
+
+# version, quiz ObjectId, seed, flags
+_PAYLOAD = struct.Struct(">B12sQB")
+# version, quiz ObjectId, seed, flags, sample size
+_SAMPLED_PAYLOAD = struct.Struct(">B12sQBH")
+_PAYLOADS = {TOKEN_VERSION: _PAYLOAD, SAMPLED_TOKEN_VERSION: _SAMPLED_PAYLOAD}
+_SIGNATURE_SIZE = 16
+
+# Largest sample a token can describe
+MAX_SAMPLE_SIZE = 0xFFFF
+
+
+class InvalidVariantToken(ValueError):
+    """Raised when a variant token is malformed or its signature is wrong"""
+    pass
+
+
+class VariantToken:
+    """Everything needed to rebuild one shuffled (or sampled) variant of a quiz"""
+
+    __slots__ = ("quiz_id", "seed", "shuffle_questions", "shuffle_options", "sample")
+
+    def __init__(
+            self,
+            quiz_id: str,
+            seed: int,
+            shuffle_questions: bool = True,
+            shuffle_options: bool = True,
+            sample: Optional[int] = None):
+        self.quiz_id = quiz_id
+        self.seed = seed
+        self.shuffle_questions = shuffle_questions
+        self.shuffle_options = shuffle_options
+        self.sample = sample or None
+
+    def plan(self, question_count: int) -> ShufflePlan:
+        """Rebuild the shuffle permutations of this variant"""
+        shuffler = QuizShuffler(self.shuffle_questions, self.shuffle_options)
+        return shuffler.plan(question_count, random.Random(self.seed), self.sample)
+
+    def _flags(self) -> int:
+        flags = 0
+        if self.shuffle_questions:
+            flags |= FLAG_SHUFFLE_QUESTIONS
+        if self.shuffle_options:
+            flags |= FLAG_SHUFFLE_OPTIONS
+        return flags
+
+    def pack(self) -> bytes:
+        """Pack the token fields into a compact binary payload
+
+        Unsampled tokens keep the original version 1 layout.
+        """
+        quiz_id = ObjectId(self.quiz_id).binary
+        if self.sample:
+            return _SAMPLED_PAYLOAD.pack(
+                SAMPLED_TOKEN_VERSION, quiz_id, self.seed, self._flags(), self.sample)
+        return _PAYLOAD.pack(TOKEN_VERSION, quiz_id, self.seed, self._flags())
+
+    @classmethod
+    def unpack(cls, payload: bytes) -> "VariantToken":
+        """Unpack a binary payload created by ``pack``"""
+        layout = _PAYLOADS.get(payload[0]) if payload else None
+        if layout is None or len(payload) != layout.size:
+            raise InvalidVariantToken("Malformed variant token")
+        version, quiz_id, seed, flags, *sample = layout.unpack(payload)
+        return cls(
+            str(ObjectId(quiz_id)),
+            seed,
+            bool(flags & FLAG_SHUFFLE_QUESTIONS),
+            bool(flags & FLAG_SHUFFLE_OPTIONS),
+            sample[0] if sample else None)
+
+
+class VariantSigner:
+    """Signs variant tokens so clients cannot forge a shuffle to grade against"""
+
+    def __init__(self, secret: Optional[str] = SHUFFLE_TOKEN_SECRET):
+        """Initialize with the signing secret"""
+        if not secret:
+            logger.warning(
+                "SHUFFLE_TOKEN_SECRET is not set; using a random per-process "
+                "secret, so variant tokens only verify on this worker")
+            secret = secrets.token_hex(32)
+        self._key = secret.encode()
+
+    def sign(self, token: VariantToken) -> str:
+        """Encode a token as a URL-safe signed string"""
+        payload = token.pack()
+        data = payload + self._signature(payload)
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+    def verify(self, value: str) -> VariantToken:
+        """Decode a signed string, checking its signature"""
+        try:
+            data = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        except (ValueError, TypeError) as e:
+            raise InvalidVariantToken("Malformed variant token") from e
+
+        if len(data) <= _SIGNATURE_SIZE:
+            raise InvalidVariantToken("Malformed variant token")
+        payload, signature = data[:-_SIGNATURE_SIZE], data[-_SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, self._signature(payload)):
+            raise InvalidVariantToken("Invalid variant token signature")
+        return VariantToken.unpack(payload)
+
+    def _signature(self, payload: bytes) -> bytes:
+        return hmac.new(self._key, payload, hashlib.sha256).digest()[:_SIGNATURE_SIZE]
+
+
+def new_seed() -> int:
+    """Draw a fresh 64-bit shuffle seed"""
+    return secrets.randbits(64)
+
+
+def shuffle_variant(
+        quiz_data: Dict[str, Any],
+        seed: Optional[int] = None) -> Dict[str, Any]:
+    """Shuffle a quiz with a seed and attach the signed variant token"""
+    seed = new_seed() if seed is None else seed
+    result = shuffle_quiz(quiz_data, seed=seed)
+    token = VariantToken(result["id"], seed)
+    result["variant_token"] = variant_signer.sign(token)
+    return result
+
+
+def render_variant(
+        quiz_data: Dict[str, Any],
+        seed: int,
+        token: str,
+        accept_encoding: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+    """Shuffle, serialize and compress a variant whose token is already signed
+
+    Runs in worker processes too, so it never uses the signer, whose key
+    may only exist in the parent process.
+    """
+    result = shuffle_quiz(quiz_data, seed=seed)
+    result["variant_token"] = token
+    return encode_body(mongodb_json_serializer.dumps(result), accept_encoding)
+
+
+def render_variants(quiz_data: Dict[str, Any], variants: List[Tuple[int, str]]) -> List[bytes]:
+    """Shuffle and serialize several pre-signed ``(seed, token)`` variants of a quiz"""
+    return [render_variant(quiz_data, seed, token)[0] for seed, token in variants]
+
+
+# Create a signer for use throughout the application
+variant_signer = VariantSigner()
@@ -0,0 +1,101 @@
+"""Benchmark the logging cost of one shuffled GET /quizzes/id/{quiz_id}.
+
+Replays the log calls a request made before the logging overhaul (six
+eager f-string INFO lines written synchronously by ``basicConfig``'s
+stderr handler) and the ones it makes now (lazy DEBUG calls), through the
+queue handler of ``configure_logging`` at INFO, at DEBUG, and at DEBUG
+with sampling. The sink sleeps ``--sink-latency-us`` per write to stand
+in for a terminal or log pipe; the queued setups write on another thread.
+
+    python benchmarks/bench_logging.py
+    python benchmarks/bench_logging.py --sink-latency-us 0 --requests 20000
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.logging_config import configure_logging, stop_logging
+
+database_logger = logging.getLogger("backend.app.database")
+routes_logger = logging.getLogger("backend.app.routes.quizzes")
+shuffling_logger = logging.getLogger("backend.app.shuffling")
+
+QUIZ_ID = "65f1c0ffee00000000000001"
+
+
+class SlowSink:
+    """A stream whose writes take a fixed time, like a busy terminal or pipe"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def flush(self):
+        pass
+
+
+def legacy_request():
+    """The log calls of a shuffled fetch by id before the overhaul"""
+    database_logger.info(f"get_quiz_by_id called with ID: {QUIZ_ID}")
+    database_logger.info(f"ObjectId created: {QUIZ_ID}")
+    database_logger.info(f"Quiz found: {True}")
+    routes_logger.info(f"Quiz {QUIZ_ID}: shuffle={True}")
+    shuffling_logger.info(f"Shuffling quiz: questions={True}, options={True}")
+    routes_logger.info("Quiz shuffled successfully")
+
+
+def current_request():
+    """The log calls of the same request now"""
+    database_logger.debug("get_quiz_by_id(%s) found=%s", QUIZ_ID, True)
+    routes_logger.debug("Quiz %s: shuffle=%s", QUIZ_ID, True)
+    shuffling_logger.debug("Shuffling quiz: questions=%s, options=%s", True, True)
+    routes_logger.debug("Quiz %s shuffled", QUIZ_ID)
+
+
+def time_requests(request, count):
+    """Average per-request time in microseconds on the calling thread"""
+    start = time.perf_counter()
+    for _ in range(count):
+        request()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--sink-latency-us", type=float, default=20)
+    args = parser.parse_args()
+    latency = args.sink_latency_us / 1e6
+
+    setups = [
+        ("before: basicConfig INFO, f-strings", legacy_request, None, None),
+        ("now: queue handler, INFO", current_request, "INFO", 1.0),
+        ("now: queue handler, DEBUG", current_request, "DEBUG", 1.0),
+        ("now: queue handler, DEBUG sampled 1%", current_request, "DEBUG", 0.01),
+    ]
+    print(f"sink latency: {args.sink_latency_us:g} us per write, {args.requests} requests")
+    print(f"{'setup':<40} {'per request (us)':>17} {'lines':>7}")
+    for name, request, level, sample_rate in setups:
+        sink = SlowSink(latency)
+        if level is None:
+            logging.basicConfig(level=logging.INFO, stream=sink, force=True)
+        else:
+            configure_logging(level=level, debug_sample_rate=sample_rate,
+                              stream=sink, force=True)
+        per_request = time_requests(request, args.requests)
+        stop_logging()
+        print(f"{name:<40} {per_request:>17.2f} {sink.writes:>7}")
+    logging.getLogger().handlers.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark quiz response serialization against the previous paths.
+
+Compares the single-pass ``mongodb_response`` with the former triple pass
+(json.dumps with a custom encoder, json.loads, then JSONResponse dumping
+again) and with FastAPI's default jsonable_encoder + JSONResponse path.
+
+    python benchmarks/bench_serialize.py
+    python benchmarks/bench_serialize.py --sizes 10 1000 --repeat 7
+"""
+import os
+import sys
+import json
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from backend.app.utils import mongodb_response, orjson
+
+
+class LegacyEncoder(json.JSONEncoder):
+    """The encoder the previous serializer used"""
+
+    def default(self, o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        return super().default(o)
+
+
+def legacy_response(data):
+    """The previous mongodb_response: dumps, loads, then dumps again"""
+    return JSONResponse(content=json.loads(json.dumps(data, cls=LegacyEncoder)))
+
+
+def fastapi_default_response(data):
+    """What FastAPI does with a plain dict return value"""
+    return JSONResponse(content=jsonable_encoder(data, custom_encoder={ObjectId: str}))
+
+
+def make_quiz(question_count):
+    """Build a shuffled quiz response like the quiz endpoints return"""
+    return {
+        "quiz_name": f"Benchmark quiz ({question_count} questions)",
+        "id": str(ObjectId()),
+        "questions": [
+            {
+                "question": f"Question number {i}: which option is right?",
+                "option_a": f"Answer {i} a",
+                "option_b": f"Answer {i} b",
+                "option_c": f"Answer {i} c",
+                "option_d": f"Answer {i} d",
+                "correct_answer": "abcd"[i % 4]
+            }
+            for i in range(question_count)
+        ]
+    }
+
+
+def time_call(func, repeat, number):
+    """Best per-call time in microseconds"""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10, 100, 1000, 3000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if orjson else 'json (stdlib)'}")
+    print(f"{'questions':>10} {'single pass (us)':>17} {'legacy (us)':>12} "
+          f"{'fastapi (us)':>13} {'speedup':>8}")
+    for size in args.sizes:
+        quiz = make_quiz(size)
+        assert json.loads(mongodb_response(quiz).body) == json.loads(legacy_response(quiz).body)
+        number = max(1, 20000 // size)
+        single = time_call(lambda: mongodb_response(quiz), args.repeat, number)
+        legacy = time_call(lambda: legacy_response(quiz), args.repeat, number)
+        default = time_call(lambda: fastapi_default_response(quiz), args.repeat, number)
+        print(f"{size:>10} {single:>17.1f} {legacy:>12.1f} {default:>13.1f} "
+              f"{legacy / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark the per-request cost of shuffling a quiz against its size.
+
+Compares the permutation-based ``shuffle_quiz`` with the deep copy the
+previous implementation paid for before it even started shuffling.
+
+    python benchmarks/bench_shuffle.py
+    python benchmarks/bench_shuffle.py --sizes 10 100 1000 --repeat 7
+"""
+import os
+import sys
+import argparse
+import logging
+import timeit
+from copy import deepcopy
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bson import ObjectId
+from backend.app.shuffling import shuffle_quiz
+
+
+def make_quiz(question_count):
+    """Build a quiz document shaped like the ones stored in MongoDB"""
+    return {
+        "_id": ObjectId(),
+        "quiz_name": f"Benchmark quiz ({question_count} questions)",
+        "questions": [
+            {
+                "question": f"Question number {i}: what is {i} + {i}?",
+                "option_a": f"{2 * i}",
+                "option_b": f"{2 * i + 1}",
+                "option_c": f"{2 * i - 1}",
+                "option_d": f"{i}",
+                "correct_answer": "a"
+            }
+            for i in range(question_count)
+        ]
+    }
+
+
+def time_call(func, repeat, number):
+    """Best per-call time in microseconds"""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10, 50, 100, 500, 1000, 3000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Keep log output out of the measurement
+    logging.disable(logging.CRITICAL)
+
+    print(f"{'questions':>10} {'shuffle_quiz (us)':>18} {'deepcopy (us)':>14} "
+          f"{'us/question':>12}")
+    for size in args.sizes:
+        quiz = make_quiz(size)
+        number = max(1, 20000 // size)
+        shuffle_us = time_call(lambda: shuffle_quiz(quiz), args.repeat, number)
+        deepcopy_us = time_call(lambda: deepcopy(quiz), args.repeat, number)
+        print(f"{size:>10} {shuffle_us:>18.1f} {deepcopy_us:>14.1f} "
+              f"{shuffle_us / size:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
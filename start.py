@@ -3,4 +3,4 @@ import uvicorn
 from backend.app.main import app
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=10000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=10000, log_config=None)
\ No newline at end of file
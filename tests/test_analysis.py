@@ -0,0 +1,51 @@
+import numpy as np
+from backend.app.analysis import ItemAnalysis
+from backend.app.answer_key import AnswerKey
+
+
+def simulate(attempts=400, questions=8, seed=11):
+    rng = np.random.default_rng(seed)
+    key = "".join(rng.choice(list("abcd"), questions))
+    ability = rng.normal(size=attempts)
+    sheets = []
+    for level in ability:
+        knows = rng.random(questions) < 1 / (1 + np.exp(-level))
+        sheets.append("".join(
+            k if know else rng.choice(list("abcd-")) for k, know in zip(key, knows)))
+    return AnswerKey(key), sheets
+
+
+def test_chunked_analysis_matches_full_matrix():
+    key, sheets = simulate()
+    analysis = ItemAnalysis(key)
+    for start in range(0, len(sheets), 64):
+        analysis.add(sheets[start:start + 64])
+    result = analysis.result()
+
+    correct = np.array([[a == k for a, k in zip(sheet, key.answers)] for sheet in sheets], float)
+    totals = correct.sum(axis=1)
+    p = correct.mean(axis=0)
+    k = correct.shape[1]
+    kr20 = k / (k - 1) * (1 - (p * (1 - p)).sum() / totals.var())
+
+    assert result["attempts"] == len(sheets)
+    assert result["kr20"] == round(kr20, 4)
+    for index, item in enumerate(result["items"]):
+        assert item["p_value"] == round(p[index], 4)
+        assert item["point_biserial"] == round(np.corrcoef(correct[:, index], totals)[0, 1], 4)
+        rest = totals - correct[:, index]
+        assert item["corrected_point_biserial"] == round(
+            np.corrcoef(correct[:, index], rest)[0, 1], 4)
+        assert sum(item["distractors"].values()) == len(sheets)
+
+
+def test_constant_items_and_empty_quizzes_have_no_correlation():
+    analysis = ItemAnalysis(AnswerKey("ab"))
+    analysis.add(["ab", "ab", "abc"])
+    result = analysis.result()
+    assert result["skipped_attempts"] == 1
+    assert result["items"][0]["p_value"] == 1.0
+    assert result["items"][0]["point_biserial"] is None
+    assert result["kr20"] is None
+
+    assert ItemAnalysis(AnswerKey("abc")).result()["items"][2]["p_value"] is None
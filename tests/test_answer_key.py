@@ -0,0 +1,38 @@
+import random
+from backend.app.answer_key import AnswerKey, answer_key_fields
+from backend.app.shuffling import QuizShuffler
+from tests.test_shuffling import make_quiz
+
+
+def test_pack_round_trip_uses_two_bits_per_question():
+    quiz = make_quiz(13)
+    key = AnswerKey.from_questions(quiz["questions"])
+    packed = key.pack()
+
+    assert len(packed) == 4
+    assert AnswerKey.unpack(packed, 13).answers == "".join(
+        q["correct_answer"] for q in quiz["questions"])
+
+
+def test_unpackable_answers_are_not_stored():
+    assert answer_key_fields([{"correct_answer": "e"}]) is None
+    assert answer_key_fields([{"correct_answer": "c"}]) == {
+        "answer_key": b"\x02", "question_count": 1}
+
+
+def test_variant_key_matches_shuffled_quiz():
+    quiz = make_quiz(30)
+    key = AnswerKey.from_questions(quiz["questions"])
+    plan = QuizShuffler().plan(30, random.Random(7))
+    shuffled = plan.apply(quiz)
+
+    expected = [q["correct_answer"] for q in shuffled["questions"]]
+    assert list(key.for_variant(plan).answers) == expected
+
+
+def test_grade_is_case_insensitive():
+    score, results = AnswerKey("abc").grade(["A", "c", "c"])
+    assert score == 2
+    assert [r["is_correct"] for r in results] == [True, False, True]
+    assert results[1] == {"question_number": 2, "user_answer": "c",
+                          "correct_answer": "b", "is_correct": False}
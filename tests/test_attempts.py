@@ -0,0 +1,108 @@
+import asyncio
+import random
+import pytest
+from backend.app.attempts import AttemptQueueFull, AttemptWriter, source_answers
+from backend.app.shuffling import QuizShuffler
+from tests.test_shuffling import make_quiz
+
+
+class FakeDatabase:
+    def __init__(self, delay=0, failing=()):
+        self.batches = []
+        self.rollups = []
+        self.settled = []
+        self.delay = delay
+        self.failing = set(failing)
+
+    async def insert_attempts(self, attempts):
+        await asyncio.sleep(self.delay)
+        self.batches.append(list(attempts))
+        failures = [(index, 11000, "duplicate key") for index, attempt in enumerate(attempts)
+                    if attempt["n"] in self.failing]
+        return len(attempts) - len(failures), failures
+
+    async def increment_quiz_stats(self, rollups):
+        self.rollups.append(rollups)
+
+    async def settle_attempts(self, attempts):
+        self.settled.extend(attempt["n"] for attempt in attempts)
+
+
+def test_flushes_by_size_and_drains_on_stop():
+    db = FakeDatabase()
+
+    async def run():
+        writer = AttemptWriter(max_size=100, flush_size=4, flush_interval=60)
+        writer.start(db)
+        for i in range(10):
+            await writer.record({"n": i, "quiz_id": 1, "quiz_name": "Q", "score": 1,
+                                 "total_questions": 1, "correct": "1"})
+        await asyncio.sleep(0)
+        await writer.stop()
+        return writer.stats()
+
+    stats = asyncio.run(run())
+    assert [len(batch) for batch in db.batches] == [4, 4, 2]
+    assert [a["n"] for batch in db.batches for a in batch] == list(range(10))
+    assert stats["written"] == 10 and stats["queue_size"] == 0
+    assert len(db.rollups) == 3
+
+
+def test_partially_failed_batch_counts_only_stored_attempts():
+    db = FakeDatabase(failing={1, 2})
+
+    async def run():
+        writer = AttemptWriter(max_size=100, flush_size=4, flush_interval=60)
+        writer.start(db)
+        for i in range(4):
+            await writer.record({"n": i, "quiz_id": 1, "quiz_name": "Q", "score": i,
+                                 "total_questions": 1, "correct": "1"})
+        await writer.stop()
+        return writer.stats()
+
+    stats = asyncio.run(run())
+    assert stats["written"] == 2 and stats["failed"] == 2
+    assert db.settled == [0, 3]
+    rollup = db.rollups[0][1]
+    assert rollup["attempts"] == 2 and rollup["score_total"] == 3
+
+
+def test_full_queue_rejects_after_timeout():
+    db = FakeDatabase(delay=1)
+
+    async def run():
+        writer = AttemptWriter(max_size=2, flush_size=1, flush_interval=0, enqueue_timeout=0.01)
+        writer.start(db)
+        await writer.record({"n": 0})
+        await asyncio.sleep(0)  # the writer takes the first attempt and blocks
+        await writer.record({"n": 1})
+        await writer.record({"n": 2})
+        with pytest.raises(AttemptQueueFull):
+            await writer.record({"n": 3})
+        return writer.stats()
+
+    stats = asyncio.run(run())
+    assert stats["rejected"] == 1 and stats["waited"] == 1
+
+
+def test_source_answers_undo_the_shuffle():
+    quiz = make_quiz(12)
+    plan = QuizShuffler().plan(12, random.Random(5))
+    shuffled = plan.apply(quiz)["questions"]
+    displayed = [q["correct_answer"].upper() for q in shuffled]
+    displayed[3] = "?"
+
+    expected = [q["correct_answer"] for q in quiz["questions"]]
+    expected[plan.question_order[3]] = "-"
+    assert source_answers(displayed, plan) == "".join(expected)
+    assert source_answers(["a", "E", ""]) == "a--"
+
+
+def test_sampled_attempts_mark_questions_not_presented():
+    from backend.app.attempts import NOT_PRESENTED
+
+    plan = QuizShuffler(False, False).plan(8, random.Random(2), sample=3)
+    answers = source_answers(["a", "B", "x"], plan, 8)
+    assert len(answers) == 8
+    assert [answers[index] for index in plan.question_order] == ["a", "b", "-"]
+    assert answers.count(NOT_PRESENTED) == 5
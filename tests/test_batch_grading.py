@@ -0,0 +1,35 @@
+import base64
+import numpy as np
+import pytest
+from backend.app.answer_key import AnswerKey
+from backend.app.batch_grading import InvalidAnswerSheet, grade_sheets
+
+
+def test_batch_matches_single_grading_across_chunks():
+    rng = np.random.default_rng(3)
+    key = AnswerKey("".join(rng.choice(list("abcd"), 25)))
+    sheets = ["".join(rng.choice(list("abcdABCD-"), 25)) for _ in range(50)]
+
+    result = grade_sheets(key, sheets, chunk_size=8)
+
+    expected = [key.grade(list(sheet))[0] for sheet in sheets]
+    assert result["scores"] == expected
+    assert result["question_correct_counts"] == np.sum(result["correctness"], axis=0).tolist()
+
+
+def test_compact_correctness_is_packed_bits():
+    result = grade_sheets(AnswerKey("abcdabcdab"), ["abcdabcdab", "bbcdabcdaa"], compact=True)
+    bits = [np.unpackbits(np.frombuffer(base64.b64decode(row), np.uint8))[:10].tolist()
+            for row in result["correctness"]]
+    assert bits == [[1] * 10, [0] + [1] * 8 + [0]]
+    assert result["scores"] == [10, 8]
+
+
+def test_legacy_answers_never_match_other_letters():
+    result = grade_sheets(AnswerKey(("a", "bb", None)), ["aBb"])
+    assert result["scores"] == [1]
+
+
+def test_wrong_length_reports_the_sheet():
+    with pytest.raises(InvalidAnswerSheet, match="Answer sheet 3"):
+        grade_sheets(AnswerKey("ab"), ["ab", "ba", "abc"], chunk_size=2)
@@ -0,0 +1,120 @@
+import asyncio
+from backend.app.cache import QuizCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_quiz(quiz_id, quiz_name):
+    return {"id": quiz_id, "quiz_name": quiz_name, "questions": []}
+
+
+def test_lookup_by_id_and_name():
+    cache = QuizCache(max_size=4, ttl=60)
+    quiz = make_quiz("1", "Math")
+    cache.put(quiz)
+
+    assert cache.get_by_id("1") is quiz
+    assert cache.get_by_name("Math") is quiz
+    assert cache.get_by_name("History") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QuizCache(max_size=2, ttl=60)
+    cache.put(make_quiz("1", "A"))
+    cache.put(make_quiz("2", "B"))
+    cache.get_by_id("1")
+    cache.put(make_quiz("3", "C"))
+
+    assert cache.get_by_id("2") is None
+    assert cache.get_by_name("B") is None
+    assert cache.get_by_id("1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = QuizCache(max_size=2, ttl=10, clock=clock)
+    cache.put(make_quiz("1", "A"))
+
+    clock.now = 9.9
+    assert cache.get_by_id("1") is not None
+    clock.now = 10.0
+    assert cache.get_by_id("1") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_invalidate_by_name_drops_both_keys():
+    cache = QuizCache(max_size=2, ttl=60)
+    cache.put(make_quiz("1", "A"))
+    cache.invalidate(quiz_name="A")
+    cache.invalidate(quiz_name="unknown")
+
+    assert cache.get_by_id("1") is None
+    assert cache.get_by_name("A") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_read_through_loads_only_on_miss():
+    cache = QuizCache(max_size=2, ttl=60)
+    calls = []
+
+    async def loader(quiz_name):
+        calls.append(quiz_name)
+        return make_quiz("1", quiz_name) if quiz_name == "A" else None
+
+    async def run():
+        first = await cache.load_by_name("A", loader)
+        second = await cache.load_by_name("A", loader)
+        missing = await cache.load_by_name("B", loader)
+        return first, second, missing
+
+    first, second, missing = asyncio.run(run())
+    assert first is second
+    assert missing is None
+    assert calls == ["A", "B"]
+
+
+def test_disabled_cache_stores_nothing():
+    cache = QuizCache(max_size=0, ttl=60)
+    cache.put(make_quiz("1", "A"))
+    assert cache.get_by_id("1") is None
+
+
+def test_concurrent_misses_share_one_load():
+    cache = QuizCache(max_size=0, ttl=60)
+    calls = []
+
+    async def loader(quiz_id):
+        calls.append(quiz_id)
+        await asyncio.sleep(0.01)
+        return make_quiz(quiz_id, "A")
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.load_by_id("1", loader) for _ in range(50)))
+
+    results = asyncio.run(run())
+    assert calls == ["1"]
+    assert all(quiz is results[0] for quiz in results)
+    assert cache.stats()["coalesced_loads"] == 49
+
+
+def test_invalidation_during_load_is_not_overwritten():
+    cache = QuizCache(max_size=2, ttl=60)
+
+    async def loader(quiz_id):
+        await asyncio.sleep(0)
+        cache.invalidate(quiz_id=quiz_id)
+        return make_quiz(quiz_id, "A")
+
+    assert asyncio.run(cache.load_by_id("1", loader)) is not None
+    assert len(cache) == 0
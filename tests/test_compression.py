@@ -0,0 +1,45 @@
+import gzip
+from backend.app import compression
+from backend.app.compression import (
+    CompressedPayload, PayloadCache, negotiate_encoding, payload_response)
+
+BODY = b'{"quiz_name": "Compressed"}' + b" " * 4096
+
+
+def test_negotiation_respects_threshold_and_weights():
+    size = compression.COMPRESSION_MIN_SIZE
+    assert negotiate_encoding("gzip", size) == "gzip"
+    assert negotiate_encoding("gzip", size - 1) is None
+    assert negotiate_encoding(None, size) is None
+    assert negotiate_encoding("identity", size) is None
+    assert negotiate_encoding("gzip;q=0", size) is None
+    assert negotiate_encoding("*", size) == compression.SUPPORTED_ENCODINGS[0]
+
+
+def test_payload_compresses_each_encoding_once():
+    payload = CompressedPayload(BODY, {"ETag": 'W/"q-1"'})
+    first = payload_response(payload, "gzip, deflate")
+    second = payload_response(payload, "gzip")
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["etag"] == 'W/"q-1"'
+    assert first.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(first.body) == BODY
+    assert payload.encoded("gzip") is payload.encoded("gzip")
+    assert first.body == second.body
+
+    plain = payload_response(payload, None)
+    assert plain.body == BODY
+    assert "content-encoding" not in plain.headers
+
+
+def test_payload_cache_evicts_least_recently_used():
+    cache = PayloadCache(max_size=2)
+    cache.put("a", CompressedPayload(b"a"))
+    cache.put("b", CompressedPayload(b"b"))
+    assert cache.get("a").body == b"a"
+    cache.put("c", CompressedPayload(b"c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,36 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from backend.app.database import POOL_SETTINGS, pool_options_from_env
+from backend.app.dependencies import get_database
+
+
+@pytest.fixture
+def pool_env(monkeypatch):
+    for env_name in POOL_SETTINGS:
+        monkeypatch.delenv(env_name, raising=False)
+    return monkeypatch
+
+
+def test_pool_options_default_and_read_from_env(pool_env):
+    assert pool_options_from_env() == {"serverSelectionTimeoutMS": 5000}
+
+    pool_env.setenv("MONGODB_MAX_POOL_SIZE", "50")
+    pool_env.setenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "2000")
+    pool_env.setenv("MONGODB_MIN_POOL_SIZE", "")
+    assert pool_options_from_env() == {"maxPoolSize": 50, "serverSelectionTimeoutMS": 2000}
+
+
+def test_invalid_pool_option_names_the_variable(pool_env):
+    pool_env.setenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5s")
+    with pytest.raises(ValueError, match="MONGODB_WAIT_QUEUE_TIMEOUT_MS"):
+        pool_options_from_env()
+
+
+def test_get_database_is_unavailable_without_a_connection():
+    db = object()
+    assert get_database(SimpleNamespace(app=SimpleNamespace(db=db))) is db
+
+    with pytest.raises(HTTPException) as error:
+        get_database(SimpleNamespace(app=SimpleNamespace(db=None)))
+    assert error.value.status_code == 503
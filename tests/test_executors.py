@@ -0,0 +1,94 @@
+import asyncio
+import pickle
+import threading
+import pytest
+from bson import ObjectId
+from backend.app.answer_key import AnswerKey
+from backend.app.batch_grading import InvalidAnswerSheet, grade_sheets
+from backend.app.executors import INLINE, PROCESS, THREAD, WorkExecutor
+
+
+def test_work_is_placed_by_size():
+    executor = WorkExecutor(thread_workers=1, process_workers=0,
+                            thread_threshold=10, process_threshold=100)
+    assert executor.placement(1000, process=True) == INLINE
+    executor.start()
+    try:
+        assert executor.placement(9) == INLINE
+        assert executor.placement(10) == THREAD
+        # Without a process pool, process work falls back to threads
+        assert executor.placement(1000, process=True) == THREAD
+    finally:
+        asyncio.run(executor.stop())
+
+
+def test_offloaded_work_runs_off_the_loop_and_is_timed():
+    executor = WorkExecutor(thread_workers=2, process_workers=0, thread_threshold=10)
+
+    async def run():
+        executor.start()
+        try:
+            small = await executor.run("task", 1, threading.current_thread)
+            large = await executor.run("task", 50, threading.current_thread)
+            return small, large
+        finally:
+            await executor.stop()
+
+    small, large = asyncio.run(run())
+    assert small is threading.main_thread()
+    assert large is not threading.main_thread()
+
+    stats = executor.stats()["tasks"]["task"]
+    assert (stats[INLINE], stats[THREAD], stats[PROCESS]) == (1, 1, 0)
+    assert stats["off_loop_seconds"] >= 0
+
+
+def test_batch_grading_errors_survive_a_process_boundary():
+    error = pickle.loads(pickle.dumps(InvalidAnswerSheet(4, "expected 3 answers, got 2")))
+    assert error.index == 4
+    assert str(error) == "Answer sheet 5: expected 3 answers, got 2"
+
+    key = pickle.loads(pickle.dumps(AnswerKey("abc")))
+    with pytest.raises(InvalidAnswerSheet):
+        grade_sheets(key, ["abc", "ab"])
+
+
+def test_large_variant_pools_are_filled_off_the_loop(monkeypatch):
+    from backend.app import variant_pool
+    from backend.app.variant_pool import VariantPoolManager
+
+    threads = []
+    render = variant_pool.render_variants
+
+    def recording_render(quiz, variants):
+        threads.append((quiz["quiz_name"], threading.current_thread()))
+        return render(quiz, variants)
+    monkeypatch.setattr(variant_pool, "render_variants", recording_render)
+
+    def make_quiz(name, question_count):
+        return {"id": str(ObjectId()), "quiz_name": name, "questions": [
+            {"question": f"q{i}", "option_a": "a", "option_b": "b", "option_c": "c",
+             "option_d": "d", "correct_answer": "a"} for i in range(question_count)]}
+
+    executor = WorkExecutor(thread_workers=1, process_workers=0, thread_threshold=100)
+    pools = VariantPoolManager(size=3)
+
+    async def run():
+        executor.start()
+        pools.start(executor)
+        try:
+            for quiz in (make_quiz("large", 50), make_quiz("small", 5)):
+                assert pools.get(quiz) is None
+            for _ in range(500):
+                if pools.stats()["pools"] == 2:
+                    break
+                await asyncio.sleep(0.005)
+        finally:
+            await pools.stop()
+            await executor.stop()
+
+    asyncio.run(run())
+    placed = dict(threads)
+    assert placed["large"] is not threading.main_thread()
+    assert placed["small"] is threading.main_thread()
+    assert executor.stats()["tasks"]["pool_fill"][THREAD] == 1
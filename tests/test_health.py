@@ -0,0 +1,82 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from backend.app.health import HealthMonitor, PoolMonitor
+
+
+class FakeDatabase:
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+
+    async def ping(self):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+
+    def pool_stats(self):
+        return {"checked_out": 1}
+
+
+def test_pool_monitor_tracks_checkouts_and_waiters():
+    monitor = PoolMonitor()
+    address = ("localhost", 27017)
+    monitor.pool_created(SimpleNamespace(address=address, options={"maxPoolSize": 4}))
+    for _ in range(3):
+        monitor.connection_check_out_started(SimpleNamespace(address=address))
+    monitor.connection_created(SimpleNamespace(address=address))
+    monitor.connection_checked_out(SimpleNamespace(address=address))
+    monitor.connection_check_out_failed(SimpleNamespace(address=address, reason="timeout"))
+
+    stats = monitor.stats()
+    assert stats["checked_out"] == 1 and stats["waiting"] == 1
+    assert stats["peak_waiting"] == 3 and stats["checkout_timeouts"] == 1
+    assert stats["utilization"] == 0.25
+
+    monitor.connection_checked_in(SimpleNamespace(address=address))
+    assert monitor.stats()["checked_out"] == 0
+
+
+def test_readiness_fails_on_slow_or_failing_pings():
+    async def run():
+        monitor = HealthMonitor(max_ping_ms=20, ping_timeout=0.2)
+        assert monitor.readiness() == (False, ["database not connected"])
+
+        monitor.start(FakeDatabase())
+        await monitor.ping()
+        ready = monitor.readiness()
+
+        monitor._db = FakeDatabase(delay=0.05)
+        await monitor.ping()
+        slow = monitor.readiness()
+
+        monitor._db = FakeDatabase(error=RuntimeError("down"))
+        await monitor.ping()
+        failed = monitor.readiness()
+        stats = monitor.stats()
+        await monitor.stop()
+        return ready, slow, failed, stats
+
+    ready, slow, failed, stats = asyncio.run(run())
+    assert ready == (True, [])
+    assert not slow[0] and "database ping took" in slow[1][0]
+    assert failed == (False, ["database ping failed: down"])
+    assert stats["ping_failures"] == 1 and stats["pool_checked_out"] == 1
+
+
+def test_blocked_event_loop_fails_readiness():
+    async def run():
+        monitor = HealthMonitor(lag_interval=0.01, max_lag_ms=50)
+        monitor.start(FakeDatabase())
+        await asyncio.sleep(0.05)
+        before = monitor.readiness()
+        time.sleep(0.1)
+        await asyncio.sleep(0.03)
+        after = monitor.readiness()
+        await monitor.stop()
+        return before, after, monitor.stats()
+
+    before, after, stats = asyncio.run(run())
+    assert before == (True, [])
+    assert not after[0] and after[1][0].startswith("event loop lag")
+    assert stats["loop_lag_peak_ms"] >= 50
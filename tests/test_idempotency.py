@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from backend.app.idempotency import REPLAYED_HEADER, request_fingerprint, run_idempotent
+from backend.app.utils import mongodb_response
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.records = {}
+
+    async def claim_idempotency_key(self, key, fingerprint):
+        if key in self.records:
+            return self.records[key]
+        self.records[key] = {"_id": key, "fingerprint": fingerprint, "status_code": None}
+        return None
+
+    async def complete_idempotency_key(self, key, status_code, body, media_type):
+        self.records[key].update(status_code=status_code, body=body, media_type=media_type)
+
+    async def release_idempotency_key(self, key):
+        if self.records.get(key, {}).get("status_code") is None:
+            self.records.pop(key, None)
+
+
+def test_retries_replay_the_first_response_without_writing_again():
+    db = FakeDatabase()
+    writes = []
+
+    async def create():
+        writes.append(1)
+        return mongodb_response({"created": len(writes)}, status_code=201)
+
+    fingerprint = request_fingerprint("POST", "/quizzes/", {"quiz_name": "Q"})
+    first = asyncio.run(run_idempotent(db, "key", fingerprint, create))
+    retry = asyncio.run(run_idempotent(db, "key", fingerprint, create))
+    assert writes == [1]
+    assert (retry.status_code, retry.body) == (first.status_code, first.body)
+    assert retry.headers[REPLAYED_HEADER] == "true"
+
+    other = request_fingerprint("POST", "/quizzes/", {"quiz_name": "Other"})
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(run_idempotent(db, "key", other, create))
+    assert error.value.status_code == 422
+
+
+def test_client_errors_are_stored_and_server_errors_free_the_key():
+    db = FakeDatabase()
+
+    async def conflict():
+        raise HTTPException(status_code=409, detail="exists")
+
+    async def crash():
+        raise HTTPException(status_code=500, detail="boom")
+
+    response = asyncio.run(run_idempotent(db, "a", "f", conflict))
+    assert response.status_code == 409
+    assert asyncio.run(run_idempotent(db, "a", "f", crash)).status_code == 409
+
+    with pytest.raises(HTTPException):
+        asyncio.run(run_idempotent(db, "b", "f", crash))
+    assert "b" not in db.records
+
+    # A retry while the first request still holds the key
+    asyncio.run(db.claim_idempotency_key("c", "f"))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(run_idempotent(db, "c", "f", conflict))
+    assert error.value.status_code == 409
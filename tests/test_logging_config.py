@@ -0,0 +1,61 @@
+import io
+import sys
+import json
+import logging
+from backend.app.logging_config import (
+    DebugSampler, JsonFormatter, configure_logging, parse_levels, stop_logging)
+
+
+def make_record(level=logging.DEBUG, lineno=10, **extra):
+    record = logging.LogRecord("quiz", level, "quiz.py", lineno, "quiz %s", ("a",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields_and_exceptions():
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        record = logging.LogRecord("quiz", logging.ERROR, "quiz.py", 1, "failed %s", ("x",),
+                                   sys.exc_info())
+    record.quiz_id = "abc"
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "failed x" and entry["level"] == "ERROR"
+    assert entry["quiz_id"] == "abc"
+    assert "ValueError: bad" in entry["exception"]
+
+
+def test_debug_sampler_thins_each_call_site():
+    sampler = DebugSampler(0.25)
+    kept = [sampler.filter(make_record(lineno=10)) for _ in range(8)]
+    assert kept.count(True) == 2
+    assert sampler.filter(make_record(lineno=20))
+    assert all(sampler.filter(make_record(logging.INFO)) for _ in range(3))
+    assert not DebugSampler(0).filter(make_record())
+
+    assert parse_levels("a=debug, b.c=WARNING,bad,d=nope") == {
+        "a": logging.DEBUG, "b.c": logging.WARNING}
+
+
+def test_records_are_written_by_the_listener_thread():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    stream = io.StringIO()
+    try:
+        configure_logging(level="INFO", log_format="json", levels="quiz.noisy=ERROR",
+                          stream=stream, force=True)
+        logging.getLogger("quiz.app").info("served %s", "q1", extra={"route": "/quizzes"})
+        logging.getLogger("quiz.noisy").warning("dropped")
+        logging.getLogger("quiz.app").debug("dropped")
+        stop_logging()
+    finally:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+        logging.getLogger("quiz.noisy").setLevel(logging.NOTSET)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["message"] == "served q1" and lines[0]["route"] == "/quizzes"
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+from backend.app.cache import QuizCache
+from backend.app.executors import WorkExecutor
+from backend.app.health import HealthMonitor
+from backend.app.main import app as quiz_app
+from backend.app.metrics import (
+    Counter, Histogram, MONGO_OPERATIONS, MetricsMiddleware, REGISTRY,
+    instrument_operations)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.labels("/a").observe(value)
+
+    lines = histogram.render()
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 3' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_count{route="/a"} 4' in lines
+
+    counter = Counter("test_total", "Test counter", ("name",))
+    counter.labels('say "hi"').inc(2)
+    assert 'test_total{name="say \\"hi\\""} 2' in counter.render()
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
+
+
+def test_repository_methods_are_counted_by_outcome():
+    @instrument_operations
+    class Repository:
+        async def metrics_test_find(self, fail=False):
+            if fail:
+                raise RuntimeError("down")
+            return 1
+
+        async def metrics_test_iterate(self):
+            for i in range(3):
+                yield i
+
+    repository = Repository()
+
+    async def run():
+        await repository.metrics_test_find()
+        with pytest.raises(RuntimeError):
+            await repository.metrics_test_find(fail=True)
+        return [i async for i in repository.metrics_test_iterate()]
+
+    assert asyncio.run(run()) == [0, 1, 2]
+    assert MONGO_OPERATIONS.labels("metrics_test_find", "success").value == 1
+    assert MONGO_OPERATIONS.labels("metrics_test_find", "error").value == 1
+    assert MONGO_OPERATIONS.labels("metrics_test_iterate", "success").value == 1
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/{item}")
+    async def item(item: str):
+        return {"item": item}
+
+    with TestClient(app) as client:
+        client.get("/metrics-test/1")
+        client.get("/metrics-test/2")
+
+    text = REGISTRY.render()
+    assert ('quiz_http_requests_total{method="GET",route="/metrics-test/{item}",status="200"} 2'
+            in text.splitlines())
+
+
+def test_component_metrics_parse_as_one_family_per_stat(monkeypatch):
+    executor = WorkExecutor(thread_workers=1, process_workers=0, thread_threshold=100)
+    asyncio.run(executor.run("shuffle", 1, threading.current_thread))
+    monkeypatch.setattr(quiz_app, "quiz_cache", QuizCache(), raising=False)
+    monkeypatch.setattr(quiz_app, "answer_keys", QuizCache(), raising=False)
+    monkeypatch.setattr(quiz_app, "executor", executor, raising=False)
+    monkeypatch.setattr(quiz_app, "health", HealthMonitor(), raising=False)
+
+    text = TestClient(quiz_app).get("/metrics").text
+    # Split families parse as repeated names, and samples without their TYPE as untyped
+    parsed = list(text_string_to_metric_families(text))
+    families = {family.name: family for family in parsed}
+    assert len(families) == len(parsed)
+    assert all(family.type != "unknown" for family in parsed)
+    size = families["quiz_component_size"]
+    assert size.type == "gauge"
+    assert {sample.labels["component"] for sample in size.samples} == {"quiz_cache", "answer_keys"}
+
+    # The executor's per-task counters are labelled with the task
+    inline = families["quiz_component_tasks_inline"].samples
+    assert [(s.labels, s.value) for s in inline] == [
+        ({"component": "executor", "key": "shuffle"}, 1.0)]
+    assert families["quiz_component_running"].samples[0].labels == {"component": "health"}
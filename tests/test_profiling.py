@@ -0,0 +1,60 @@
+import os
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.app.profiling import ProfilingMiddleware, phase, record_phase, requested_mode
+
+
+def profiled_app(tmp_path, **options):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, directory=str(tmp_path), **options)
+
+    @app.get("/items/{item}")
+    async def item(item: str):
+        record_phase("db", 0.002)
+        record_phase("db", 0.001)
+        with phase("serialize"):
+            time.sleep(0.001)
+        return {"item": item}
+
+    return TestClient(app)
+
+
+def test_profiling_requires_the_admin_token_unless_enabled():
+    assert requested_mode({"x-profile": "text"}, enabled=True, admin_token="") == "text"
+    assert requested_mode({"x-profile": "text"}, enabled=False, admin_token="secret") is None
+    assert requested_mode({"x-profile": "save", "x-admin-token": "wrong"},
+                          enabled=False, admin_token="secret") is None
+    assert requested_mode({"x-profile": "save", "x-admin-token": "secret"},
+                          enabled=False, admin_token="secret") == "save"
+    assert requested_mode({"x-profile": "flamegraph"}, enabled=True) is None
+
+
+def test_phases_are_reported_and_profiles_returned_or_saved(tmp_path):
+    with profiled_app(tmp_path, enabled=False, admin_token="secret") as client:
+        plain = client.get("/items/1", headers={"X-Profile": "timing"})
+        assert "server-timing" not in plain.headers
+
+        admin = {"X-Admin-Token": "secret"}
+        timing = client.get("/items/1", headers={"X-Profile": "timing", **admin})
+        assert timing.json() == {"item": "1"}
+        assert 'db;dur=3.000;desc="2x"' in timing.headers["server-timing"]
+        assert "serialize;dur=" in timing.headers["server-timing"]
+
+        text = client.get("/items/1", headers={"X-Profile": "text", **admin})
+        assert text.headers["content-type"].startswith("text/plain")
+        assert "serialize" in text.text and "cumulative" in text.text
+
+        saved = client.get("/items/1", headers={"X-Profile": "save", **admin})
+        assert saved.json() == {"item": "1"}
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and "GET-items_item" in files[0] and files[0].endswith(".prof")
+
+
+def test_sampled_profiles_rotate(tmp_path):
+    with profiled_app(tmp_path, sample_rate=1.0, max_files=2) as client:
+        for i in range(4):
+            response = client.get(f"/items/{i}")
+            assert "server-timing" not in response.headers
+            time.sleep(0.01)
+    assert len(os.listdir(tmp_path)) == 2
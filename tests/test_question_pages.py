@@ -0,0 +1,36 @@
+import random
+import pytest
+from backend.app.question_pages import (
+    PageRequest, page_positions, parse_fields, project_question, shuffle_page, source_indexes)
+from backend.app.shuffling import QuizShuffler
+from tests.test_shuffling import make_quiz
+
+
+def test_parse_fields_expands_options_and_rejects_unknown():
+    assert parse_fields(None) is None
+    assert parse_fields("question, options,option_a") == (
+        "question", "option_a", "option_b", "option_c", "option_d")
+    with pytest.raises(ValueError):
+        parse_fields("question,answer")
+    assert project_question({"question": "q", "option_a": "a"}, ("question",)) == {"question": "q"}
+
+
+def test_pages_concatenate_to_the_full_variant():
+    quiz = make_quiz(23)
+    plan = QuizShuffler().plan(23, random.Random(9))
+    full = plan.apply(quiz)["questions"]
+
+    pages = []
+    for offset in range(0, 30, 10):
+        positions = page_positions(23, offset, 10)
+        questions = [quiz["questions"][i] for i in source_indexes(plan, positions)]
+        pages += shuffle_page(questions, plan, positions)
+    assert pages == full
+
+
+def test_page_bounds():
+    assert page_positions(5, 3, 10) == range(3, 5)
+    assert len(page_positions(5, 9, 2)) == 0
+    assert page_positions(5, 0, None) == range(0, 5)
+    assert not PageRequest().requested
+    assert PageRequest(limit=5).requested
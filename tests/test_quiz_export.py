@@ -0,0 +1,37 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from bson import ObjectId
+from backend.app.quiz_export import gzip_chunks, ndjson_chunks
+from backend.app.quiz_import import decompress_chunks, iter_lines
+
+
+async def quiz_documents(count):
+    for i in range(count):
+        quiz_id = ObjectId()
+        yield {"_id": quiz_id, "id": str(quiz_id), "quiz_name": f"Quiz {i}",
+               "questions": [], "updated_at": datetime(2024, 5, 1, tzinfo=timezone.utc)}
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def test_quizzes_are_written_one_line_each_in_batches():
+    chunks = asyncio.run(collect(ndjson_chunks(quiz_documents(5), batch_size=2)))
+    assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [line["quiz_name"] for line in lines] == [f"Quiz {i}" for i in range(5)]
+    assert "_id" not in lines[0]
+    assert lines[0]["updated_at"] == "2024-05-01T00:00:00+00:00"
+
+
+def test_gzipped_export_reads_back_through_the_importer():
+    async def round_trip():
+        compressed = gzip_chunks(ndjson_chunks(quiz_documents(300), batch_size=64))
+        return await collect(iter_lines(decompress_chunks(compressed)))
+
+    lines = asyncio.run(round_trip())
+    assert len(lines) == 300
+    assert json.loads(lines[-1][1])["quiz_name"] == "Quiz 299"
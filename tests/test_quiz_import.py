@@ -0,0 +1,76 @@
+import asyncio
+import gzip
+import json
+from backend.app.quiz_import import DUPLICATE_KEY_ERROR, import_quizzes, iter_lines
+
+
+class FakeDatabase:
+    def __init__(self, existing=()):
+        self.names = set(existing)
+        self.batches = []
+
+    async def insert_quizzes(self, quizzes):
+        self.batches.append(len(quizzes))
+        failures = []
+        for index, quiz in enumerate(quizzes):
+            if quiz["quiz_name"] in self.names:
+                failures.append((index, DUPLICATE_KEY_ERROR, "E11000 duplicate key"))
+            self.names.add(quiz["quiz_name"])
+        return len(quizzes) - len(failures), failures
+
+
+def quiz_line(name, answer="a"):
+    return json.dumps({"quiz_name": name, "questions": [{
+        "question": "q", "option_a": "1", "option_b": "2", "option_c": "3",
+        "option_d": "4", "correct_answer": answer}]})
+
+
+async def chunked(data, size=7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def run_import(data, db, **kwargs):
+    return asyncio.run(import_quizzes(db, chunked(data), **kwargs))
+
+
+def test_import_batches_and_reports_each_bad_line():
+    lines = [quiz_line(f"Quiz {i}") for i in range(5)]
+    lines[1] = quiz_line("Existing")
+    lines.insert(3, "{not json")
+    lines.insert(4, quiz_line("Bad answer", answer="ab"))
+    lines.insert(5, "")
+    db = FakeDatabase(existing={"Existing"})
+
+    result = run_import("\n".join(lines).encode(), db, batch_size=2)
+    assert result["imported"] == 4
+    assert result["duplicates"] == 1
+    assert result["invalid"] == 2
+    assert db.batches == [2, 2, 1]
+    assert [(e["line"], e["quiz_name"]) for e in result["errors"]] == [
+        (2, "Existing"), (4, None), (5, None)]
+
+
+def test_gzipped_upload_is_decompressed_incrementally():
+    body = "\n".join(quiz_line(f"Quiz {i}") for i in range(50)).encode() + b"\n"
+    db = FakeDatabase()
+
+    result = run_import(gzip.compress(body), db)
+    assert result["imported"] == 50 and result["error"] is None
+
+    truncated = run_import(gzip.compress(body)[:-40], FakeDatabase())
+    assert truncated["error"].startswith("Invalid gzip data")
+    assert truncated["imported"] > 0
+
+
+def test_oversized_lines_are_skipped_and_errors_capped():
+    lines = [quiz_line("Fits"), "x" * 400, "y" * 30]
+    result = run_import("\n".join(lines).encode(), FakeDatabase(),
+                        max_line_bytes=300, max_errors=1)
+    assert result["imported"] == 1
+    assert result["invalid"] == 2
+    assert len(result["errors"]) == 1 and result["errors_truncated"]
+
+    async def collect():
+        return [line async for line in iter_lines(chunked(b"ab\n" + b"c" * 20 + b"\nd"), 8)]
+    assert asyncio.run(collect()) == [(1, b"ab"), (2, None), (3, b"d")]
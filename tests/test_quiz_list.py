@@ -0,0 +1,92 @@
+import asyncio
+import json
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from backend.app.compression import PayloadCache
+from backend.app.main import app
+from backend.app.routes.quizzes import QuizListHandler
+
+
+class FakeDatabase:
+    def __init__(self, count):
+        self.quizzes = [{"id": str(ObjectId()), "quiz_name": f"Quiz {i}", "total_questions": 1}
+                        for i in range(count)]
+        self.quizzes.sort(key=lambda quiz: quiz["id"])
+        self.list_calls = 0
+        self.stats_version = "1"
+        self.stats = {}
+
+    async def get_list_version(self):
+        return "1"
+
+    async def get_stats_version(self):
+        return self.stats_version
+
+    async def list_quizzes(self, limit=None, after=None):
+        self.list_calls += 1
+        quizzes = [dict(quiz) for quiz in self.quizzes if after is None or quiz["id"] > after]
+        return quizzes[:limit] if limit is not None else quizzes
+
+    async def get_quiz_stats_summaries(self, quiz_ids):
+        return self.stats
+
+
+def list_page(db, payloads, **kwargs):
+    response = asyncio.run(QuizListHandler().handle(db, payloads, **kwargs))
+    return response, json.loads(response.body)
+
+
+def test_pages_follow_the_cursor_until_the_last_page():
+    db = FakeDatabase(5)
+    payloads = PayloadCache()
+
+    response, first = list_page(db, payloads, limit=2)
+    assert [quiz["quiz_name"] for quiz in first] == ["Quiz 0", "Quiz 1"]
+    assert response.headers["X-Next-Cursor"] == first[-1]["id"]
+
+    response, second = list_page(db, payloads, limit=2, after=response.headers["X-Next-Cursor"])
+    assert [quiz["quiz_name"] for quiz in second] == ["Quiz 2", "Quiz 3"]
+
+    response, last = list_page(db, payloads, limit=2, after=response.headers["X-Next-Cursor"])
+    assert [quiz["quiz_name"] for quiz in last] == ["Quiz 4"]
+    assert "X-Next-Cursor" not in response.headers
+
+    # An exact final page has no cursor either
+    response, everything = list_page(db, payloads, limit=5)
+    assert len(everything) == 5 and "X-Next-Cursor" not in response.headers
+
+    revalidated = asyncio.run(QuizListHandler().handle(
+        db, payloads, limit=5, if_none_match=response.headers["ETag"]))
+    assert revalidated.status_code == 304
+
+
+def test_statistics_changes_change_the_etag_and_the_body():
+    db = FakeDatabase(1)
+    payloads = PayloadCache()
+    response, before = list_page(db, payloads)
+    assert before[0]["attempts"] == 0
+
+    db.stats = {db.quizzes[0]["id"]: {"attempts": 2, "score_total": 3}}
+    db.stats_version = "2"
+    refreshed = asyncio.run(QuizListHandler().handle(
+        db, payloads, if_none_match=response.headers["ETag"]))
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != response.headers["ETag"]
+    assert json.loads(refreshed.body)[0]["attempts"] == 2 and db.list_calls == 2
+
+
+def test_invalid_cursor_is_rejected_before_querying():
+    db = FakeDatabase(1)
+    with pytest.raises(HTTPException) as error:
+        list_page(db, PayloadCache(), limit=2, after="not-an-id")
+    assert error.value.status_code == 400
+    assert db.list_calls == 0
+
+
+def test_cors_exposes_the_pagination_and_revalidation_headers():
+    response = TestClient(app).get("/", headers={"Origin": "http://localhost:5173"})
+    exposed = {name.strip().lower()
+               for name in response.headers["access-control-expose-headers"].split(",")}
+    assert {"x-next-cursor", "etag", "x-export-started-at", "idempotent-replayed"} <= exposed
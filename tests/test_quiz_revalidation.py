@@ -0,0 +1,104 @@
+import json
+import asyncio
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from backend.app.cache import QuizCache
+from backend.app.compression import PayloadCache
+from backend.app.database import content_version
+from backend.app.executors import WorkExecutor
+from backend.app.routes.quizzes import QuizByIdHandler, QuizByNameHandler
+from backend.app.variant_pool import VariantPoolManager
+
+
+def make_quiz(name, question):
+    quiz = {"_id": ObjectId(), "quiz_name": name,
+            "questions": [{"question": question, "option_a": "1", "option_b": "2",
+                           "option_c": "3", "option_d": "4"}]}
+    quiz["id"] = str(quiz["_id"])
+    quiz["version"] = content_version(quiz)
+    return quiz
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.quizzes = {}
+        self.loads = 0
+
+    def _by_id(self, quiz_id):
+        return next((quiz for quiz in self.quizzes.values() if quiz["id"] == quiz_id), None)
+
+    async def get_quiz(self, quiz_name):
+        self.loads += 1
+        return self.quizzes.get(quiz_name)
+
+    async def get_quiz_by_id(self, quiz_id):
+        self.loads += 1
+        return self._by_id(quiz_id)
+
+    async def get_quiz_version(self, quiz_name):
+        quiz = self.quizzes.get(quiz_name)
+        return {"id": quiz["id"], "version": quiz["version"]} if quiz else None
+
+    async def get_quiz_version_by_id(self, quiz_id):
+        quiz = self._by_id(quiz_id)
+        return {"id": quiz["id"], "version": quiz["version"]} if quiz else None
+
+
+class Handlers:
+    """Calls the GET handlers with shared per-worker state, unshuffled"""
+
+    def __init__(self, db):
+        self.db = db
+        self.cache = QuizCache()
+        self.state = (self.cache, QuizCache(), VariantPoolManager(size=0),
+                      PayloadCache(), WorkExecutor(thread_workers=1, process_workers=0))
+
+    def by_name(self, quiz_name, if_none_match=None):
+        return asyncio.run(QuizByNameHandler().handle(
+            self.db, *self.state, quiz_name, shuffle=False, if_none_match=if_none_match))
+
+    def by_id(self, quiz_id, if_none_match=None):
+        return asyncio.run(QuizByIdHandler().handle(
+            self.db, *self.state, quiz_id, shuffle=False, if_none_match=if_none_match))
+
+
+def test_matching_etag_is_answered_with_304_and_vary():
+    db = FakeDatabase()
+    quiz = db.quizzes["Q"] = make_quiz("Q", "2 + 2?")
+    handlers = Handlers(db)
+
+    response = handlers.by_name("Q")
+    assert response.status_code == 200
+    assert response.headers["vary"] == "Accept-Encoding"
+    etag = response.headers["etag"]
+
+    for revalidated in (handlers.by_name("Q", etag), handlers.by_id(quiz["id"], etag)):
+        assert revalidated.status_code == 304 and not revalidated.body
+        assert revalidated.headers["etag"] == etag
+        assert revalidated.headers["vary"] == "Accept-Encoding"
+    assert db.loads == 1
+
+
+def test_etag_changes_after_delete_and_recreate_with_the_same_content():
+    db = FakeDatabase()
+    old = db.quizzes["Q"] = make_quiz("Q", "2 + 2?")
+    handlers = Handlers(db)
+    etag = handlers.by_name("Q").headers["etag"]
+
+    del db.quizzes["Q"]
+    handlers.cache.invalidate(quiz_id=old["id"], quiz_name="Q")
+    with pytest.raises(HTTPException) as error:
+        handlers.by_name("Q", etag)
+    assert error.value.status_code == 404
+
+    # Same content and version, but a new id in the body
+    new = db.quizzes["Q"] = make_quiz("Q", "2 + 2?")
+    assert new["version"] == old["version"]
+    response = handlers.by_name("Q", etag)
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert json.loads(response.body)["id"] == new["id"]
+    with pytest.raises(HTTPException) as error:
+        handlers.by_id(old["id"], etag)
+    assert error.value.status_code == 404
@@ -0,0 +1,108 @@
+import random
+from copy import deepcopy
+from bson import ObjectId
+from backend.app.shuffling import (
+    OPTION_PERMUTATIONS, QuizShuffler, ShufflePlan, floyd_sample, shuffle_quiz)
+
+
+def make_quiz(question_count=20):
+    return {
+        "_id": ObjectId(),
+        "quiz_name": "Shuffle Quiz",
+        "questions": [
+            {
+                "question": f"q{i}",
+                "option_a": f"a{i}",
+                "option_b": f"b{i}",
+                "option_c": f"c{i}",
+                "option_d": f"d{i}",
+                "correct_answer": "abcd"[i % 4]
+            }
+            for i in range(question_count)
+        ]
+    }
+
+
+def correct_text(question):
+    return question[f"option_{question['correct_answer']}"]
+
+
+def test_shuffle_keeps_questions_and_correct_answers():
+    quiz = make_quiz()
+    shuffled = shuffle_quiz(quiz)
+
+    assert shuffled["id"] == str(quiz["_id"])
+    assert "_id" not in shuffled
+    originals = {q["question"]: q for q in quiz["questions"]}
+    assert sorted(originals) == sorted(q["question"] for q in shuffled["questions"])
+    for question in shuffled["questions"]:
+        original = originals[question["question"]]
+        assert correct_text(question) == correct_text(original)
+        assert sorted(question[k] for k in ("option_a", "option_b", "option_c", "option_d")) == \
+            sorted(original[k] for k in ("option_a", "option_b", "option_c", "option_d"))
+
+
+def test_shuffle_does_not_modify_source_document():
+    quiz = make_quiz()
+    snapshot = deepcopy(quiz)
+    shuffle_quiz(quiz)
+    assert quiz == snapshot
+
+
+def test_duplicate_option_text_keeps_correct_position():
+    question = {
+        "question": "Pick the second one",
+        "option_a": "same",
+        "option_b": "same",
+        "option_c": "other",
+        "option_d": "another",
+        "correct_answer": "b"
+    }
+    quiz = {"quiz_name": "Duplicates", "questions": [question]}
+    for option_order, order in enumerate(OPTION_PERMUTATIONS):
+        plan = ShufflePlan(None, bytes([option_order]))
+        shuffled = plan.apply(quiz)["questions"][0]
+        # Original option b (index 1) is displayed where the permutation puts it
+        assert shuffled["correct_answer"] == "abcd"[order.index(1)]
+
+
+def test_plan_is_reproducible_with_seeded_rng():
+    shuffler = QuizShuffler()
+    first = shuffler.plan(50, random.Random(42))
+    second = shuffler.plan(50, random.Random(42))
+    assert list(first.question_order) == list(second.question_order)
+    assert first.option_orders == second.option_orders
+    assert sorted(first.question_order) == list(range(50))
+
+
+def test_questions_without_options_are_left_alone():
+    quiz = {"quiz_name": "Odd", "questions": [
+        {"question": "free text", "correct_answer": "a"},
+        {"question": "bad answer", "option_a": "1", "option_b": "2",
+         "option_c": "3", "option_d": "4", "correct_answer": "z"},
+    ]}
+    shuffled = shuffle_quiz(quiz, shuffle_questions=False)
+    assert shuffled["questions"] == quiz["questions"]
+
+
+def test_floyd_sample_draws_distinct_sorted_indexes():
+    drawn = floyd_sample(2000, 25, random.Random(3))
+    assert len(set(drawn)) == 25
+    assert drawn == sorted(drawn)
+    assert all(0 <= index < 2000 for index in drawn)
+    assert drawn == floyd_sample(2000, 25, random.Random(3))
+    assert floyd_sample(5, 5, random.Random(3)) == [0, 1, 2, 3, 4]
+
+
+def test_sampled_plan_shows_only_the_drawn_questions():
+    quiz = make_quiz()
+    plan = QuizShuffler().plan(20, random.Random(9), sample=6)
+    assert len(plan.question_order) == 6
+    assert len(plan.option_orders) == 6
+
+    shuffled = plan.apply(quiz)
+    assert [q["question"] for q in shuffled["questions"]] == [
+        f"q{index}" for index in plan.question_order]
+
+    unshuffled = QuizShuffler(False, False).plan(20, random.Random(9), sample=6)
+    assert list(unshuffled.question_order) == sorted(unshuffled.question_order)
@@ -0,0 +1,154 @@
+import time
+import asyncio
+from bson import ObjectId
+from backend.app.answer_key import AnswerKey
+from backend.app.attempts import attempt_record
+from backend.app.shuffling import ShufflePlan
+from backend.app.stats import rebuild_stats, rollup_attempts, stats_detail, stats_summary
+
+
+def make_key_doc():
+    return {"_id": ObjectId(), "id": None, "quiz_name": "Stats",
+            "version": "v1", "answer_key": AnswerKey("abcd")}
+
+
+def test_rollup_sums_scores_and_correct_counts():
+    quiz = make_key_doc()
+    attempts = [attempt_record(quiz, list(answers), score) for answers, score in
+                (("abcd", 4), ("abdd", 3), ("-bcc", 2))]
+
+    rollup = rollup_attempts(attempts)[quiz["_id"]]
+    assert rollup["attempts"] == 3
+    assert rollup["score_total"] == 9
+    assert rollup["correct"] == [2, 3, 2, 2]
+
+
+def test_stats_read_from_stored_rollup():
+    quiz = dict(make_key_doc(), id="abc")
+    stored = {"attempts": 4, "score_total": 10, "question_count": 4,
+              "correct": {"0": 4, "2": 1}}
+
+    detail = stats_detail(quiz, stored)
+    assert detail["average_score"] == 2.5
+    assert detail["average_percentage"] == 62.5
+    assert [q["correct"] for q in detail["questions"]] == [4, 0, 1, 0]
+    assert detail["questions"][0]["correct_rate"] == 1.0
+
+    assert stats_summary(None) == {"attempts": 0, "average_score": None}
+    assert stats_detail(quiz, None)["questions"][3]["correct_rate"] is None
+
+
+def test_sampled_attempts_count_only_shown_questions():
+    quiz = make_key_doc()
+    # Shows questions 2 and 4 only, both answered correctly
+    plan = ShufflePlan([1, 3], None)
+    attempts = [attempt_record(quiz, ["b", "d"], 2, plan),
+                attempt_record(quiz, list("abcc"), 3)]
+
+    rollup = rollup_attempts(attempts)[quiz["_id"]]
+    assert rollup["question_total"] == 6
+    assert rollup["shown"] == [1, 2, 1, 2]
+    assert rollup["correct"] == [1, 2, 1, 1]
+
+    stored = dict(rollup,
+                  correct={str(i): n for i, n in enumerate(rollup["correct"])},
+                  shown={str(i): n for i, n in enumerate(rollup["shown"])})
+    detail = stats_detail(dict(quiz, id="abc"), stored)
+    assert detail["average_percentage"] == round(5 / 6 * 100, 1)
+    assert [q["correct_rate"] for q in detail["questions"]] == [1.0, 1.0, 1.0, 0.5]
+
+
+class FakeDatabase:
+    """Stored attempts and rollups; flushes land during the first scan or replace"""
+
+    def __init__(self, attempts, stats, late_attempt=None, after_replace=None, deleted=()):
+        self.attempts = attempts
+        self.stats = stats
+        self.deleted = set(deleted)
+        self.late_attempt = late_attempt
+        self.after_replace = after_replace
+        self.scans = []
+
+    async def get_quiz_stats_writes(self, quiz_name=None, quiz_ids=None):
+        return {quiz_id: stats.get("writes") for quiz_id, stats in self.stats.items()
+                if quiz_ids is None or quiz_id in quiz_ids}
+
+    async def iter_attempts(self, quiz_name=None, quiz_ids=None):
+        self.scans.append(quiz_ids)
+        for attempt in list(self.attempts):
+            if quiz_ids is None or attempt["quiz_id"] in quiz_ids:
+                yield attempt
+        if self.late_attempt is not None:
+            attempt, self.late_attempt = self.late_attempt, None
+            self.attempts.append(attempt)
+            stats = self.stats[attempt["quiz_id"]]
+            stats["writes"] += 1
+            stats["attempts"] += 1
+
+    async def get_existing_quiz_ids(self, quiz_ids):
+        return set(quiz_ids) - self.deleted
+
+    async def replace_quiz_stats(self, rollups, expected_writes):
+        conflicts = []
+        for quiz_id in set(expected_writes) - set(rollups):
+            if self.stats.get(quiz_id, {}).get("writes") == expected_writes[quiz_id]:
+                del self.stats[quiz_id]
+        for quiz_id, rollup in rollups.items():
+            stored = self.stats.get(quiz_id)
+            if stored is not None and stored.get("writes") != expected_writes.get(quiz_id):
+                conflicts.append(quiz_id)
+            else:
+                self.stats[quiz_id] = dict(rollup, writes=expected_writes.get(quiz_id) or 0)
+        if self.after_replace is not None:
+            after_replace, self.after_replace = self.after_replace, None
+            after_replace()
+        return conflicts
+
+
+def test_rebuild_rereads_quizzes_changed_by_a_concurrent_flush(monkeypatch):
+    monkeypatch.setattr("backend.app.stats.REBUILD_RETRY_SECONDS", 0)
+    busy, quiet = make_key_doc(), dict(make_key_doc(), quiz_name="Quiet")
+    attempts = [attempt_record(busy, list("abcd"), 4), attempt_record(quiet, list("abcc"), 3)]
+    # Drifted rollups, as if an earlier flush was lost
+    stats = {busy["_id"]: {"writes": 3, "attempts": 7}, quiet["_id"]: {"writes": 1, "attempts": 9}}
+    db = FakeDatabase(attempts, stats, attempt_record(busy, list("abdd"), 3))
+
+    assert asyncio.run(rebuild_stats(db)) == 2
+    assert db.scans == [None, [busy["_id"]]]
+    assert db.stats[quiet["_id"]]["attempts"] == 1
+    # The attempt flushed mid-rebuild is counted once
+    assert db.stats[busy["_id"]]["attempts"] == 2
+    assert db.stats[busy["_id"]]["score_total"] == 7
+
+
+def test_rebuild_leaves_out_attempts_whose_increment_may_still_land(monkeypatch):
+    monkeypatch.setattr("backend.app.stats.REBUILD_RETRY_SECONDS", 0)
+    busy, quiet = make_key_doc(), dict(make_key_doc(), quiz_name="Quiet")
+    # Inserted by a flush that has not applied its $inc yet
+    in_flight = dict(attempt_record(busy, list("abdd"), 3), pending=time.time())
+    # Left pending by a writer that stopped before settling it
+    abandoned = dict(attempt_record(quiet, list("abcc"), 3), pending=time.time() - 3600)
+    attempts = [attempt_record(busy, list("abcd"), 4), in_flight, abandoned]
+    stats = {busy["_id"]: {"writes": 1, "attempts": 1, "score_total": 4}}
+
+    def land_increment():
+        del in_flight["pending"]
+        rollup = stats[busy["_id"]]
+        rollup.update(writes=2, attempts=2, score_total=7)
+
+    db = FakeDatabase(attempts, stats, after_replace=land_increment)
+    assert asyncio.run(rebuild_stats(db)) == 2
+    assert db.scans == [None, [busy["_id"]]]
+    assert db.stats[busy["_id"]]["attempts"] == 2
+    assert db.stats[busy["_id"]]["score_total"] == 7
+    assert db.stats[quiet["_id"]]["attempts"] == 1
+
+
+def test_rebuild_drops_rollups_of_deleted_quizzes():
+    kept, deleted = make_key_doc(), dict(make_key_doc(), quiz_name="Deleted")
+    attempts = [attempt_record(kept, list("abcd"), 4), attempt_record(deleted, list("abcd"), 4)]
+    stats = {kept["_id"]: {"writes": 1, "attempts": 1}, deleted["_id"]: {"writes": 2, "attempts": 1}}
+    db = FakeDatabase(attempts, stats, deleted=[deleted["_id"]])
+
+    assert asyncio.run(rebuild_stats(db)) == 1
+    assert list(db.stats) == [kept["_id"]]
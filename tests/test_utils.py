@@ -0,0 +1,25 @@
+import json
+from datetime import datetime
+from bson import ObjectId
+from backend.app.utils import etag_matches, mongodb_response, quiz_etag
+
+
+def test_mongodb_response_encodes_bson_types():
+    object_id = ObjectId()
+    created = datetime(2024, 5, 1, 12, 30)
+    response = mongodb_response({"_id": object_id, "created": created, "name": "Café"})
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {
+        "_id": str(object_id), "created": "2024-05-01T12:30:00", "name": "Café"}
+
+
+def test_etag_matching_uses_weak_comparison():
+    etag = quiz_etag("q1", "abc123")
+    assert etag_matches(etag, etag)
+    assert etag_matches('"q-q1-abc123"', etag)
+    assert etag_matches('W/"other", W/"q-q1-abc123"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"q-q1-abc124"', etag)
+    assert not etag_matches('W/"q-q2-abc123"', etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from backend.app.variants import (
+    InvalidVariantToken, VariantSigner, VariantToken, shuffle_variant,
+    variant_signer)
+
+
+def make_quiz(question_count=12):
+    return {
+        "_id": ObjectId(),
+        "quiz_name": "Variant Quiz",
+        "questions": [
+            {
+                "question": f"q{i}",
+                "option_a": f"a{i}",
+                "option_b": f"b{i}",
+                "option_c": f"c{i}",
+                "option_d": f"d{i}",
+                "correct_answer": "abcd"[i % 4]
+            }
+            for i in range(question_count)
+        ]
+    }
+
+
+def test_token_round_trip():
+    signer = VariantSigner("secret")
+    quiz_id = str(ObjectId())
+    token = signer.verify(signer.sign(VariantToken(quiz_id, 2 ** 64 - 1, True, False)))
+    assert token.quiz_id == quiz_id
+    assert token.seed == 2 ** 64 - 1
+    assert token.shuffle_questions is True
+    assert token.shuffle_options is False
+
+
+def test_sampled_token_round_trip_and_variant():
+    signer = VariantSigner("secret")
+    quiz = make_quiz(40)
+    quiz_id = str(quiz["_id"])
+    encoded = signer.sign(VariantToken(quiz_id, 11, False, True, sample=7))
+    token = signer.verify(encoded)
+    assert token.sample == 7
+    assert token.shuffle_questions is False
+
+    plan = token.plan(40)
+    assert len(plan.question_order) == 7
+    # Unsampled tokens keep the original, shorter layout
+    assert len(signer.sign(VariantToken(quiz_id, 11))) < len(encoded)
+    assert signer.verify(signer.sign(VariantToken(quiz_id, 11))).sample is None
+
+
+def test_tampered_or_foreign_tokens_are_rejected():
+    signer = VariantSigner("secret")
+    encoded = signer.sign(VariantToken(str(ObjectId()), 7))
+    tampered = encoded[:5] + ("A" if encoded[5] != "A" else "B") + encoded[6:]
+
+    with pytest.raises(InvalidVariantToken):
+        signer.verify(tampered)
+    with pytest.raises(InvalidVariantToken):
+        VariantSigner("other secret").verify(encoded)
+    with pytest.raises(InvalidVariantToken):
+        signer.verify("not-a-token")
+
+
+def test_token_rebuilds_the_served_variant():
+    quiz = make_quiz()
+    served = shuffle_variant(quiz)
+    token = variant_signer.verify(served.pop("variant_token"))
+
+    rebuilt = token.plan(len(quiz["questions"])).apply(quiz)
+    assert rebuilt == served
+
+
+def test_variant_pool_rotates_and_replaces_worn_out_variants():
+    import json
+    from backend.app.variant_pool import VariantPoolManager
+
+    quiz = make_quiz()
+    quiz["id"] = str(quiz["_id"])
+    pools = VariantPoolManager(size=3, max_uses=2)
+
+    async def wait_for(condition):
+        for _ in range(500):
+            if condition():
+                return
+            await asyncio.sleep(0.005)
+        raise AssertionError("pool work did not finish")
+
+    async def run():
+        # The first request finds no pool and shuffles inline while it fills
+        assert pools.get(quiz) is None
+        assert pools.get(quiz) is None
+        await wait_for(lambda: pools.stats()["pools"] == 1)
+        assert pools.stats()["generated_pools"] == 1
+
+        first_round = [pools.get(quiz) for _ in range(3)]
+        assert len(set(first_round)) == 3
+        for body in first_round:
+            served = json.loads(body.body)
+            token = variant_signer.verify(served["variant_token"])
+            assert token.quiz_id == quiz["id"]
+
+        # Second use of each variant wears it out, so the third round is new
+        assert [pools.get(quiz) for _ in range(3)] == first_round
+        await wait_for(lambda: pools.stats()["replaced_variants"] == 3)
+        assert not set(pools.get(quiz) for _ in range(3)) & set(first_round)
+
+        # A fill that was running when its quiz changed is discarded
+        pools.invalidate(quiz["id"])
+        assert pools.get(quiz) is None
+        pools.invalidate(quiz["id"])
+        await asyncio.sleep(0.05)
+        assert pools.stats()["pools"] == 0
+        await pools.stop()
+
+    asyncio.run(run())